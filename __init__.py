@@ -7,6 +7,7 @@ from .exporting import export_gzrs2, export_rscol, export_rselu, export_rsnav, e
 
 from .constants_gzrs2 import *
 from .lib.lib_gzrs2 import *
+from .lib.navquery_gzrs2 import *
 
 bl_info = {
     'name': 'GZRS2/3 Format',
@@ -255,6 +256,79 @@ class GZRS2_OT_Preprocess_Geometry(Operator):
 
         return { 'FINISHED' }
 
+class GZRS2_OT_Find_Nav_Path(Operator):
+    bl_idname = 'gzrs2.find_nav_path'
+    bl_label = "Find Navigation Path"
+    bl_options = { 'REGISTER', 'INTERNAL', 'UNDO' }
+    bl_description = "Finds a path across the active navigation mesh between the two selected empties"
+
+    heuristicWeight: FloatProperty(
+        name = 'Heuristic Weight',
+        description = "Weight of the straight line estimate in the search. At one the path is the shortest through the face centers, higher values search faster on large meshes but may return a path up to that many times longer",
+        default = NAV_QUERY_HEURISTIC_WEIGHT,
+        min = 1.0,
+        max = 10.0,
+        soft_min = 1.0,
+        soft_max = 10.0
+    )
+
+    @classmethod
+    def poll(cls, context):
+        blObj = context.active_object
+
+        if blObj is None or blObj.type != 'MESH':
+            return False
+
+        if blObj.mode != 'OBJECT':
+            return False
+
+        blMesh = blObj.data
+
+        if blMesh is None or blMesh.gzrs2.meshType != 'NAVIGATION':
+            return False
+
+        return sum(1 for object in context.selected_objects if object.type == 'EMPTY') == 2
+
+    def execute(self, context):
+        blObj = context.active_object
+        blMesh = blObj.data
+        blStartObj, blEndObj = tuple(object for object in context.selected_objects if object.type == 'EMPTY')
+
+        blMesh.calc_loop_triangles()
+
+        worldMatrix = blObj.matrix_world
+        vertices = tuple(tuple(worldMatrix @ vertex.co) for vertex in blMesh.vertices)
+        faces = tuple(tuple(triangle.vertices) for triangle in blMesh.loop_triangles)
+
+        query = createNavQueryMesh(vertices, faces)
+        paths, startFaces, endFaces = navFindPaths(query, (tuple(blStartObj.matrix_world.translation),), (tuple(blEndObj.matrix_world.translation),), self.heuristicWeight)
+
+        if startFaces[0] < 0 or endFaces[0] < 0:
+            self.report({ 'ERROR' }, f"GZRS2: Both empties must be directly above or below a navigation face!")
+            return { 'CANCELLED' }
+
+        if paths[0] is None:
+            self.report({ 'ERROR' }, f"GZRS2: No path exists between the empties, the navigation mesh has { query.islandCount } disconnected islands!")
+            return { 'CANCELLED' }
+
+        pathName = f"{ blObj.name }_Path"
+        pathVerts = tuple(Vector(point) for point in paths[0].tolist())
+        pathEdges = tuple((p, p + 1) for p in range(len(pathVerts) - 1))
+
+        blPathMesh = bpy.data.meshes.new(pathName)
+        blPathObj = bpy.data.objects.new(pathName, blPathMesh)
+
+        blPathMesh.from_pydata(pathVerts, pathEdges, ())
+        blPathMesh.update()
+
+        setObjFlagsDebug(blPathObj)
+        context.collection.objects.link(blPathObj)
+
+        length = sum((pathVerts[p + 1] - pathVerts[p]).length for p in range(len(pathVerts) - 1))
+        self.report({ 'INFO' }, f"GZRS2: Found a path with { len(pathVerts) } points, { length:.2f} units long")
+
+        return { 'FINISHED' }
+
 class GZRS2_OT_Unfold_Vertex_Data(Operator):
     bl_idname = 'gzrs2.unfold_vertex_data'
     bl_label = "Unfold Vertex Data"
@@ -795,6 +869,20 @@ class ImportGZRS2(Operator, ImportHelper):
                  ('SKIP',       'Skip',         "Don't search for or load any textures (fastest)"))
     )
 
+    statisticsOnly: BoolProperty(
+        name = 'Statistics Only',
+        description = "Scan the .rs headers and report section counts to the console without importing anything",
+        default = False
+    )
+
+    cacheMode: EnumProperty(
+        name = 'Cache',
+        items = (('USER',       'User',         "Cache parsed map data in the user config directory"),
+                 ('LOCAL',      'Local',        "Cache parsed map data in a file next to the map"),
+                 ('OFF',        'Off',          "Always parse the map files")),
+        default = 'OFF'
+    )
+
     doBsptree: BoolProperty(
         name = 'Bsptree (slow)',
         description = "Import Bsptree data",
@@ -1063,6 +1151,8 @@ class GZRS2_PT_Import_Main(Panel):
         layout.use_property_decorate = False
         layout.enabled = operator.panelMain
 
+        layout.prop(operator, 'statisticsOnly')
+        layout.prop(operator, 'cacheMode')
         layout.prop(operator, 'convertUnits')
         layout.prop(operator, 'meshMode')
         layout.prop(operator, 'texSearchMode')
@@ -1750,6 +1840,44 @@ class RSCOL_PT_Import_Logging(Panel):
         layout.prop(operator, 'logColTris')
         layout.prop(operator, 'logCleanup')
 
+class GZRS2_OT_Validate_Col(Operator, ImportHelper):
+    bl_idname = 'gzrs2.validate_col'
+    bl_label = 'Validate COL'
+    bl_options = { 'REGISTER' }
+    bl_description = "Cast grids of rays against a COL file and mark any that leak out of the sealed bounds"
+
+    filter_glob: StringProperty(
+        default = '*.col',
+        options = { 'HIDDEN' }
+    )
+
+    convertUnits: BoolProperty(
+        name = 'Convert Units',
+        description = "Convert measurements from centimeters to meters",
+        default = True
+    )
+
+    resolution: IntProperty(
+        name = 'Resolution',
+        description = "Number of ray origins along each axis of the bounds, six rays are cast from every origin in empty space",
+        default = 16,
+        min = 2,
+        max = 128
+    )
+
+    doMarkers: BoolProperty(
+        name = 'Markers',
+        description = "Create a mesh with an edge for every leaking ray",
+        default = True
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is None or context.active_object.mode == 'OBJECT'
+
+    def execute(self, context):
+        return import_rscol.validateCol(self, context)
+
 class ImportRSNAV(Operator, ImportHelper):
     bl_idname = 'import_scene.rsnav'
     bl_label = 'Import NAV'
@@ -1975,6 +2103,14 @@ class ExportGZRS2(Operator, ExportHelper):
         default = True
     )
 
+    treeSampleCount: IntProperty(
+        name = 'Plane Samples',
+        description = "Candidate planes tried at large bsp and collision tree nodes, zero tries every polygon",
+        default = 0,
+        min = 0,
+        max = 1024
+    )
+
     doVisual: BoolProperty(
         name = 'Visual',
         description = "Export visual data",
@@ -1993,6 +2129,30 @@ class ExportGZRS2(Operator, ExportHelper):
         default = False
     )
 
+    lmWorkerCount: IntProperty(
+        name = 'Workers',
+        description = "Number of threads used for DXT1 compression, zero uses one per processor",
+        default = 0,
+        min = 0,
+        max = 64
+    )
+
+    lmEncodeFit: EnumProperty(
+        name = 'Compression',
+        items = LM_ENCODE_FIT_DATA
+    )
+
+    lmMipmaps: EnumProperty(
+        name = 'Mipmaps',
+        items = LM_MIPMAP_DATA
+    )
+
+    lmCacheBlocks: BoolProperty(
+        name = 'Block Cache',
+        description = "Keeps the encoded DXT1 blocks next to the .lm, later exports only encode the blocks whose texels changed",
+        default = False
+    )
+
     mod4Fix: BoolProperty(
         name = 'MOD4',
         description = "Compresses the color range to compensate for the D3DTOP_MODULATE4X flag",
@@ -2072,6 +2232,7 @@ class GZRS2_PT_Export_Main(Panel):
 
         layout.prop(operator, 'purgeUnused')
         layout.prop(operator, 'doVisual')
+        layout.prop(operator, 'treeSampleCount')
 
 class GZRS2_PT_Export_Collision(Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -2126,6 +2287,13 @@ class GZRS2_PT_Export_Lightmap(Panel):
 
         layout.prop(operator, 'lmVersion4')
 
+        column = layout.column()
+        column.prop(operator, 'lmWorkerCount')
+        column.prop(operator, 'lmEncodeFit')
+        column.prop(operator, 'lmMipmaps')
+        column.prop(operator, 'lmCacheBlocks')
+        column.enabled = operator.lmVersion4
+
         column = layout.column()
         column.prop(operator, 'mod4Fix')
         column.enabled = not operator.lmVersion4
@@ -2224,6 +2392,14 @@ class ExportRSCOL(Operator, ExportHelper):
         default = True
     )
 
+    treeSampleCount: IntProperty(
+        name = 'Plane Samples',
+        description = "Candidate planes tried at large bsp and collision tree nodes, zero tries every polygon",
+        default = 0,
+        min = 0,
+        max = 1024
+    )
+
     checkDegenerate: BoolProperty(
         name = 'Check Degenerate',
         description = "Check for degenerate polygons when building the collision tree",
@@ -2271,6 +2447,7 @@ class RSCOL_PT_Export_Main(Panel):
         column.prop(operator, 'includeChildren')
         column.enabled = operator.filterMode == 'SELECTED'
 
+        layout.prop(operator, 'treeSampleCount')
         layout.prop(operator, 'checkDegenerate')
 
         if not operator.checkDegenerate:
@@ -2584,6 +2761,30 @@ class ExportRSLM(Operator, ExportHelper):
         default = False
     )
 
+    lmWorkerCount: IntProperty(
+        name = 'Workers',
+        description = "Number of threads used for DXT1 compression, zero uses one per processor",
+        default = 0,
+        min = 0,
+        max = 64
+    )
+
+    lmEncodeFit: EnumProperty(
+        name = 'Compression',
+        items = LM_ENCODE_FIT_DATA
+    )
+
+    lmMipmaps: EnumProperty(
+        name = 'Mipmaps',
+        items = LM_MIPMAP_DATA
+    )
+
+    lmCacheBlocks: BoolProperty(
+        name = 'Block Cache',
+        description = "Keeps the encoded DXT1 blocks next to the .lm, later exports only encode the blocks whose texels changed",
+        default = False
+    )
+
     mod4Fix: BoolProperty(
         name = 'MOD4',
         description = "Compresses the color range to compensate for the D3DTOP_MODULATE4X flag",
@@ -2633,6 +2834,13 @@ class RSLM_PT_Export_Main(Panel):
         layout.prop(operator, 'doUVs')
         layout.prop(operator, 'lmVersion4')
 
+        column = layout.column()
+        column.prop(operator, 'lmWorkerCount')
+        column.prop(operator, 'lmEncodeFit')
+        column.prop(operator, 'lmMipmaps')
+        column.prop(operator, 'lmCacheBlocks')
+        column.enabled = operator.lmVersion4
+
         column = layout.column()
         column.prop(operator, 'mod4Fix')
         column.enabled = not operator.lmVersion4
@@ -3533,6 +3741,9 @@ class GZRS2_PT_Realspace_Mesh(Panel):
         if props.meshType in ('WORLD', 'COLLISION', 'NAVIGATION'):
             column.operator(GZRS2_OT_Preprocess_Geometry.bl_idname, text = "Pre-process Geometry")
 
+        if props.meshType == 'NAVIGATION':
+            column.operator(GZRS2_OT_Find_Nav_Path.bl_idname, text = "Find Path Between Empties")
+
 class GZRS2LightProperties(PropertyGroup):
     lightType: EnumProperty(
         name = 'Type',
@@ -4334,6 +4545,7 @@ classes = (
     GZRS2_OT_Specify_Path_MRS,
     GZRS2_OT_Specify_Path_MRF,
     GZRS2_OT_Preprocess_Geometry,
+    GZRS2_OT_Find_Nav_Path,
     GZRS2_OT_Unfold_Vertex_Data,
     GZRS2_OT_Apply_Material_Preset,
     GZRS2_OT_Toggle_Lightmap_Mix,
@@ -4358,6 +4570,7 @@ classes = (
     ImportRSCOL,
     RSCOL_PT_Import_Main,
     RSCOL_PT_Import_Logging,
+    GZRS2_OT_Validate_Col,
     ImportRSNAV,
     RSNAV_PT_Import_Main,
     RSNAV_PT_Import_Logging,
@@ -4401,6 +4614,7 @@ def menu_func_import(self, context):
     self.layout.operator(ImportRSELU.bl_idname, text = 'GunZ ELU (.elu)')
     self.layout.operator(ImportRSANI.bl_idname, text = 'GunZ ANI (.ani)')
     self.layout.operator(ImportRSCOL.bl_idname, text = 'GunZ COL (.col/.cl2)')
+    self.layout.operator(GZRS2_OT_Validate_Col.bl_idname, text = 'GunZ COL Validation (.col)')
     self.layout.operator(ImportRSNAV.bl_idname, text = 'GunZ NAV (.nav)')
     self.layout.operator(ImportRSLM.bl_idname, text = 'GunZ LM Image (.lm)')
 
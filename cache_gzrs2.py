@@ -0,0 +1,275 @@
+import bpy, os, hashlib, zipfile
+
+import numpy as np
+
+from dataclasses import fields
+
+from mathutils import Vector
+
+from .constants_gzrs2 import *
+from .classes_gzrs2 import *
+from .io_gzrs2 import *
+from .lib.lib_gzrs2 import *
+
+# Decoded map geometry is stored as a compressed .npz, keyed by the addon version, the import options
+# and the path, size and mtime of every file the readers would touch
+# Only GunZ 1 maps are cached, the RS3 readers populate a scene graph instead of flat arrays
+
+MAP_CACHE_BUFFERS = ('rsConvexBuffers', 'rsOctreeBuffers', 'bspTreeBuffers')
+MAP_CACHE_COUNTS = ('rsCPolygonCount', 'rsCVertexCount', 'rsBNodeCount', 'rsBPolygonCount', 'rsBVertexCount',
+                    'rsONodeCount', 'rsOPolygonCount', 'rsOVertexCount', 'bspNodeCount', 'bspPolygonCount', 'bspVertexCount')
+MAP_CACHE_FLAGS = ('doBsptree', 'doConvex', 'doCollision', 'doNavigation', 'doLightmap')
+
+def findMapFile(rspath, extensions):
+    for ext in extensions:
+        path = pathExists(f"{ rspath }{ os.extsep }{ ext }")
+
+        if path:
+            return path
+
+    return False
+
+def getMapCacheSources(rspath, rsxmlpath):
+    return (rspath, rsxmlpath,
+            findMapFile(rspath, BSP_EXTENSIONS),
+            findMapFile(rspath, COL_EXTENSIONS),
+            findMapFile(rspath, NAV_EXTENSIONS),
+            findMapFile(rspath, LM_EXTENSIONS))
+
+def getMapCacheKey(sources, state):
+    from . import bl_info
+
+    parts = [bl_info['version'], MAP_CACHE_VERSION, state.convertUnits]
+    parts += [getattr(state, flag) for flag in MAP_CACHE_FLAGS]
+
+    for path in sources:
+        if not path:
+            parts.append(None)
+            continue
+
+        stat = os.stat(path)
+        parts.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def getMapCachePath(rspath, cacheMode):
+    if cacheMode == 'LOCAL':
+        return f"{ rspath }{ os.extsep }{ MAP_CACHE_EXTENSION }"
+    elif cacheMode == 'USER':
+        directory = bpy.utils.user_resource('CONFIG', path = MAP_CACHE_DIRECTORY, create = True)
+        pathHash = hashlib.sha1(os.path.abspath(rspath).encode('utf-8')).hexdigest()[:16]
+
+        return os.path.join(directory, f"{ os.path.basename(rspath) }_{ pathHash }{ os.extsep }{ MAP_CACHE_EXTENSION }")
+
+    return None
+
+# Logging is a side effect of reading, so a cache hit would silently swallow it
+def isLoggingMapReads(state):
+    return (state.logRsHeaders or state.logRsPortals or state.logRsCells or state.logRsGeometry or state.logRsTrees or state.logRsPolygons or state.logRsVerts or
+            state.logBspHeaders or state.logBspPolygons or state.logBspVerts or
+            state.logColHeaders or state.logColNodes or state.logColTris or
+            state.logNavHeaders or state.logNavData or
+            state.logLmHeaders or state.logLmImages)
+
+def canCacheMap(state):
+    return state.rsCPolygonCount is not None and not state.smrPortals and not state.smrCells
+
+def packColTriangles(triangles):
+    vertices = np.array([[tuple(vertex) for vertex in triangle.vertices] for triangle in triangles], dtype = np.float32).reshape(-1, 3, 3)
+    normals = np.array([tuple(triangle.normal) for triangle in triangles], dtype = np.float32).reshape(-1, 3)
+
+    return vertices, normals
+
+def saveMapCache(cachePath, cacheKey, state, readTime):
+    data = {
+        'key':                  np.array(cacheKey),
+        'readTime':             np.array(readTime, dtype = np.float64),
+        'flags':                np.array([getattr(state, flag) for flag in MAP_CACHE_FLAGS], dtype = bool),
+        'counts':               np.array([-1 if getattr(state, count) is None else getattr(state, count) for count in MAP_CACHE_COUNTS], dtype = np.int64),
+        'rsConvexOctreeIDs':    state.rsConvexOctreeIDs,
+        'rsOctreeBounds':       np.array([(tuple(min), tuple(max)) for min, max in state.rsOctreeBounds], dtype = np.float32).reshape(-1, 2, 3),
+        'bspTreeBounds':        np.array([(tuple(min), tuple(max)) for min, max in state.bspTreeBounds], dtype = np.float32).reshape(-1, 2, 3),
+        'navVerts':             np.array([tuple(vertex) for vertex in state.navVerts], dtype = np.float32).reshape(-1, 3),
+        'navFaces':             np.array(state.navFaces, dtype = np.int64).reshape(-1, 3),
+        'navLinks':             np.array(state.navLinks, dtype = np.int64).reshape(-1, 3),
+        'lmImageSizes':         np.array([lmImage.size for lmImage in state.lmImages], dtype = np.int64),
+        'lmImageData':          np.concatenate([lmImage.data for lmImage in state.lmImages] + [np.zeros(0, dtype = np.float32)]),
+        'lmPolygonOrder':       np.array(state.lmPolygonOrder, dtype = np.int64),
+        'lmLightmapIDs':        np.array(state.lmLightmapIDs, dtype = np.int64),
+        'lmUVs':                state.lmUVs
+    }
+
+    for name in MAP_CACHE_BUFFERS:
+        buffers = getattr(state, name)
+
+        for bufferField in fields(RsTreeBuffers):
+            data[f"{ name }_{ bufferField.name }"] = getattr(buffers, bufferField.name)
+
+    if state.col1Tree is not None:
+        for treeField in fields(Col1Tree):
+            data[f"col1Tree_{ treeField.name }"] = getattr(state.col1Tree, treeField.name)
+    else:
+        data['colHullVertices'], data['colHullNormals'] = packColTriangles(state.colTrisHull)
+
+    # Written to the side first, so an interrupted save never leaves a truncated cache behind
+    tempPath = f"{ cachePath }{ os.extsep }tmp"
+
+    try:
+        with open(tempPath, 'wb') as file:
+            np.savez_compressed(file, **data)
+
+        os.replace(tempPath, cachePath)
+    except OSError:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+        return False
+
+    return True
+
+# Returns the read time recorded when the cache was saved, or None on a miss
+# Everything is decoded before touching the state, so a damaged or truncated cache falls back to the readers cleanly
+def loadMapCache(cachePath, cacheKey, state):
+    if not cachePath or not os.path.exists(cachePath):
+        return None
+
+    try:
+        with np.load(cachePath, allow_pickle = False) as data:
+            if str(data['key']) != cacheKey:
+                return None
+
+            values = dict(zip(MAP_CACHE_FLAGS, data['flags'].tolist()))
+            values.update((count, None if value < 0 else value) for count, value in zip(MAP_CACHE_COUNTS, data['counts'].tolist()))
+
+            for name in MAP_CACHE_BUFFERS:
+                values[name] = RsTreeBuffers(**{ bufferField.name: data[f"{ name }_{ bufferField.name }"] for bufferField in fields(RsTreeBuffers) })
+
+            values['rsConvexOctreeIDs'] = data['rsConvexOctreeIDs']
+            values['rsOctreeBounds'] = [(Vector(min), Vector(max)) for min, max in data['rsOctreeBounds'].tolist()]
+            values['bspTreeBounds'] = [(Vector(min), Vector(max)) for min, max in data['bspTreeBounds'].tolist()]
+
+            if 'col1Tree_planes' in data:
+                values['col1Tree'] = Col1Tree(**{ treeField.name: data[f"col1Tree_{ treeField.name }"] for treeField in fields(Col1Tree) })
+                values['colTrisHull'], values['colTrisSolid'] = createCol1TreeTriangles(values['col1Tree'])
+            else:
+                values['colTrisHull'] = unpackColTriangles(data['colHullVertices'], data['colHullNormals'])
+
+            values['navVerts'] = ndarrayToVectors(data['navVerts'])
+            values['navFaces'] = tuple(tuple(face) for face in data['navFaces'].tolist())
+            values['navLinks'] = tuple(tuple(link) for link in data['navLinks'].tolist())
+
+            lmImageData = data['lmImageData']
+            lmImages = []
+            offset = 0
+
+            for size in data['lmImageSizes'].tolist():
+                lmImages.append(LmImage(size, lmImageData[offset:offset + size * size * 3]))
+                offset += size * size * 3
+
+            values['lmImages'] = lmImages
+            values['lmPolygonOrder'] = tuple(data['lmPolygonOrder'].tolist())
+            values['lmLightmapIDs'] = tuple(data['lmLightmapIDs'].tolist())
+            values['lmUVs'] = data['lmUVs']
+
+            readTime = float(data['readTime'])
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+    for name, value in values.items():
+        setattr(state, name, value)
+
+    return readTime
+
+# Encoded lightmap blocks are stored next to the .lm, keyed by the addon version and the endpoint fit
+# Blocks are matched by position, so the sidecar is only useful for re-exports of the same lightmap
+
+def getLmBlockCachePath(lmpath):
+    return f"{ lmpath }{ os.extsep }{ LM_BLOCK_CACHE_EXTENSION }"
+
+def getLmBlockCacheKey(state):
+    from . import bl_info
+
+    return hashlib.sha1(repr((bl_info['version'], LM_BLOCK_CACHE_VERSION, state.lmEncodeFit)).encode('utf-8')).hexdigest()
+
+# Seconds per encoded block, only measured when most blocks missed, small batches are dominated by fixed costs
+def getLmBlockTime(blockCache):
+    missCount = blockCache.blockCount - blockCache.hitCount
+
+    if missCount > 0 and (missCount * 2 >= blockCache.blockCount or blockCache.previousBlockTime == 0.0):
+        return blockCache.encodeTime / missCount
+
+    return blockCache.previousBlockTime
+
+# Always returns a cache, an empty one on a miss so the export encodes everything and fills it
+def loadLmBlockCache(cachePath, state):
+    blockCache = LmBlockCache()
+
+    if not os.path.exists(cachePath):
+        return blockCache
+
+    try:
+        with np.load(cachePath, allow_pickle = False) as data:
+            if str(data['key']) != getLmBlockCacheKey(state):
+                return blockCache
+
+            levelCount = int(data['levelCount'])
+            previousHashes = [data[f"hashes_{ l }"] for l in range(levelCount)]
+            previousDigests = [data[f"digests_{ l }"] for l in range(levelCount)]
+            previousBlocks = [data[f"blocks_{ l }"] for l in range(levelCount)]
+            previousBlockTime = float(data['blockTime'])
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return blockCache
+
+    for hashes, digests, blocks in zip(previousHashes, previousDigests, previousBlocks):
+        if hashes.dtype != np.uint64 or blocks.dtype != np.uint8 or hashes.shape != (len(blocks),) or blocks.shape != (len(hashes), 8):
+            return blockCache
+
+        if digests.dtype != np.uint8 or digests.shape != (len(hashes), LM_BLOCK_DIGEST_SIZE):
+            return blockCache
+
+    blockCache.previousHashes = previousHashes
+    blockCache.previousDigests = previousDigests
+    blockCache.previousBlocks = previousBlocks
+    blockCache.previousBlockTime = previousBlockTime
+
+    return blockCache
+
+def saveLmBlockCache(cachePath, blockCache, state):
+    data = {
+        'key':          np.array(getLmBlockCacheKey(state)),
+        'levelCount':   np.array(len(blockCache.hashes), dtype = np.int64),
+        'blockTime':    np.array(getLmBlockTime(blockCache), dtype = np.float64)
+    }
+
+    for l, (hashes, digests, blocks) in enumerate(zip(blockCache.hashes, blockCache.digests, blockCache.blocks)):
+        data[f"hashes_{ l }"] = hashes
+        data[f"digests_{ l }"] = digests
+        data[f"blocks_{ l }"] = blocks
+
+    # Written to the side first, same as the map cache
+    tempPath = f"{ cachePath }{ os.extsep }tmp"
+
+    try:
+        with open(tempPath, 'wb') as file:
+            np.savez(file, **data)
+
+        os.replace(tempPath, cachePath)
+    except OSError:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+        return False
+
+    return True
+
+def reportLmBlockCache(self, cachePath, state):
+    blockCache = state.lmBlockCache
+
+    if not saveLmBlockCache(cachePath, blockCache, state):
+        self.report({ 'WARNING' }, f"GZRS2: Lightmap block cache could not be written: { cachePath }")
+        return
+
+    hitRate = blockCache.hitCount / blockCache.blockCount * 100 if blockCache.blockCount > 0 else 0.0
+    savedTime = max(blockCache.blockCount * getLmBlockTime(blockCache) - blockCache.cacheTime, 0.0)
+
+    self.report({ 'INFO' }, f"GZRS2: Lightmap block cache reused { blockCache.hitCount } of { blockCache.blockCount } blocks ({ hitRate:.1f}%), saved about { savedTime:.2f}s: { cachePath }")
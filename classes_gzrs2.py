@@ -1,9 +1,23 @@
 from dataclasses import dataclass, field
 from io import StringIO
 
+import numpy as np
+
 from bpy.types import Material, ShaderNode, Mesh, Object, Armature
 from mathutils import Vector, Matrix
 
+# Collects operator reports raised on worker threads, so the main thread can replay them in a stable order
+@dataclass
+class GZRS2ReportBuffer:
+    reports:            list = field(default_factory = list)
+
+    def report(self, type, message):
+        self.reports.append((type, message))
+
+    def replay(self, operator):
+        for type, message in self.reports:
+            operator.report(type, message)
+
 @dataclass
 class GZRS2State:
     silentIO:           StringIO = field(default_factory = StringIO)
@@ -15,6 +29,8 @@ class GZRS2State:
     texSearchMode:      str = ""
     isMapProp:          bool = False
     overwriteAction:    bool = False
+    doBsptree:          bool = False
+    doConvex:           bool = False
     doCollision:        bool = False
     doNavigation:       bool = False
     doLightmap:         bool = False
@@ -97,20 +113,18 @@ class GZRS2State:
     rsONodeCount:       int | None = None
     rsOPolygonCount:    int | None = None
     rsOVertexCount:     int | None = None
-    rsConvexVerts:      list = field(default_factory = list)
-    rsOctreeVerts:      list = field(default_factory = list)
-    rsConvexPolygons:   list = field(default_factory = list) # TODO: Improve performance of convex id matching
-    rsOctreePolygons:   list = field(default_factory = list)
+    rsConvexBuffers:    'RsTreeBuffers' = field(default_factory = lambda: RsTreeBuffers())
+    rsConvexOctreeIDs:  np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int64))
+    rsOctreeBuffers:    'RsTreeBuffers' = field(default_factory = lambda: RsTreeBuffers())
     rsOctreeBounds:     list = field(default_factory = list)
     smrPortals:         list = field(default_factory = list)
     smrCells:           list = field(default_factory = list)
     bspNodeCount:       int | None = None
     bspPolygonCount:    int | None = None
     bspVertexCount:     int | None = None
-    bspTreeVerts:       list = field(default_factory = list)
-    bspTreePolygons:    list = field(default_factory = list)
+    bspTreeBuffers:     'RsTreeBuffers' = field(default_factory = lambda: RsTreeBuffers())
     bspTreeBounds:      list = field(default_factory = list)
-    col1Root:           'Col1TreeNode' = None
+    col1Tree:           'Col1Tree' = None
     colTrisHull:        list = field(default_factory = list)
     colTrisSolid:       list = field(default_factory = list)
     navVerts:           list = field(default_factory = list)
@@ -124,7 +138,7 @@ class GZRS2State:
     lmImages:           list = field(default_factory = list)
     lmPolygonOrder:     tuple = field(default_factory = tuple)
     lmLightmapIDs:      tuple = field(default_factory = tuple)
-    lmUVs:              tuple = field(default_factory = tuple)
+    lmUVs:              np.ndarray = field(default_factory = lambda: np.zeros((0, 2), dtype = np.float32))
 
     blErrorMat:         Material    = None
     blXmlRsMats:        list = field(default_factory = list)
@@ -194,6 +208,29 @@ class GZRS2State:
 ####    RS IMPORT    ####
 #########################
 
+# Byte offsets and counts of each .rs section, gathered without decoding any vertices
+@dataclass
+class RsSectionIndex:
+    id:                 int = 0
+    version:            int = 0
+    fileSize:           int = 0
+    matCount:           int = 0
+    matOffset:          int = 0
+    convexOffset:       int = 0
+    convexPolygonCount: int = 0
+    convexVertexCount:  int = 0
+    bspCountsOffset:    int = 0
+    bspNodeCount:       int = 0
+    bspPolygonCount:    int = 0
+    bspVertexCount:     int = 0
+    bspIndexCount:      int = 0
+    octreeCountsOffset: int = 0
+    octreeNodeCount:    int = 0
+    octreePolygonCount: int = 0
+    octreeVertexCount:  int = 0
+    octreeIndexCount:   int = 0
+    octreeOffset:       int = 0
+
 @dataclass
 class Rs2ConvexVertex:
     pos:                Vector = (0, 0, 0)
@@ -224,6 +261,19 @@ class Rs2TreePolygon:
     vertexCount:        int = 0
     vertexOffset:       int = 0
 
+# Struct-of-arrays view of a tree's polygons, vertex i of polygon p lives at vertexOffsets[p] + i
+@dataclass
+class RsTreeBuffers:
+    positions:          np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float32))
+    normals:            np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float32))
+    uv1s:               np.ndarray = field(default_factory = lambda: np.zeros((0, 2), dtype = np.float32))
+    uv2s:               np.ndarray = field(default_factory = lambda: np.zeros((0, 2), dtype = np.float32))
+    matIDs:             np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    convexIDs:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    drawFlags:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.uint32))
+    vertexOffsets:      np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    vertexCounts:       np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+
 @dataclass
 class Rs3TreeVertex:
     pos:                Vector = (0, 0, 0)
@@ -402,7 +452,22 @@ ANI_TYPES_ENUM = {
 @dataclass
 class LmImage:
     size:               int = 0
-    data:               tuple = field(default_factory = tuple)
+    data:               np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.float32))
+
+# Per level block hashes, texel digests and encoded blocks, the previous ones are loaded from the sidecar and the new ones saved back
+@dataclass
+class LmBlockCache:
+    previousHashes:     list = field(default_factory = list)
+    previousDigests:    list = field(default_factory = list)
+    previousBlocks:     list = field(default_factory = list)
+    previousBlockTime:  float = 0.0
+    hashes:             list = field(default_factory = list)
+    digests:            list = field(default_factory = list)
+    blocks:             list = field(default_factory = list)
+    blockCount:         int = 0
+    hitCount:           int = 0
+    encodeTime:         float = 0.0
+    cacheTime:          float = 0.0
 
 #########################
 ####   COL  IMPORT   ####
@@ -421,6 +486,36 @@ class Col1TreeNode:
     negative:           'Col1TreeNode' = None
     triangles:          tuple = field(default_factory = tuple)
 
+# Nodes are stored in file order, children index into the same arrays and -1 marks a missing child
+# Triangles are stored in file order as well, each node owns the range starting at its triangleStart
+@dataclass
+class Col1Tree:
+    planes:             np.ndarray = field(default_factory = lambda: np.zeros((0, 4), dtype = np.float32))
+    solids:             np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = bool))
+    positives:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    negatives:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    triangleStarts:     np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    triangleCounts:     np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    vertices:           np.ndarray = field(default_factory = lambda: np.zeros((0, 3, 3), dtype = np.float32))
+    normals:            np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float32))
+
+# Bvh nodes are stored depth first, leaves have no children and own the range of bvhFaces starting at their bvhStart
+@dataclass
+class NavQueryMesh:
+    vertices:           np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float64))
+    faces:              np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.int32))
+    links:              np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.int32))
+    centers:            np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float64))
+    islands:            np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    islandCount:        int = 0
+    bvhMins:            np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float64))
+    bvhMaxs:            np.ndarray = field(default_factory = lambda: np.zeros((0, 3), dtype = np.float64))
+    bvhLefts:           np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    bvhRights:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    bvhStarts:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    bvhCounts:          np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+    bvhFaces:           np.ndarray = field(default_factory = lambda: np.zeros(0, dtype = np.int32))
+
 #########################
 ####    RS EXPORT    ####
 #########################
@@ -435,6 +530,11 @@ class GZRS2DegeneratePolygonError(Exception):
         super().__init__(message)
         self.message = message
 
+class GZRS2ExportSizeError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
 @dataclass
 class GZRS2ExportState:
     convertUnits:           bool = False
@@ -442,6 +542,7 @@ class GZRS2ExportState:
     includeChildren:        bool = False
 
     purgeUnused:            bool = False
+    treeSampleCount:        int = 0
     
     doVisual:               bool = False
 
@@ -450,6 +551,10 @@ class GZRS2ExportState:
 
     doLightmap:             bool = False
     lmVersion4:             bool = False
+    lmWorkerCount:          int = 0
+    lmEncodeFit:            str = 'BRIGHTNESS'
+    lmMipmaps:              str = 'NONE'
+    lmBlockCache:           LmBlockCache | None = None
     mod4Fix:                bool = False
     dumpImages:             bool = False
 
@@ -603,6 +708,10 @@ class RSNAVExportState:
 class RSLMExportState:
     doUVs:              bool = False
     lmVersion4:         bool = False
+    lmWorkerCount:      int = 0
+    lmEncodeFit:        str = 'BRIGHTNESS'
+    lmMipmaps:          str = 'NONE'
+    lmBlockCache:       LmBlockCache | None = None
     mod4Fix:            bool = False
     dumpImages:         bool = False
 
@@ -3,6 +3,31 @@ import os, math, re
 PI_OVER_2                       = math.pi / 2
 MESH_UNFOLD_THRESHOLD =         0.001
 
+EXPORT_BUFFERED =               True # False writes straight to disk, kept for A/B comparison
+EXPORT_CHUNK_SIZE =             1 << 20 # Bytes per write when patching an existing file
+
+PARSE_THREAD_COUNT =            4
+
+COL1_QUERY_EPSILON =            0.0001
+COL1_QUERY_CHUNK_SIZE =         1 << 16
+
+LM_ENCODE_SHARD_ROWS =          64 # Block rows per shard, also bounds the scratch memory of each worker
+LM_AXIS_FIT_ITERATIONS =        8
+LM_CLUSTER_FIT_ITERATIONS =     4
+LM_KAISER_WIDTH =               3.0
+LM_KAISER_ALPHA =               4.0
+LM_BLOCK_CACHE_VERSION =        2 # Bump whenever the encoders or the sidecar layout change
+LM_BLOCK_DIGEST_SIZE =          16
+LM_BLOCK_CACHE_EXTENSION =      'dxtcache.npz'
+
+NAV_QUERY_EPSILON =             0.0001
+NAV_QUERY_LEAF_SIZE =           8
+NAV_QUERY_HEURISTIC_WEIGHT =    1.0 # Above one the search is faster but the corridor is no longer guaranteed shortest
+
+MAP_CACHE_VERSION =             3 # Bump whenever the cached layout or the readers change
+MAP_CACHE_EXTENSION =           'gzrs2cache.npz'
+MAP_CACHE_DIRECTORY =           'gzrs2_cache'
+
 TEX_UPWARD_SEARCH_LIMIT =       4
 RES_UPWARD_SEARCH_LIMIT =       5
 XMLELU_TEXTYPES =               ['DIFFUSEMAP', 'SPECULARMAP', 'SELFILLUMINATIONMAP', 'OPACITYMAP', 'NORMALMAP']
@@ -44,6 +69,8 @@ BSP_VERSION =                   2
 TREE_MAX_DEPTH =                10
 TREE_MIN_NODE_SIZE =            1.5
 TREE_MAX_NODE_POLYGON_COUNT =   200
+TREE_SAMPLE_THRESHOLD =         64 # Nodes with fewer unused planes always search them all
+TREE_SAMPLE_SEED =              0
 
 FACING_POSITIVE                 = 0
 FACING_NEGATIVE                 = 1
@@ -257,6 +284,19 @@ FLAG_LIMIT_COMPARE_DATA = (
     ('GREATER',     'Greater',  "Vertex position greater than the specified position along the specified axis")
 )
 
+LM_ENCODE_FIT_DATA = (
+    ('BRIGHTNESS',  'Brightness',       "Brightest and darkest texels, fastest, matches earlier exports"),
+    ('BOX',         'Bounding Box',     "Corners of the color bounding box, fast"),
+    ('AXIS',        'Principal Axis',   "Extremes along the main color axis of each block"),
+    ('CLUSTER',     'Cluster Fit',      "Principal axis refined by least squares, slowest but closest to the source")
+)
+
+LM_MIPMAP_DATA = (
+    ('NONE',        'None',             "Full resolution only, matches earlier exports"),
+    ('BOX',         'Box',              "Averages every 2x2 square of texels, fast but soft"),
+    ('KAISER',      'Kaiser',           "Kaiser windowed sinc filter, keeps more detail in the smaller levels")
+)
+
 MESH_TYPE_DATA = (
     ('NONE',        'None',         "Not a Realspace mesh. Will not be exported"),
     ('RAW',         'Raw',          "Freshly imported, may need modification. Will not be exported"),
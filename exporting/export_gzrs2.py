@@ -19,6 +19,7 @@ from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..parse_gzrs2 import *
 from ..io_gzrs2 import *
+from ..cache_gzrs2 import *
 from ..lib.lib_gzrs2 import *
 from ..exporting.export_rselu import *
 
@@ -32,6 +33,7 @@ def exportRS2(self, context):
     state.includeChildren   = self.includeChildren and self.filterMode == 'SELECTED'
 
     state.purgeUnused       = self.purgeUnused
+    state.treeSampleCount   = self.treeSampleCount
 
     state.doVisual          = self.doVisual
 
@@ -40,6 +42,9 @@ def exportRS2(self, context):
 
     state.doLightmap        = self.panelLightmap and self.doVisual
     state.lmVersion4        = self.lmVersion4                       and self.panelLightmap
+    state.lmWorkerCount     = self.lmWorkerCount
+    state.lmEncodeFit       = self.lmEncodeFit
+    state.lmMipmaps         = self.lmMipmaps
     state.mod4Fix           = self.mod4Fix and not self.lmVersion4  and self.panelLightmap
     state.dumpImages        = self.dumpImages                       and self.panelLightmap
 
@@ -573,7 +578,7 @@ def exportRS2(self, context):
         windowManager.progress_update(0)
 
         try:
-            rsBsptreeRoot = createBsptreeNode(rsBsptreePolygons, bspPlanes, worldBBMin, worldBBMax)
+            rsBsptreeRoot = createBsptreeNode(rsBsptreePolygons, bspPlanes, worldBBMin, worldBBMax, sampleCount = state.treeSampleCount)
         except GZRS2EdgePlaneIntersectionError as error:
             self.report({ 'ERROR' }, error.message)
             return { 'CANCELLED' }
@@ -627,13 +632,14 @@ def exportRS2(self, context):
         windowManager.progress_update(0)
 
         try:
-            col1Root = createColtreeNode(coltreePolygons, coltreeBoundsQuads, state.checkDegenerate)
+            col1Root = createColtreeNode(coltreePolygons, coltreeBoundsQuads, state.checkDegenerate, sampleCount = state.treeSampleCount)
         except (GZRS2EdgePlaneIntersectionError, GZRS2DegeneratePolygonError) as error:
             self.report({ 'ERROR' }, error.message)
             return { 'CANCELLED' }
 
-        colNodeCount        = getTreeNodeCount(col1Root)
-        colTriangleCount    = getTreeTriangleCount(col1Root)
+        col1Tree            = flattenCol1Tree(col1Root)
+        colNodeCount        = len(col1Tree.solids)
+        colTriangleCount    = len(col1Tree.normals)
         colTreeDepth        = getTreeDepth(col1Root)
         
         windowManager.progress_end()
@@ -646,6 +652,11 @@ def exportRS2(self, context):
         # numCells = worldProps.lightmapNumCells
         numCells = 1
 
+        blockCachePath = getLmBlockCachePath(lmpath)
+
+        if state.lmVersion4 and self.lmCacheBlocks:
+            state.lmBlockCache = loadLmBlockCache(blockCachePath, state)
+
         if lightmapImage:
             imageDatas, imageSizes = generateLightmapData(self, lightmapImage, numCells, state)
 
@@ -1175,18 +1186,19 @@ def exportRS2(self, context):
     
     windowManager.progress_end()
 
-    def writeTreeNode(node):
+    def enterTreeNode(node):
         writeBounds(file, node.bbmin, node.bbmax, state.convertUnits)
         writePlane(file, node.plane, state.convertUnits, True)
 
-        writeBool(file, node.positive is not None)
-        if node.positive is not None:
-            writeTreeNode(node.positive)
+        return node
+
+    def branchTreeNode(node, b):
+        child = node.negative if b else node.positive
+        writeBool(file, child is not None)
 
-        writeBool(file, node.negative is not None)
-        if node.negative is not None:
-            writeTreeNode(node.negative)
+        return child
 
+    def leaveTreeNode(node, children):
         writeUInt(file, len(node.polygons))
 
         for polygon in node.polygons:
@@ -1238,7 +1250,9 @@ def exportRS2(self, context):
         
         createBackupFile(rspath, purgeUnused = state.purgeUnused)
 
-        with open(rspath, 'wb') as file:
+        rsSizeHint = 64 + rsCPolygonCount * 36 + rsCVertexCount * 24 + rsONodeCount * 48 + rsOPolygonCount * 28 + rsOVertexCount * 40
+
+        with openExportFile(rspath, sizeHint = rsSizeHint) as file:
             writeUInt(file, id)
             writeUInt(file, version)
 
@@ -1270,7 +1284,7 @@ def exportRS2(self, context):
             writeUInt(file, rsOVertexCount)
             writeUInt(file, rsOIndexCount)
 
-            writeTreeNode(rsOctreeRoot)
+            walkTree(rsOctreeRoot, enterTreeNode, branchTreeNode, leaveTreeNode)
 
     # Write Bsp
     if state.doVisual:
@@ -1292,7 +1306,9 @@ def exportRS2(self, context):
         
         createBackupFile(bsppath, purgeUnused = state.purgeUnused)
 
-        with open(bsppath, 'wb') as file:
+        bspSizeHint = 24 + bspNodeCount * 48 + bspPolygonCount * 28 + bspVertexCount * 40
+
+        with openExportFile(bsppath, sizeHint = bspSizeHint) as file:
             writeUInt(file, id)
             writeUInt(file, version)
 
@@ -1301,7 +1317,7 @@ def exportRS2(self, context):
             writeUInt(file, bspVertexCount)
             writeUInt(file, bspIndexCount)
 
-            writeTreeNode(rsBsptreeRoot)
+            walkTree(rsBsptreeRoot, enterTreeNode, branchTreeNode, leaveTreeNode)
 
     # Write Col
     if state.doCollision:
@@ -1322,32 +1338,14 @@ def exportRS2(self, context):
         
         createBackupFile(colpath, purgeUnused = state.purgeUnused)
 
-        with open(colpath, 'wb') as file:
+        with openExportFile(colpath, sizeHint = 16 + colNodeCount * 23 + colTriangleCount * 48) as file:
             writeUInt(file, id)
             writeUInt(file, version)
 
             writeUInt(file, colNodeCount)
             writeUInt(file, colTriangleCount)
 
-            def writeCol1Node(node):
-                writePlane(file, node.plane, state.convertUnits, True)
-                writeBool(file, node.solid)
-
-                writeBool(file, node.positive is not None)
-                if node.positive is not None:
-                    writeCol1Node(node.positive)
-
-                writeBool(file, node.negative is not None)
-                if node.negative is not None:
-                    writeCol1Node(node.negative)
-
-                writeUInt(file, len(node.triangles))
-
-                for triangle in node.triangles:
-                    writeCoordinateArray(file, triangle.vertices, state.convertUnits, True)
-                    writeDirection(file, triangle.normal, True)
-
-            writeCol1Node(col1Root)
+            writeCol1Tree(file, col1Tree, state.convertUnits)
     
     # Write Lm
     if state.doLightmap:
@@ -1368,7 +1366,9 @@ def exportRS2(self, context):
         
         createBackupFile(lmpath, purgeUnused = state.purgeUnused)
 
-        with open(lmpath, 'wb') as file:
+        lmSizeHint = 20 + 128 * imageCount + sum(len(imageData) for imageData in imageDatas) + len(polygonOrder) + len(lightmapIDs) + len(lightmapUVs)
+
+        with openExportFile(lmpath, sizeHint = lmSizeHint) as file:
             writeUInt(file, id)
             writeUInt(file, version)
 
@@ -1383,11 +1383,11 @@ def exportRS2(self, context):
                 pixelCount = imageSize ** 2
 
                 if state.lmVersion4:
-                    ddsSize = 76 + 32 + 20 + pixelCount // 2
+                    ddsSize = 76 + 32 + 20 + len(imageData)
                     writeUInt(file, ddsSize)
-                    writeDDSHeader(file, imageSize, pixelCount, ddsSize)
+                    writeDDSHeader(file, imageSize, pixelCount, ddsSize, getLmMipCount(imageSize, state))
                 else:
-                    bmpSize = 14 + 40 + pixelCount * 3
+                    bmpSize = getBMPSize(imageSize)
                     writeUInt(file, bmpSize)
                     writeBMPHeader(file, imageSize, bmpSize)
 
@@ -1399,6 +1399,9 @@ def exportRS2(self, context):
 
             file.truncate()
 
+        if state.lmBlockCache is not None:
+            reportLmBlockCache(self, blockCachePath, state)
+
         if state.dumpImages:
             dumpImageData(imageDatas, imageSizes, imageCount, directory, filename, state)
             
@@ -29,6 +29,7 @@ def exportCol(self, context):
     state.filterMode        = self.filterMode
     state.includeChildren   = self.includeChildren and self.filterMode == 'SELECTED'
 
+    state.treeSampleCount   = self.treeSampleCount
     state.checkDegenerate   = self.checkDegenerate
 
     if self.panelLogging:
@@ -125,13 +126,14 @@ def exportCol(self, context):
     windowManager.progress_update(0)
 
     try:
-        col1Root = createColtreeNode(coltreePolygons, coltreeBoundsQuads, state.checkDegenerate)
+        col1Root = createColtreeNode(coltreePolygons, coltreeBoundsQuads, state.checkDegenerate, sampleCount = state.treeSampleCount)
     except (GZRS2EdgePlaneIntersectionError, GZRS2DegeneratePolygonError) as error:
         self.report({ 'ERROR' }, error.message)
         return { 'CANCELLED' }
 
-    colNodeCount        = getTreeNodeCount(col1Root)
-    colTriangleCount    = getTreeTriangleCount(col1Root)
+    col1Tree            = flattenCol1Tree(col1Root)
+    colNodeCount        = len(col1Tree.solids)
+    colTriangleCount    = len(col1Tree.normals)
     colTreeDepth        = getTreeDepth(col1Root)
 
     # Write Col
@@ -150,32 +152,14 @@ def exportCol(self, context):
         print(f"Depth:              { colTreeDepth }")
         print()
 
-    with open(colpath, 'wb') as file:
+    with openExportFile(colpath, sizeHint = 16 + colNodeCount * 23 + colTriangleCount * 48) as file:
         writeUInt(file, id)
         writeUInt(file, version)
 
         writeUInt(file, colNodeCount)
         writeUInt(file, colTriangleCount)
 
-        def writeCol1Node(node):
-            writePlane(file, node.plane, state.convertUnits, True)
-            writeBool(file, node.solid)
-
-            writeBool(file, node.positive is not None)
-            if node.positive is not None:
-                writeCol1Node(node.positive)
-
-            writeBool(file, node.negative is not None)
-            if node.negative is not None:
-                writeCol1Node(node.negative)
-
-            writeUInt(file, len(node.triangles))
-
-            for triangle in node.triangles:
-                writeCoordinateArray(file, triangle.vertices, state.convertUnits, True)
-                writeDirection(file, triangle.normal, True)
-
-        writeCol1Node(col1Root)
+        writeCol1Tree(file, col1Tree, state.convertUnits)
 
     windowManager.progress_end()
 
@@ -801,7 +801,7 @@ def exportElu(self, context):
 
     createBackupFile(elupath)
 
-    with open(elupath, 'wb') as file:
+    with openExportFile(elupath) as file:
         writeUInt(file, id)
         writeUInt(file, version)
         writeInt(file, matCount)
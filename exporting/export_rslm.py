@@ -12,13 +12,19 @@ import bpy, os, io, math
 
 from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
+from ..cache_gzrs2 import *
 from ..lib.lib_gzrs2 import *
 
+from ..reading.readrs_gzrs2 import scanRs
+
 def exportLm(self, context):
     state = RSLMExportState()
 
     state.doUVs         = self.doUVs
     state.lmVersion4    = self.lmVersion4
+    state.lmWorkerCount = self.lmWorkerCount
+    state.lmEncodeFit   = self.lmEncodeFit
+    state.lmMipmaps     = self.lmMipmaps
     state.mod4Fix       = self.mod4Fix and not self.lmVersion4
     state.dumpImages    = self.dumpImages
 
@@ -68,7 +74,7 @@ def exportLm(self, context):
             self.report({ 'ERROR' }, "GZRS2: Lightmap UV export requires a GunZ 1 .rs file for the same map in the same directory!")
             return { 'CANCELLED' }
 
-        with open(rspath, 'rb') as file:
+        with MappedCursor(rspath) as file:
             if state.logLmHeaders:
                 print("===================  Read Rs  ===================")
                 print()
@@ -87,24 +93,12 @@ def exportLm(self, context):
                 return { 'CANCELLED' }
 
             if id == RS2_ID and version == RS2_VERSION:
-                for _ in range(readInt(file)): # skip packed material strings
-                    for __ in range(RS_PATH_LENGTH):
-                        if file.read(1) == b'\x00':
-                            break
-
-                state.rsCPolygonCount = readInt(file)
-                skipBytes(file, 4) # skip convex vertex count
-
-                for _ in range(state.rsCPolygonCount):
-                    skipBytes(file, 4 + 4 + (4 * 4) + 4) # skip material id, draw flags, plane and area data
-                    skipBytes(file, 2 * readInt(file) * 4 * 3) # skip vertex data and normal data
-
-                skipBytes(file, 4 * 4) # skip counts for bsp nodes, polygons, vertices and indices
+                index = scanRs(file)
 
-                state.rsONodeCount = readUInt(file)
-                state.rsOPolygonCount = readUInt(file)
-                state.rsOVertexCount = readInt(file)
-                skipBytes(file, 4) # skip octree indices count
+                state.rsCPolygonCount = index.convexPolygonCount
+                state.rsONodeCount = index.octreeNodeCount
+                state.rsOPolygonCount = index.octreePolygonCount
+                state.rsOVertexCount = index.octreeVertexCount
             else:
                 self.report({ 'ERROR' }, f"GZRS2: RS file must be for GunZ 1! { hex(id) }, { hex(version) }")
                 return { 'CANCELLED' }
@@ -114,6 +108,11 @@ def exportLm(self, context):
     # numCells = worldProps.lightmapNumCells
     numCells = 1
 
+    blockCachePath = getLmBlockCachePath(lmpath)
+
+    if state.lmVersion4 and self.lmCacheBlocks:
+        state.lmBlockCache = loadLmBlockCache(blockCachePath, state)
+
     imageDatas, imageSizes = generateLightmapData(self, lightmapImage, numCells, state)
 
     if not imageDatas or not imageSizes:
@@ -122,13 +121,7 @@ def exportLm(self, context):
     imageCount = len(imageDatas)
 
     # Read LM
-    createBackupFile(lmpath)
-
-    with open(lmpath, 'r+b') as file:
-        file.seek(0, os.SEEK_END)
-        fileSize = file.tell()
-        file.seek(0, os.SEEK_SET)
-
+    with MappedCursor(lmpath) as file:
         id = readUInt(file)
         version = readUInt(file)
         lmCPolygonCount = readUInt(file) # CONVEX polygon count!
@@ -146,79 +139,104 @@ def exportLm(self, context):
         for _ in range(readUInt(file)):
             skipBytes(file, readUInt(file)) # skip image data
 
+        # Kept sections are copied straight from the old file, so only their offset and size are needed
+        keptOffset = file.tell()
+
         if state.doUVs:
-            lmDataBackup = file.read(4 * state.rsOPolygonCount) # backup polygon order
+            keptSize = 4 * state.rsOPolygonCount # polygon order
         else:
-            lmDataBackup = file.read(fileSize - file.tell()) # backup polygon order, lightmap ids and uvs
+            keptSize = file.size - keptOffset # polygon order, lightmap ids and uvs
 
-        # Write LM
-        file.seek(4, os.SEEK_SET)
+        if keptOffset + keptSize > file.size:
+            self.report({ 'ERROR' }, f"GZRS2: LM file is truncated! { file.size }, { keptOffset + keptSize }")
+            return { 'CANCELLED' }
 
-        if state.logLmHeaders:
-            print("===================  Write Lm  ===================")
-            print()
+    # Never atlas, we increase the lightmap resolution instead
+    if state.doUVs:
+        # newPolyOrder = bytearray(state.rsOPolygonCount * 4)
+        newLmIDs = bytearray(state.rsOPolygonCount * 4)
+        newUVs = bytearray(state.rsOVertexCount * 2 * 4)
 
-        writeUInt(file, LM_VERSION_EXT if state.lmVersion4 else LM_VERSION)
-        skipBytes(file, 4 + 4) # skip convex polygon count and octree node count
-        writeUInt(file, imageCount)
+        # newPolyOrderInts = memoryview(newPolyOrder).cast('I')
+        newLmIDInts = memoryview(newLmIDs).cast('I')
+        newUVFloats = memoryview(newUVs).cast('f')
 
-        if state.logLmHeaders:
-            print(f"Path:               { lmpath }")
-            print(f"ID:                 { hex(id) }")
-            print(f"Version:            { hex(version) }")
-            print()
-            print(f"Image Count:        { imageCount }")
-            print()
+        for p in range(state.rsOPolygonCount):
+            # newPolyOrderInts[p] = p
+            newLmIDInts[p] = 0
 
-        for i in range(imageCount):
-            imageData = imageDatas[i]
-            imageSize = imageSizes[i]
+        for v in range(state.rsOVertexCount):
+            uv2 = uvLayer2.data[v].uv
 
-            pixelCount = imageSize ** 2
+            newUVFloats[v * 2 + 0] = uv2.x
+            newUVFloats[v * 2 + 1] = 1 - uv2.y
 
-            if state.lmVersion4:
-                ddsSize = 76 + 32 + 20 + pixelCount // 2
-                writeUInt(file, ddsSize)
-                writeDDSHeader(file, imageSize, pixelCount, ddsSize)
-            else:
-                bmpSize = 14 + 40 + pixelCount * 3
-                writeUInt(file, bmpSize)
-                writeBMPHeader(file, imageSize, bmpSize)
+        # newPolyOrderInts.release()
+        newLmIDInts.release()
+        newUVFloats.release()
+    else:
+        newLmIDs = b''
+        newUVs = b''
 
-            file.write(imageData)
+    lmSize = 20 + (4 + (76 + 32 + 20 if state.lmVersion4 else 14 + 40)) * imageCount + sum(len(imageData) for imageData in imageDatas) + keptSize + len(newLmIDs) + len(newUVs)
 
-        # Never atlas, we increase the lightmap resolution instead
-        if state.doUVs:
-            # newPolyOrder = bytearray(state.rsOPolygonCount * 4)
-            newLmIDs = bytearray(state.rsOPolygonCount * 4)
-            newUVs = bytearray(state.rsOVertexCount * 2 * 4)
+    # Write LM
+    createBackupFile(lmpath)
+
+    if state.logLmHeaders:
+        print("===================  Write Lm  ===================")
+        print()
+
+    # The new file is streamed next to the old one and only replaces it once complete
+    try:
+        with openStreamingExportFile(lmpath) as file:
+            writeUInt(file, id)
+            writeUInt(file, LM_VERSION_EXT if state.lmVersion4 else LM_VERSION)
+            writeUInt(file, lmCPolygonCount)
+            writeUInt(file, lmONodeCount)
+            writeUInt(file, imageCount)
+
+            if state.logLmHeaders:
+                print(f"Path:               { lmpath }")
+                print(f"ID:                 { hex(id) }")
+                print(f"Version:            { hex(version) }")
+                print()
+                print(f"Image Count:        { imageCount }")
+                print()
 
-            # newPolyOrderInts = memoryview(newPolyOrder).cast('I')
-            newLmIDInts = memoryview(newLmIDs).cast('I')
-            newUVFloats = memoryview(newUVs).cast('f')
+            for i in range(imageCount):
+                imageData = imageDatas[i]
+                imageSize = imageSizes[i]
 
-            for p in range(state.rsOPolygonCount):
-                # newPolyOrderInts[p] = p
-                newLmIDInts[p] = 0
+                pixelCount = imageSize ** 2
 
-            for v in range(state.rsOVertexCount):
-                uv2 = uvLayer2.data[v].uv
+                if state.lmVersion4:
+                    ddsSize = 76 + 32 + 20 + len(imageData)
+                    writeUInt(file, ddsSize)
+                    writeDDSHeader(file, imageSize, pixelCount, ddsSize, getLmMipCount(imageSize, state))
+                else:
+                    bmpSize = getBMPSize(imageSize)
+                    writeUInt(file, bmpSize)
+                    writeBMPHeader(file, imageSize, bmpSize)
 
-                newUVFloats[v * 2 + 0] = uv2.x
-                newUVFloats[v * 2 + 1] = 1 - uv2.y
+                file.write(imageData)
 
-            # newPolyOrderInts.release()
-            newLmIDInts.release()
-            newUVFloats.release()
+            with MappedCursor(lmpath) as oldFile:
+                oldFile.seek(keptOffset)
+                file.copyFrom(oldFile, keptSize)
 
             # file.write(newPolyOrder)
-            file.write(lmDataBackup)
             file.write(newLmIDs)
             file.write(newUVs)
-        else:
-            file.write(lmDataBackup)
 
-        file.truncate()
+            if file.tell() != lmSize:
+                raise GZRS2ExportSizeError(f"GZRS2: LM size does not match! { file.tell() }, { lmSize }")
+    except GZRS2ExportSizeError as error:
+        self.report({ 'ERROR' }, error.message)
+        return { 'CANCELLED' }
+
+    if state.lmBlockCache is not None:
+        reportLmBlockCache(self, blockCachePath, state)
 
     if state.dumpImages:
         dumpImageData(imageDatas, imageSizes, imageCount, directory, filename, state)
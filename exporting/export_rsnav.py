@@ -9,10 +9,13 @@
 
 import bpy, os, io
 
+import numpy as np
+
 from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
 from ..lib.lib_gzrs2 import *
+from ..lib.navquery_gzrs2 import *
 
 def exportNav(self, context):
     state = RSNAVExportState()
@@ -58,31 +61,29 @@ def exportNav(self, context):
         print(output)
 
     faceCount = len(blMesh.loop_triangles)
-    indices = tuple(index for triangle in blMesh.loop_triangles for index in triangle.vertices)
+    faceIndices = np.zeros(faceCount * 3, dtype = np.int32)
+    blMesh.loop_triangles.foreach_get('vertices', faceIndices)
+
+    indices = tuple(faceIndices.tolist())
+    faces = faceIndices.reshape(-1, 3).tolist()
 
     if state.logNavData:
         output = "Faces:              {:<3d}".format(faceCount)
         output += "      Min & Max: ({:>3d}, {:>3d})".format(min(indices), max(indices)) if faceCount > 0 else ''
         print(output)
 
-    uniquePairs = tuple((t1, t2) for t1 in blMesh.loop_triangles for t2 in blMesh.loop_triangles if t2 != t1)
-    degenerateCount = sum(1 for t1, t2 in uniquePairs if sum(1 for v1 in t1.vertices for v2 in t2.vertices if v2 == v1) == 3)
+    degenerateCount = countDegenerateNavFaces(faces)
 
     if degenerateCount > 0:
         self.report({ 'ERROR' }, f"GZRS2: NAV export found { degenerateCount } degenerate triangles!")
         return { 'CANCELLED' }
 
-    linkIndices = []
-
-    for t1, k1 in iter((t1, k1) for t1 in blMesh.loop_triangles for k1 in t1.edge_keys):
-        for t2, k2 in iter((t2, k2) for t2 in blMesh.loop_triangles for k2 in t2.edge_keys if t2 != t1):
-            if k2 == k1:
-                linkIndices.append(t2.index)
-                break
-        else:
-            linkIndices.append(-1)
+    linkIndices = createNavLinks(faces)
+    _, islandCount = findNavIslands(linkIndices)
 
-    linkIndices = tuple(linkIndices)
+    # Still exported, maps can have unreachable ledges on purpose, but no path will cross between islands
+    if islandCount > 1:
+        self.report({ 'WARNING' }, f"GZRS2: NAV export found { islandCount } disconnected islands!")
 
     if state.logNavData:
         output = "Links:              {:<3d}".format(faceCount)
@@ -103,7 +104,7 @@ def exportNav(self, context):
 
     createBackupFile(navpath)
 
-    with open(navpath, 'wb') as file:
+    with openExportFile(navpath, sizeHint = 16 + vertexCount * 12 + faceCount * 3 * (2 + 4)) as file:
         writeUInt(file, id)
         writeUInt(file, version)
 
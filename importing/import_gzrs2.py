@@ -32,15 +32,17 @@
 # Please report maps and models with unsupported features to me on Discord: Krunk#6051
 #####
 
-import bpy, os, math
+import bpy, os, math, time
 import xml.dom.minidom as minidom
 
 from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
 from mathutils import Vector, Matrix
 
 from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..parse_gzrs2 import *
+from ..cache_gzrs2 import *
 from ..reading.readrs_gzrs2 import *
 from ..reading.readbsp_gzrs2 import *
 from ..reading.readcol_gzrs2 import *
@@ -49,7 +51,80 @@ from ..reading.readlm_gzrs2 import *
 from ..reading.readelu_gzrs2 import *
 from ..lib.lib_gzrs2 import *
 
+def importRS2Statistics(self, rspath):
+    with MappedCursor(rspath) as file:
+        index = scanRs(file)
+
+    if index is None:
+        self.report({ 'ERROR' }, f"GZRS2: Statistics are only available for GunZ 1 .rs files! { rspath }")
+        return { 'CANCELLED' }
+
+    logRsSectionIndex(rspath, index)
+
+    self.report({ 'INFO' }, f"GZRS2: { index.matCount } materials, { index.convexPolygonCount } convex polygons, { index.bspPolygonCount } bsptree polygons, { index.octreeNodeCount } octree nodes, { index.octreePolygonCount } octree polygons, { index.octreeVertexCount } octree vertices")
+
+    return { 'FINISHED' }
+
+def readXmlFile(path, timings):
+    start = time.perf_counter()
+
+    with open(path, encoding = 'utf-8') as file:
+        xml = minidom.parseString(file.read())
+
+    timings[os.path.basename(path)] = time.perf_counter() - start
+
+    return xml
+
+# Runs on a worker thread, so reports are buffered and replayed by joinMapFile() on the main thread
+def readMapFile(reader, path, state, timings):
+    reports = GZRS2ReportBuffer()
+    start = time.perf_counter()
+
+    with MappedCursor(path) as file:
+        result = reader(reports, file, path, state)
+
+    timings[os.path.basename(path)] = time.perf_counter() - start
+
+    return result, reports
+
+def joinMapFile(self, task):
+    result, reports = task.result()
+    reports.replay(self)
+
+    return result
+
+def joinMapFiles(self, *tasks):
+    cancelled = False
+
+    for task in tasks:
+        if task is not None and joinMapFile(self, task):
+            cancelled = True
+
+    return cancelled
+
+# The .bsp and .lm readers validate against the .rs counts, the others only need the import options
+# Workers share the state without any locking, so every reader must only write the fields of its own file:
+# rs and smr fields for readRs, bsp for readBsp, col for readCol, nav for readNav and lm for readLm
+# Returns True if any reader cancelled
+def readMapFiles(self, executor, state, timings, rspath, bsppath, colpath, navpath, lmpath):
+    rsTask = executor.submit(readMapFile, readRs, rspath, state, timings)
+    colTask = executor.submit(readMapFile, readCol, colpath, state, timings) if colpath else None
+    navTask = executor.submit(readMapFile, readNav, navpath, state, timings) if navpath else None
+
+    if joinMapFile(self, rsTask):
+        joinMapFiles(self, colTask, navTask)
+        return True
+
+    bspTask = executor.submit(readMapFile, readBsp, bsppath, state, timings) if bsppath else None
+    lmTask = executor.submit(readMapFile, readLm, lmpath, state, timings) if lmpath else None
+
+    # Every worker is joined before bailing out so none of their reports are lost
+    return joinMapFiles(self, bspTask, colTask, navTask, lmTask)
+
 def importRS2(self, context):
+    if self.statisticsOnly:
+        return importRS2Statistics(self, self.filepath)
+
     state = GZRS2State()
 
     packagePrefs = context.preferences.addons['io_scene_gzrs2'].preferences
@@ -69,6 +144,7 @@ def importRS2(self, context):
     state.meshMode          = self.meshMode
     state.texSearchMode     = self.texSearchMode
     state.doBsptree         = self.doBsptree        and self.meshMode != 'BAKE'
+    state.doConvex          = self.meshMode == 'BAKE'
     state.doCollision       = self.doCollision      and self.meshMode != 'BAKE'
     state.doNavigation      = self.doNavigation     and self.meshMode != 'BAKE'
     state.doLightmap        = self.doLightmap
@@ -125,146 +201,121 @@ def importRS2(self, context):
     splitname = basename.split(os.extsep)
     state.filename = splitname[0]
 
-    xmlRs = False
-    for ext in XML_EXTENSIONS:
-        rsxmlpath = pathExists(f"{ rspath }{ os.extsep }{ ext }")
-
-        if rsxmlpath:
-            with open(rsxmlpath, encoding = 'utf-8') as file:
-                xmlRs = minidom.parseString(file.read())
-            break
-
-    if not rsxmlpath:
-        state.doLights = False
-        state.doProps = False
-        state.doDummies = False
-        state.doOcclusion = False
-        state.doFog = False
-        state.doSounds = False
-        self.report({ 'WARNING' }, "GZRS2: Map xml not found, no materials or objects to generate!")
-
-    xmlSpawn = False
-    xmlFlag = False
-    xmlSmoke = False
-
-    if state.doMisc:
-        spawnxmlpath = os.path.join(state.directory, "spawn.xml")
-        flagxmlpath = os.path.join(state.directory, "flag.xml")
-        smokexmlpath = os.path.join(state.directory, "smoke.xml")
-
-        for ext in XML_EXTENSIONS:
-            spawnxmlpath = pathExists(os.path.join(state.directory, f"spawn.{ ext }"))
-
-            if spawnxmlpath:
-                with open(spawnxmlpath, encoding = 'utf-8') as file:
-                    xmlSpawn = minidom.parseString(file.read())
-                break
-
-        for ext in XML_EXTENSIONS:
-            flagxmlpath = pathExists(os.path.join(state.directory, f"flag.{ ext }"))
-
-            if flagxmlpath:
-                with open(flagxmlpath, encoding = 'utf-8') as file:
-                    xmlFlag = minidom.parseString(file.read())
-                break
-
-        for ext in XML_EXTENSIONS:
-            smokexmlpath = pathExists(os.path.join(state.directory, f"smoke.{ ext }"))
-
-            if smokexmlpath:
-                with open(smokexmlpath, encoding = 'utf-8') as file:
-                    xmlSmoke = minidom.parseString(file.read())
-                break
-
-        if not spawnxmlpath:    self.report({ 'INFO' }, "GZRS2: Items requested but spawn.xml not found, no items to generate.")
-        if not flagxmlpath:     self.report({ 'INFO' }, "GZRS2: Flags requested but flag.xml not found, no flags to generate.")
-        if not smokexmlpath:    self.report({ 'INFO' }, "GZRS2: Smoke requested but smoke.xml not found, no smoke to generate.")
-
-    if xmlRs:
-        state.xmlRsMats =                       parseRsXML(self, xmlRs, 'MATERIAL',         serverProfile, state)
-        state.xmlGlbs =                         parseRsXML(self, xmlRs, 'GLOBAL',           serverProfile, state)
+    timings = {}
+    parseStart = time.perf_counter()
+
+    # None of the parsers touch bpy, so they run on worker threads and join before any datablock is created
+    # Logging stays serial, otherwise the console output of each reader would interleave
+    with ThreadPoolExecutor(max_workers = 1 if isLoggingMapReads(state) else PARSE_THREAD_COUNT) as executor:
+        rsxmlpath = findMapFile(rspath, XML_EXTENSIONS)
+        xmlRsTask = executor.submit(readXmlFile, rsxmlpath, timings) if rsxmlpath else None
+
+        if state.doMisc:
+            spawnxmlpath = findMapFile(os.path.join(state.directory, "spawn"), XML_EXTENSIONS)
+            flagxmlpath = findMapFile(os.path.join(state.directory, "flag"), XML_EXTENSIONS)
+            smokexmlpath = findMapFile(os.path.join(state.directory, "smoke"), XML_EXTENSIONS)
+
+            xmlSpawnTask = executor.submit(readXmlFile, spawnxmlpath, timings) if spawnxmlpath else None
+            xmlFlagTask = executor.submit(readXmlFile, flagxmlpath, timings) if flagxmlpath else None
+            xmlSmokeTask = executor.submit(readXmlFile, smokexmlpath, timings) if smokexmlpath else None
+
+        xmlRs = xmlRsTask.result() if xmlRsTask else False
+
+        if not rsxmlpath:
+            state.doLights = False
+            state.doProps = False
+            state.doDummies = False
+            state.doOcclusion = False
+            state.doFog = False
+            state.doSounds = False
+            self.report({ 'WARNING' }, "GZRS2: Map xml not found, no materials or objects to generate!")
+
+        xmlSpawn = False
+        xmlFlag = False
+        xmlSmoke = False
+
+        if state.doMisc:
+            xmlSpawn = xmlSpawnTask.result() if xmlSpawnTask else False
+            xmlFlag = xmlFlagTask.result() if xmlFlagTask else False
+            xmlSmoke = xmlSmokeTask.result() if xmlSmokeTask else False
+
+            if not spawnxmlpath:    self.report({ 'INFO' }, "GZRS2: Items requested but spawn.xml not found, no items to generate.")
+            if not flagxmlpath:     self.report({ 'INFO' }, "GZRS2: Flags requested but flag.xml not found, no flags to generate.")
+            if not smokexmlpath:    self.report({ 'INFO' }, "GZRS2: Smoke requested but smoke.xml not found, no smoke to generate.")
+
+        if xmlRs:
+            state.xmlRsMats =                       parseRsXML(self, xmlRs, 'MATERIAL',         serverProfile, state)
+            state.xmlGlbs =                         parseRsXML(self, xmlRs, 'GLOBAL',           serverProfile, state)
+
+            if state.doLights:      state.xmlLits = parseRsXML(self, xmlRs, 'LIGHT',            serverProfile, state)
+            if state.doProps:       state.xmlObjs = parseRsXML(self, xmlRs, 'OBJECT',           serverProfile, state)
+            if state.doDummies:     state.xmlDums = parseRsXML(self, xmlRs, 'DUMMY',            serverProfile, state)
+            if state.doOcclusion:   state.xmlOccs = parseRsXML(self, xmlRs, 'OCCLUSION',        serverProfile, state)
+            if state.doFog:         state.xmlFogs = parseRsXML(self, xmlRs, 'FOG',              serverProfile, state)
+            if state.doSounds:      state.xmlAmbs = parseRsXML(self, xmlRs, 'AMBIENTSOUND',     serverProfile, state)
+
+        if state.doMisc:
+            if xmlSpawn:            state.xmlItms = parseSpawnXML(self, xmlSpawn, state)
+            if xmlFlag:             state.xmlFlgs = parseFlagXML(self, xmlFlag, state)
+            if xmlSmoke:            state.xmlSmks = parseSmokeXML(xmlSmoke)
+
+        state.doLights =        state.doLights          and len(state.xmlLits) > 0
+        state.doProps =         state.doProps           and len(state.xmlObjs) > 0
+        state.doDummies =       state.doDummies         and len(state.xmlDums) > 0
+        state.doOcclusion =     state.doOcclusion       and len(state.xmlOccs) > 0
+        state.doFog =           state.doFog             and len(state.xmlFogs) > 0
+        state.doSounds =        state.doSounds          and len(state.xmlAmbs) > 0
+        state.doMisc =          state.doMisc            and len(state.xmlItms) > 0 or len(state.xmlFlgs) > 0 or len(state.xmlSmks) > 0
+
+        cachePath = getMapCachePath(rspath, self.cacheMode)
+        cacheKey = getMapCacheKey(getMapCacheSources(rspath, rsxmlpath), state) if cachePath else None
+        loadStart = time.perf_counter()
+        cachedReadTime = loadMapCache(cachePath, cacheKey, state) if cachePath and not isLoggingMapReads(state) else None
+
+        if cachedReadTime is not None:
+            loadTime = time.perf_counter() - loadStart
+            self.report({ 'INFO' }, f"GZRS2: Map cache hit, saved { max(cachedReadTime - loadTime, 0.0):.2f}s: { cachePath }")
+        else:
+            readStart = time.perf_counter()
 
-        if state.doLights:      state.xmlLits = parseRsXML(self, xmlRs, 'LIGHT',            serverProfile, state)
-        if state.doProps:       state.xmlObjs = parseRsXML(self, xmlRs, 'OBJECT',           serverProfile, state)
-        if state.doDummies:     state.xmlDums = parseRsXML(self, xmlRs, 'DUMMY',            serverProfile, state)
-        if state.doOcclusion:   state.xmlOccs = parseRsXML(self, xmlRs, 'OCCLUSION',        serverProfile, state)
-        if state.doFog:         state.xmlFogs = parseRsXML(self, xmlRs, 'FOG',              serverProfile, state)
-        if state.doSounds:      state.xmlAmbs = parseRsXML(self, xmlRs, 'AMBIENTSOUND',     serverProfile, state)
+            bsppath = findMapFile(rspath, BSP_EXTENSIONS)   if state.doBsptree      else False
+            colpath = findMapFile(rspath, COL_EXTENSIONS)   if state.doCollision    else False
+            navpath = findMapFile(rspath, NAV_EXTENSIONS)   if state.doNavigation   else False
+            lmpath = findMapFile(rspath, LM_EXTENSIONS)     if state.doLightmap     else False
 
-    if state.doMisc:
-        if xmlSpawn:            state.xmlItms = parseSpawnXML(self, xmlSpawn, state)
-        if xmlFlag:             state.xmlFlgs = parseFlagXML(self, xmlFlag, state)
-        if xmlSmoke:            state.xmlSmks = parseSmokeXML(xmlSmoke)
-
-    state.doLights =        state.doLights          and len(state.xmlLits) > 0
-    state.doProps =         state.doProps           and len(state.xmlObjs) > 0
-    state.doDummies =       state.doDummies         and len(state.xmlDums) > 0
-    state.doOcclusion =     state.doOcclusion       and len(state.xmlOccs) > 0
-    state.doFog =           state.doFog             and len(state.xmlFogs) > 0
-    state.doSounds =        state.doSounds          and len(state.xmlAmbs) > 0
-    state.doMisc =          state.doMisc            and len(state.xmlItms) > 0 or len(state.xmlFlgs) > 0 or len(state.xmlSmks) > 0
-
-    with open(rspath, 'rb') as file:
-        if readRs(self, file, rspath, state):
-            return { 'CANCELLED' }
+            if state.doBsptree and not bsppath:
+                state.doBsptree = False
+                self.report({ 'INFO' }, "GZRS2: Bsp mesh requested but .bsp file not found, no bsp mesh to generate.")
 
-    if state.doBsptree:
-        for ext in BSP_EXTENSIONS:
-            bsppath = pathExists(f"{ rspath }{ os.extsep }{ ext }")
+            if state.doCollision and not colpath:
+                state.doCollision = False
+                self.report({ 'INFO' }, "GZRS2: Collision mesh requested but .col/.cl2 file not found, no collision mesh to generate.")
 
-            if bsppath:
-                with open(bsppath, 'rb') as file:
-                    if readBsp(self, file, bsppath, state):
-                        return { 'CANCELLED' }
-                break
+            if state.doNavigation and not navpath:
+                state.doNavigation = False
+                self.report({ 'INFO' }, "GZRS2: Navigation mesh requested but .nav file not found, no navigation mesh to generate.")
 
-        if not bsppath:
-            state.doBsptree = False
-            self.report({ 'INFO' }, "GZRS2: Bsp mesh requested but .bsp file not found, no bsp mesh to generate.")
+            if state.doLightmap and not lmpath:
+                state.doLightmap = False
+                self.report({ 'INFO' }, "GZRS2: Lightmaps requested but .lm file not found, no lightmaps to generate.")
 
-    if state.doCollision:
-        for ext in COL_EXTENSIONS:
-            colpath = pathExists(f"{ rspath }{ os.extsep }{ ext }")
+            if readMapFiles(self, executor, state, timings, rspath, bsppath, colpath, navpath, lmpath):
+                return { 'CANCELLED' }
 
-            if colpath:
-                with open(colpath, 'rb') as file:
-                    if readCol(self, file, colpath, state):
-                        return { 'CANCELLED' }
-                break
+            readTime = time.perf_counter() - readStart
 
-        if not colpath:
-            state.doCollision = False
-            self.report({ 'INFO' }, "GZRS2: Collision mesh requested but .col/.cl2 file not found, no collision mesh to generate.")
+            if cachePath and canCacheMap(state):
+                if saveMapCache(cachePath, cacheKey, state, readTime):
+                    self.report({ 'INFO' }, f"GZRS2: Map cache miss, read took { readTime:.2f}s: { cachePath }")
+                else:
+                    self.report({ 'WARNING' }, f"GZRS2: Map cache could not be written: { cachePath }")
 
-    if state.doNavigation:
-        for ext in NAV_EXTENSIONS:
-            navpath = pathExists(f"{ rspath }{ os.extsep }{ ext }")
-
-            if navpath:
-                with open(navpath, 'rb') as file:
-                    if readNav(self, file, navpath, state):
-                        return { 'CANCELLED' }
-                break
-
-        if not navpath:
-            state.doNavigation = False
-            self.report({ 'INFO' }, "GZRS2: Navigation mesh requested but .nav file not found, no navigation mesh to generate.")
+    # Sorted slowest first, so the critical path leads
+    parseTimes = ", ".join(f"{ name } { seconds:.2f}s" for name, seconds in sorted(timings.items(), key = lambda x: x[1], reverse = True))
+    self.report({ 'INFO' }, f"GZRS2: Parsed in { time.perf_counter() - parseStart:.2f}s: { parseTimes }")
 
     if state.doLightmap:
-        for ext in LM_EXTENSIONS:
-            lmpath = pathExists(f"{ rspath }{ os.extsep }{ ext }")
-
-            if lmpath:
-                with open(lmpath, 'rb') as file:
-                    if readLm(self, file, lmpath, state):
-                        return { 'CANCELLED' }
-                break
-
-        if not lmpath:
-            state.doLightmap = False
-            self.report({ 'INFO' }, "GZRS2: Lightmaps requested but .lm file not found, no lightmaps to generate.")
-        else:
-            unpackLmImages(context, state)
+        unpackLmImages(context, state)
 
     if state.doProps:
         for p, prop in enumerate(state.xmlObjs):
@@ -283,7 +334,7 @@ def importRS2(self, context):
                 self.report({ 'INFO' }, f"GZRS2: Prop requested but .elu file not found, skipping: { propName }")
                 continue
 
-            with open(elupath, 'rb') as file:
+            with MappedCursor(elupath) as file:
                 if readElu(self, file, elupath, state):
                     return { 'CANCELLED' }
 
@@ -432,19 +483,18 @@ def importRS2(self, context):
 
         deleteInfoReports(context, counts)
 
-    def setupUnifiedMesh(name, setupFunc, *, treePolygons = -1, treeVerts = -1, allowLightmapUVs = True, isBakeMesh = False):
+    def setupUnifiedMesh(name, setupFunc, *, treeBuffers = None, allowLightmapUVs = True, isBakeMesh = False):
         blMesh = bpy.data.meshes.new(name)
         blObj = bpy.data.objects.new(name, blMesh)
 
         blMesh.gzrs2.meshType = 'RAW'
 
-        meshMatIDs = setupFunc(self, -1, blMesh, treePolygons, treeVerts, state, allowLightmapUVs = allowLightmapUVs)
+        meshMatIDs = setupFunc(self, -1, blMesh, treeBuffers, state, allowLightmapUVs = allowLightmapUVs)
 
         for blXmlRsMat in state.blXmlRsMats:
             blMesh.materials.append(blXmlRsMat)
 
-        for p, polygon in blMesh.polygons.items():
-            polygon.material_index = meshMatIDs[p]
+        blMesh.polygons.foreach_set('material_index', meshMatIDs)
 
         rootMeshesUni.objects.link(blObj)
 
@@ -462,13 +512,13 @@ def importRS2(self, context):
 
         return blMesh, blObj
 
-    # TODO: Improve performance of convex id matching
-    # blConvexMesh, blConvexObj = setupUnifiedMesh(f"{ state.filename }_Convex", setupRsConvexMesh)
+    if state.meshMode == 'BAKE' and len(state.rsConvexBuffers.matIDs) > 0:
+        blConvexMesh, blConvexObj = setupUnifiedMesh(f"{ state.filename }_Convex", setupRsConvexMesh, treeBuffers = state.rsConvexBuffers)
 
     if state.meshMode == 'STANDARD':
-        def setupStandardMeshes(blMeshes, blMeshObjs, treePolygons, treeVerts, rootMeshes, *, allowLightmapUVs = True):
+        def setupStandardMeshes(blMeshes, blMeshObjs, treeBuffers, rootMeshes, *, allowLightmapUVs = True):
             for m, blMesh in enumerate(blMeshes):
-                if not setupRsTreeMesh(self, m, blMesh, treePolygons, treeVerts, state, allowLightmapUVs = allowLightmapUVs):
+                if not setupRsTreeMesh(self, m, blMesh, treeBuffers, state, allowLightmapUVs = allowLightmapUVs):
                     continue
 
                 blMeshObj = blMeshObjs[m]
@@ -489,10 +539,10 @@ def importRS2(self, context):
                         with redirect_stdout(state.silentIO):
                             cleanupFunc(blMeshObj)
 
-        setupStandardMeshes(state.blBspMeshes, state.blBspMeshObjs, state.bspTreePolygons, state.bspTreeVerts, rootMeshesBsp, allowLightmapUVs = False) # TODO: Improve performance of convex id matching
-        setupStandardMeshes(state.blOctMeshes, state.blOctMeshObjs, state.rsOctreePolygons, state.rsOctreeVerts, rootMeshesOct)
+        setupStandardMeshes(state.blBspMeshes, state.blBspMeshObjs, state.bspTreeBuffers, rootMeshesBsp, allowLightmapUVs = False) # TODO: Improve performance of convex id matching
+        setupStandardMeshes(state.blOctMeshes, state.blOctMeshObjs, state.rsOctreeBuffers, rootMeshesOct)
     elif state.meshMode == 'BAKE':
-        blBakeMesh, blBakeObj = setupUnifiedMesh(f"{ state.filename }_Bake", setupRsTreeMesh, treePolygons = state.rsOctreePolygons, treeVerts = state.rsOctreeVerts, isBakeMesh = True)
+        blBakeMesh, blBakeObj = setupUnifiedMesh(f"{ state.filename }_Bake", setupRsTreeMesh, treeBuffers = state.rsOctreeBuffers, isBakeMesh = True)
 
     if state.doLights:
         reorientSpotlight = Matrix.Rotation(math.radians(90.0), 4, 'X')
@@ -162,7 +162,7 @@ def importRS3(self, context):
                 if resourcepath not in elupaths:
                     elupaths.add(resourcepath)
 
-                    with open(resourcepath, 'rb') as file:
+                    with MappedCursor(resourcepath) as file:
                         if readElu(self, file, resourcepath, state):
                             return { 'CANCELLED' }
 
@@ -51,7 +51,7 @@ def importAni(self, context):
     splitname = basename.split(os.extsep)
     state.filename = splitname[0]
 
-    with open(anipath, 'rb') as file:
+    with MappedCursor(anipath) as file:
         if readAni(self, file, anipath, state):
             return { 'CANCELLED' }
 
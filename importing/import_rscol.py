@@ -32,7 +32,7 @@
 # Please report maps and models with unsupported features to me on Discord: Krunk#6051
 #####
 
-import bpy, os
+import bpy, os, time
 
 from contextlib import redirect_stdout
 
@@ -40,6 +40,7 @@ from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..reading.readcol_gzrs2 import *
 from ..lib.lib_gzrs2 import *
+from ..lib.colquery_gzrs2 import *
 
 def importCol(self, context):
     state = GZRS2State()
@@ -69,7 +70,7 @@ def importCol(self, context):
     state.filename = splitname[0]
     extension = splitname[-1].lower()
 
-    with open(colpath, 'rb') as file:
+    with MappedCursor(colpath) as file:
         if readCol(self, file, colpath, state):
             return { 'CANCELLED' }
 
@@ -84,3 +85,46 @@ def importCol(self, context):
         viewLayer.objects.active = blColObjHull
 
     return { 'FINISHED' }
+
+def validateCol(self, context):
+    state = GZRS2State()
+
+    state.convertUnits = self.convertUnits
+
+    colpath = self.filepath
+    basename = bpy.path.basename(colpath)
+    state.filename = basename.split(os.extsep)[0]
+
+    with MappedCursor(colpath) as file:
+        if readCol(self, file, colpath, state):
+            return { 'CANCELLED' }
+
+    if state.col1Tree is None:
+        self.report({ 'ERROR' }, f"GZRS2: Only GunZ 1 .col files can be validated! { colpath }")
+        return { 'CANCELLED' }
+
+    start = time.perf_counter()
+    origins, directions, exits, rayCount = findCol1Holes(state.col1Tree, self.resolution)
+    elapsed = time.perf_counter() - start
+
+    if len(origins) == 0:
+        self.report({ 'INFO' }, f"GZRS2: No holes found, cast { rayCount } rays in { elapsed:.2f}s")
+        return { 'FINISHED' }
+
+    self.report({ 'WARNING' }, f"GZRS2: Found { len(origins) } leaking rays out of { rayCount }, cast in { elapsed:.2f}s")
+
+    if self.doMarkers:
+        holesName = f"{ state.filename }_Holes"
+        vertices = tuple(Vector(point) for pair in zip(origins.tolist(), exits.tolist()) for point in pair)
+        edges = tuple((i, i + 1) for i in range(0, len(vertices), 2))
+
+        blHolesMesh = bpy.data.meshes.new(holesName)
+        blHolesObj = bpy.data.objects.new(holesName, blHolesMesh)
+
+        blHolesMesh.from_pydata(vertices, edges, ())
+        blHolesMesh.update()
+
+        setObjFlagsDebug(blHolesObj)
+        context.collection.objects.link(blHolesObj)
+
+    return { 'FINISHED' }
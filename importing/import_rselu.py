@@ -100,7 +100,7 @@ def importElu(self, context):
             state.xmlEluMats[elupath] = parseEluXML(self, minidom.parseString(eluxmlstring), state)
             break
 
-    with open(elupath, 'rb') as file:
+    with MappedCursor(elupath) as file:
         if readElu(self, file, elupath, state):
             return { 'CANCELLED' }
 
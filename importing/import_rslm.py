@@ -36,7 +36,7 @@ def importLm(self, context):
     splitname = basename.split(os.extsep)
     state.filename = splitname[0]
 
-    with open(lmpath, 'rb') as file:
+    with MappedCursor(lmpath) as file:
         if readLm(self, file, lmpath, state):
             return { 'CANCELLED' }
 
@@ -38,7 +38,7 @@ def importNav(self, context):
     state.filename = splitname[0]
     extension = splitname[-1].lower()
 
-    with open(navpath, 'rb') as file:
+    with MappedCursor(navpath) as file:
         if readNav(self, file, navpath, state):
             return { 'CANCELLED' }
 
@@ -1,38 +1,164 @@
-import sys, os
+import sys, os, mmap
 
-from struct import pack, unpack, iter_unpack
+from struct import Struct
 from itertools import chain
+from functools import lru_cache
+
+import numpy as np
 
 from mathutils import Vector, Matrix
 
+# Precompiled layouts, so hot paths never re-parse a format string
+STRUCT_CHAR =           Struct('<b')
+STRUCT_UCHAR =          Struct('<B')
+STRUCT_BOOL =           Struct('<?')
+STRUCT_BOOL32 =         Struct('<?xxx')
+STRUCT_USHORT =         Struct('<H')
+STRUCT_SHORT =          Struct('<h')
+STRUCT_UINT =           Struct('<I')
+STRUCT_INT =            Struct('<i')
+STRUCT_FLOAT =          Struct('<f')
+STRUCT_VEC2 =           Struct('<2f')
+STRUCT_VEC3 =           Struct('<3f')
+STRUCT_VEC4 =           Struct('<4f')
+
+# Every scalar, vector and fixed-size record of the .rs, .bsp, .col, .nav, .lm, .elu and .ani codecs
+# Records that repeat per node or key are read whole by readLayout(), one unpack instead of one per field
+STRUCTS = {
+    'char':             STRUCT_CHAR,
+    'uchar':            STRUCT_UCHAR,
+    'bool':             STRUCT_BOOL,
+    'bool32':           STRUCT_BOOL32,
+    'ushort':           STRUCT_USHORT,
+    'short':            STRUCT_SHORT,
+    'uint':             STRUCT_UINT,
+    'int':              STRUCT_INT,
+    'float':            STRUCT_FLOAT,
+    'vec2':             STRUCT_VEC2,
+    'vec3':             STRUCT_VEC3,
+    'vec4':             STRUCT_VEC4,
+    'transform':        Struct('<16f'),
+    'bounds':           Struct('<6f'),          # min, max
+    'plane':            Struct('<4f'),
+    'header':           Struct('<2I'),          # id, version
+    'rsTreeCounts':     Struct('<3I'),          # node, polygon, vertex
+    'rsTreeNode':       Struct('<6f16x'),       # bounds, plane (skipped)
+    'rsTreeVertex':     Struct('<10f'),         # pos, nor, uv1, uv2
+    'rs2TreePolygon':   Struct('<i3I'),         # matID, convexID, drawFlags, vertexCount
+    'rs3TreePolygon':   Struct('<iIiI'),        # matID, drawFlags, vertexCount, vertexOffset
+    'rsConvexPolygon':  Struct('<iI4ffI'),      # matID, drawFlags, plane, area, vertexCount
+    'col1Node':         Struct('<4f?'),         # plane, solid
+    'col1Triangle':     Struct('<12f'),         # vertices, normal
+    'col2Triangle':     Struct('<9f2I'),        # vertices, attributes, matID
+    'col2Header':       Struct('<2I'),          # triangle count, node count
+    'lmHeader':         Struct('<5I'),          # id, version, convex polygon count, octree node count, image count
+    'ddsHeader':        Struct('<4x3I8xI44x4xI4s20xI16x'), # flags, width, height, mip count, pixel format flags, fourCC, caps
+    'eluHeader':        Struct('<2I2i'),        # id, version, material count, mesh count
+    'eluMaterial':      Struct('<Ii12ffI'),     # matID, subMatID, ambient, diffuse, specular, exponent, subMatCount
+    'aniHeader':        Struct('<2I3i'),        # id, version, max key index, node count, type
+    'aniTmKey':         Struct('<16fi'),        # transform, tick
+    'aniPosKey':        Struct('<3fi'),         # position, tick
+    'aniRotKey':        Struct('<4fi'),         # rotation, tick
+    'aniVisKey':        Struct('<fi'),          # value, tick
+}
+
+# Short arrays are fixed-size fields that repeat on every record, so their layouts are compiled once
+# Longer arrays are sized by the data and rarely repeat, caching them would only evict the fixed layouts
+ARRAY_STRUCT_CACHE_LENGTH = 16
+
+@lru_cache(maxsize = 256)
+def getFixedStruct(code, length):           return Struct(f'<{ length }{ code }')
+def getArrayStruct(code, length):           return getFixedStruct(code, length) if length <= ARRAY_STRUCT_CACHE_LENGTH else Struct(f'<{ length }{ code }')
+
+def packInto(name, buffer, offset, *data):
+    layout = STRUCTS[name]
+    layout.pack_into(buffer, offset, *data)
+
+    return offset + layout.size
+
+def unpackFrom(name, buffer, offset = 0):   return STRUCTS[name].unpack_from(buffer, offset)
+
+# A MappedCursor decodes straight from its mapping, any other file object goes through an intermediate bytes object
+# Every helper unpacks the cursor inline, a second Python call per field costs more than the copy it saves
+def readLayout(file, name):
+    layout = STRUCTS[name]
+
+    if type(file) is not MappedCursor:      return layout.unpack(file.read(layout.size))
+
+    data = layout.unpack_from(file.view, file.offset)
+    file.offset += layout.size
+
+    return data
+
+# Scalar and vector helpers are built around one fixed layout, its methods and size are bound once
+def createLayoutReader(layout):
+    unpack, unpackView, size = layout.unpack, layout.unpack_from, layout.size
+
+    def readData(file):
+        if type(file) is not MappedCursor:  return unpack(file.read(size))
+
+        data = unpackView(file.view, file.offset)
+        file.offset += size
+
+        return data
+
+    return readData
+
+def createScalarReader(layout):
+    unpack, unpackView, size = layout.unpack, layout.unpack_from, layout.size
+
+    def readData(file):
+        if type(file) is not MappedCursor:  return unpack(file.read(size))[0]
+
+        data = unpackView(file.view, file.offset)[0]
+        file.offset += size
+
+        return data
+
+    return readData
+
+# Array layouts depend on the length, the lookup stays but the cursor is still unpacked inline
+def createArrayReader(code):
+    def readData(file, length):
+        layout = getArrayStruct(code, length)
+
+        if type(file) is not MappedCursor:  return layout.unpack(file.read(layout.size))
+
+        data = layout.unpack_from(file.view, file.offset)
+        file.offset += layout.size
+
+        return data
+
+    return readData
+
 def skipBytes(file, length):                return file.seek(length, 1)
 
 def readBytes(file, length):                return file.read(length)
 def decodeBytes(file, length):              return file.read(length).decode('utf-8')
-def readChar(file):                         return unpack('<b', file.read(1))[0]
-def readUChar(file):                        return unpack('<B', file.read(1))[0]
+readChar =                                  createScalarReader(STRUCT_CHAR)
+readUChar =                                 createScalarReader(STRUCT_UCHAR)
 def readCharBool(file):                     return False if readChar(file) < 0 else True
-def readBool(file):                         return unpack('<?', file.read(1))[0]
-def readBool32(file):                       return unpack('<?xxx', file.read(4))[0]
-def readUShort(file):                       return unpack('<H', file.read(2))[0]
-def readShort(file):                        return unpack('<h', file.read(2))[0]
-def readUInt(file):                         return unpack('<I', file.read(4))[0]
-def readInt(file):                          return unpack('<i', file.read(4))[0]
-def readFloat(file):                        return unpack('<f', file.read(4))[0]
-def readVec2(file):                         return unpack('<2f', file.read(2 * 4))
-def readVec3(file):                         return unpack('<3f', file.read(3 * 4))
-def readVec4(file):                         return unpack('<4f', file.read(4 * 4))
-
-def readBoolArray(file, length):            return unpack(f'<{ length }?', file.read(length))
+readBool =                                  createScalarReader(STRUCT_BOOL)
+readBool32 =                                createScalarReader(STRUCT_BOOL32)
+readUShort =                                createScalarReader(STRUCT_USHORT)
+readShort =                                 createScalarReader(STRUCT_SHORT)
+readUInt =                                  createScalarReader(STRUCT_UINT)
+readInt =                                   createScalarReader(STRUCT_INT)
+readFloat =                                 createScalarReader(STRUCT_FLOAT)
+readVec2 =                                  createLayoutReader(STRUCT_VEC2)
+readVec3 =                                  createLayoutReader(STRUCT_VEC3)
+readVec4 =                                  createLayoutReader(STRUCT_VEC4)
+
+readBoolArray =                             createArrayReader('?')
 def readBool32Array(file, length):          return tuple(readBool32(file) for _ in range(length))
-def readUShortArray(file, length):          return unpack(f'<{ length }H', file.read(2 * length))
-def readShortArray(file, length):           return unpack(f'<{ length }h', file.read(2 * length))
-def readUIntArray(file, length):            return unpack(f'<{ length }I', file.read(4 * length))
-def readIntArray(file, length):             return unpack(f'<{ length }i', file.read(4 * length))
-def readFloatArray(file, length):           return unpack(f'<{ length }f', file.read(4 * length))
-def readVec2Array(file, length):            return tuple(iter_unpack('<2f', file.read(2 * 4 * length)))
-def readVec3Array(file, length):            return tuple(iter_unpack('<3f', file.read(3 * 4 * length)))
-def readVec4Array(file, length):            return tuple(iter_unpack('<4f', file.read(4 * 4 * length)))
+readUShortArray =                           createArrayReader('H')
+readShortArray =                            createArrayReader('h')
+readUIntArray =                             createArrayReader('I')
+readIntArray =                              createArrayReader('i')
+readFloatArray =                            createArrayReader('f')
+def readVec2Array(file, length):            return tuple(STRUCT_VEC2.iter_unpack(file.read(2 * 4 * length)))
+def readVec3Array(file, length):            return tuple(STRUCT_VEC3.iter_unpack(file.read(3 * 4 * length)))
+def readVec4Array(file, length):            return tuple(STRUCT_VEC4.iter_unpack(file.read(4 * 4 * length)))
 def readString(file, length):               return str(file.read(length), 'utf-8').split('\x00', 1)[0].strip()
 def readStringAlt(file, length):            return str(file.read(length).split(b'\x00', 1)[0], 'utf-8').strip()
 
@@ -60,7 +186,10 @@ def readUV4(file):
     return uv
 
 def readCoordinate(file, convertUnits, flipY, *, swizzle = False):
-    coord = Vector(readVec3(file))
+    return createCoordinate(readVec3(file), convertUnits, flipY, swizzle = swizzle)
+
+def createCoordinate(data, convertUnits, flipY, *, swizzle = False):
+    coord = Vector(data)
 
     if convertUnits:    coord *= 0.01
     if flipY:           coord.y = -coord.y
@@ -86,11 +215,50 @@ def readPlane(file, convertUnits, flipY):
 
     return plane
 
-def readUV2Array(file, length):
-    uvs = tuple(Vector(data) for data in readVec2Array(file, length))
-    for uv in uvs: uv.y = -uv.y
+# Unit conversion, y-flip and swizzle folded into a single matrix, applied to row vectors as: vectors @ matrix.T
+def calcAxisMatrix(scale, flipY, swizzle):
+    matrix = np.identity(3) * scale
 
-    return uvs
+    if flipY:       matrix[1] = -matrix[1]
+    if swizzle:     matrix = matrix[[0, 2, 1]]
+
+    return matrix
+
+def normalizeNdarray(vectors):
+    lengths = np.linalg.norm(vectors, axis = -1, keepdims = True)
+
+    return np.divide(vectors, lengths, out = np.zeros_like(vectors), where = lengths > 0)
+
+def ndarrayToVectors(array):
+    return tuple(Vector(data) for data in array.tolist())
+
+def readVec2Ndarray(file, length):          return np.frombuffer(file.read(2 * 4 * length), dtype = '<f4').reshape(length, 2)
+def readVec3Ndarray(file, length):          return np.frombuffer(file.read(3 * 4 * length), dtype = '<f4').reshape(length, 3)
+
+def transformUV2Ndarray(uvs):
+    return (uvs * (1.0, -1.0)).astype(np.float32)
+
+def transformCoordinateNdarray(coords, convertUnits, flipY, *, swizzle = False):
+    matrix = calcAxisMatrix(0.01 if convertUnits else 1.0, flipY, swizzle)
+
+    return (coords @ matrix.T).astype(np.float32)
+
+def transformDirectionNdarray(dirs, flipY, *, swizzle = False):
+    matrix = calcAxisMatrix(1.0, flipY, swizzle)
+
+    return (normalizeNdarray(dirs.astype(np.float64)) @ matrix.T).astype(np.float32)
+
+def readUV2Ndarray(file, length):
+    return transformUV2Ndarray(readVec2Ndarray(file, length))
+
+def readCoordinateNdarray(file, length, convertUnits, flipY, *, swizzle = False):
+    return transformCoordinateNdarray(readVec3Ndarray(file, length), convertUnits, flipY, swizzle = swizzle)
+
+def readDirectionNdarray(file, length, flipY, *, swizzle = False):
+    return transformDirectionNdarray(readVec3Ndarray(file, length), flipY, swizzle = swizzle)
+
+def readUV2Array(file, length):
+    return ndarrayToVectors(readUV2Ndarray(file, length))
 
 def readUV3Array(file, length):
     uvs = tuple(Vector(data).to_2d() for data in readVec3Array(file, length))
@@ -105,37 +273,10 @@ def readUV4Array(file, length):
     return uvs
 
 def readCoordinateArray(file, length, convertUnits, flipY, *, swizzle = False):
-    coords = tuple(Vector(data) for data in readVec3Array(file, length))
-
-    if convertUnits:
-        for coord in coords:
-            coord *= 0.01
-
-    if flipY:
-        for coord in coords:
-            coord.y = -coord.y
-
-    if swizzle:
-        for coord in coords:
-            coord.xyz = coord.xzy
-
-    return coords
+    return ndarrayToVectors(readCoordinateNdarray(file, length, convertUnits, flipY, swizzle = swizzle))
 
 def readDirectionArray(file, length, flipY, *, swizzle = False):
-    dirs = tuple(Vector(data) for data in readVec3Array(file, length))
-
-    for dir in dirs:
-        dir.normalize()
-
-    if flipY:
-        for dir in dirs:
-            dir.y = -dir.y
-
-    if swizzle:
-        for dir in dirs:
-            dir.xyz = dir.xzy
-
-    return dirs
+    return ndarrayToVectors(readDirectionNdarray(file, length, flipY, swizzle = swizzle))
 
 def readPlaneArray(file, length, flipY):
     planes = tuple(Vector(data) for data in readVec4Array(file, length))
@@ -150,7 +291,10 @@ def readPlaneArray(file, length, flipY):
     return planes
 
 def readTransform(file, convertUnits, *, swizzle = False):
-    transform = Matrix(readVec4Array(file, 4))
+    return createTransform(readLayout(file, 'transform'), convertUnits, swizzle = swizzle)
+
+def createTransform(data, convertUnits, *, swizzle = False):
+    transform = Matrix((data[0:4], data[4:8], data[8:12], data[12:16]))
 
     # MCPlug2_Ani.cpp
     if swizzle:
@@ -185,11 +329,22 @@ def readTransform(file, convertUnits, *, swizzle = False):
     return Matrix.LocRotScale(loc, rot, sca)
 
 def readBounds(file, convertUnits):
-    min = Vector(readCoordinate(file, convertUnits, False))
-    max = Vector(readCoordinate(file, convertUnits, False))
+    return createBounds(readLayout(file, 'bounds'), convertUnits)
+
+def createBounds(data, convertUnits):
+    min = createCoordinate(data[0:3], convertUnits, False)
+    max = createCoordinate(data[3:6], convertUnits, False)
 
     return min, max
 
+# Packed strings are null terminated and never longer than the given length
+def skipPackedString(file, length):
+    start = file.tell()
+    data = file.read(length)
+    end = data.find(b'\x00')
+
+    file.seek(start + (end + 1 if end >= 0 else len(data)), os.SEEK_SET)
+
 def readPath(file, length):
     path = readString(file, length)
 
@@ -198,32 +353,242 @@ def readPath(file, length):
 
     return path
 
-def writeBytes(file, data):                 file.write(int.from_bytes(data, sys.byteorder).to_bytes(len(data), 'little'))
-def writeChar(file, data):                  file.write(pack('<b', data))
-def writeUChar(file, data):                 file.write(pack('<B', data))
+# Explicit-stack replacement for recursive node closures, safe for arbitrarily deep trees
+# Every tree format serializes a node as: header, positive flag, [positive subtree], negative flag, [negative subtree], trailer
+# enter(node) handles the header and returns a context for the node
+# branch(context, b) handles the flag for child b, 0 for positive and 1 for negative, and returns that child or None
+# leave(context, children) handles the trailer, its result is stored in the parent's children and finally returned for the root
+# leave() can return TREE_WALK_ABORT to stop the walk, walkTree() then returns it right away
+TREE_WALK_ABORT = object()
+
+def walkTree(root, enter, branch, leave):
+    stack = [[enter(root), 0, [None, None]]]
+    result = None
+
+    while stack:
+        frame = stack[-1]
+        context, b, children = frame
+
+        if b < 2:
+            frame[1] += 1
+            child = branch(context, b)
+
+            if child is not None:
+                stack.append([enter(child), 0, [None, None]])
+
+            continue
+
+        stack.pop()
+        result = leave(context, children)
+
+        if result is TREE_WALK_ABORT:
+            return result
+
+        if stack:
+            parent = stack[-1]
+            parent[2][parent[1] - 1] = result
+
+    return result
+
+# Read-only, memory-mapped stand-in for a binary file object
+# Implements read(), seek() and tell() so every reader accepts it transparently
+class MappedCursor:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.size = os.fstat(file.fileno()).st_size
+            self.map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) if self.size > 0 else None
+
+        self.view = memoryview(self.map) if self.map is not None else memoryview(b'')
+        self.offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.view.release()
+
+        if self.map is not None:
+            self.map.close()
+
+    def read(self, length = -1):
+        start = self.offset
+        end = self.size if length is None or length < 0 else start + length
+
+        if end > self.size:     end = self.size
+
+        # Like a real file, reading past the end returns nothing and leaves the offset where it was
+        if start >= end:
+            return b''
+
+        self.offset = end
+
+        return self.map[start:end]
+
+    def seek(self, offset, whence = os.SEEK_SET):
+        if      whence == os.SEEK_SET:  self.offset = offset
+        elif    whence == os.SEEK_CUR:  self.offset += offset
+        elif    whence == os.SEEK_END:  self.offset = self.size + offset
+
+        return self.offset
+
+    def tell(self):
+        return self.offset
+
+# Growable, in-memory stand-in for a binary file object opened for writing
+# Implements write(), read(), seek(), tell() and truncate(), so every writeX helper accepts it transparently
+# Nothing touches the disk until close(), which flushes the whole buffer with a single write
+class BufferedWriter:
+    def __init__(self, path, *, sizeHint = 0):
+        self.path = path
+        self.buffer = bytearray()
+        self.size = 0
+        self.offset = 0
+
+        self.reserve(sizeHint)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+
+    def reserve(self, capacity):
+        if capacity > len(self.buffer):
+            self.buffer.extend(bytes(capacity - len(self.buffer)))
+
+    def write(self, data):
+        start = self.offset
+        end = start + len(data)
+
+        if end > len(self.buffer):
+            self.reserve(max(end, 2 * len(self.buffer)))
+
+        self.buffer[start:end] = data
+        self.offset = end
+        self.size = max(self.size, end)
+
+        return len(data)
+
+    def read(self, length = -1):
+        start = min(self.offset, self.size)
+        end = self.size if length is None or length < 0 else min(start + length, self.size)
+
+        self.offset = end
+
+        return bytes(self.buffer[start:end])
+
+    def seek(self, offset, whence = os.SEEK_SET):
+        if      whence == os.SEEK_SET:  self.offset = offset
+        elif    whence == os.SEEK_CUR:  self.offset += offset
+        elif    whence == os.SEEK_END:  self.offset = self.size + offset
+
+        return self.offset
+
+    def tell(self):
+        return self.offset
+
+    def truncate(self, size = None):
+        self.size = self.offset if size is None else size
+
+        return self.size
+
+    def getvalue(self):
+        return bytes(memoryview(self.buffer)[:self.size])
+
+    def close(self):
+        if self.buffer is None:
+            return
+
+        with open(self.path, 'wb') as file:
+            with memoryview(self.buffer)[:self.size] as view:
+                file.write(view)
+
+        self.buffer = None
+
+# Binary file object that writes to a temporary file next to the target through a fixed size buffer
+# A clean exit flushes it to disk and moves it over the target, anything else removes it and leaves the target untouched
+class StreamingWriter:
+    def __init__(self, path, *, chunkSize):
+        self.path = path
+        self.tempPath = f"{ path }{ os.extsep }tmp"
+        self.chunkSize = chunkSize
+        self.file = open(self.tempPath, 'wb', buffering = chunkSize)
+
+    def __enter__(self):
+        return self
+
+    # The original is only replaced once every byte is on disk, any failure before that leaves it untouched
+    def __exit__(self, type, value, traceback):
+        replaced = False
+
+        try:
+            if type is None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                os.replace(self.tempPath, self.path)
+                replaced = True
+        finally:
+            if not replaced:
+                self.discard()
+
+    def discard(self):
+        # The buffered bytes are thrown away, so a flush failing again on close doesn't matter
+        try:
+            self.file.close()
+        except OSError:
+            pass
+
+        if os.path.exists(self.tempPath):
+            os.remove(self.tempPath)
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def tell(self):
+        return self.file.tell()
+
+    # Copies a section of another file one chunk at a time, so its size never matters
+    def copyFrom(self, source, length):
+        while length > 0:
+            chunk = source.read(min(length, self.chunkSize))
+
+            if not chunk:
+                raise EOFError(f"Source ended { length } bytes early! { self.path }")
+
+            self.file.write(chunk)
+            length -= len(chunk)
+
+def writeBytes(file, data):                 file.write(data if sys.byteorder == 'little' else bytes(data)[::-1])
+def writeChar(file, data):                  file.write(STRUCT_CHAR.pack(data))
+def writeUChar(file, data):                 file.write(STRUCT_UCHAR.pack(data))
 def writeCharBool(file, data):              writeChar(file, -1 if not data else 1)
-def writeBool(file, data):                  file.write(pack('<?', data))
+def writeBool(file, data):                  file.write(STRUCT_BOOL.pack(data))
 def writeBool32(file, data):                writeUInt(file, int(data))
-def writeUShort(file, data):                file.write(pack('<H', data))
-def writeShort(file, data):                 file.write(pack('<h', data))
-def writeUInt(file, data):                  file.write(pack('<I', data))
-def writeInt(file, data):                   file.write(pack('<i', data))
-def writeFloat(file, data):                 file.write(pack('<f', data))
-def writeVec2(file, data):                  file.write(pack('<2f', *data))
-def writeVec3(file, data):                  file.write(pack('<3f', *data))
-def writeVec4(file, data):                  file.write(pack('<4f', *data))
-
-def writeBoolArray(file, data):             file.write(pack(f'<{ len(data) }?', *data))
-def writeBool32Array(file, data):           file.write(pack(f'<{ len(data) }I', *tuple(int(d) for d in data)))
-def writeUShortArray(file, data):           file.write(pack(f'<{ len(data) }H', *data))
-def writeShortArray(file, data):            file.write(pack(f'<{ len(data) }h', *data))
-def writeUIntArray(file, data):             file.write(pack(f'<{ len(data) }I', *data))
-def writeIntArray(file, data):              file.write(pack(f'<{ len(data) }i', *data))
-def writeFloatArray(file, data):            file.write(pack(f'<{ len(data) }f', *data))
-def writeVec2Array(file, data):             file.write(pack(f'<{ 2 * len(data) }f', *tuple(chain.from_iterable(data))))
-def writeVec3Array(file, data):             file.write(pack(f'<{ 3 * len(data) }f', *tuple(chain.from_iterable(data))))
-def writeVec4Array(file, data):             file.write(pack(f'<{ 4 * len(data) }f', *tuple(chain.from_iterable(data))))
-def writeString(file, data, length):        file.write(pack(f'<{ length }s', bytes(data, 'utf-8')))
+def writeUShort(file, data):                file.write(STRUCT_USHORT.pack(data))
+def writeShort(file, data):                 file.write(STRUCT_SHORT.pack(data))
+def writeUInt(file, data):                  file.write(STRUCT_UINT.pack(data))
+def writeInt(file, data):                   file.write(STRUCT_INT.pack(data))
+def writeFloat(file, data):                 file.write(STRUCT_FLOAT.pack(data))
+def writeVec2(file, data):                  file.write(STRUCT_VEC2.pack(*data))
+def writeVec3(file, data):                  file.write(STRUCT_VEC3.pack(*data))
+def writeVec4(file, data):                  file.write(STRUCT_VEC4.pack(*data))
+
+def writeBoolArray(file, data):             file.write(getArrayStruct('?', len(data)).pack(*data))
+def writeBool32Array(file, data):           file.write(getArrayStruct('I', len(data)).pack(*tuple(int(d) for d in data)))
+def writeUShortArray(file, data):           file.write(getArrayStruct('H', len(data)).pack(*data))
+def writeShortArray(file, data):            file.write(getArrayStruct('h', len(data)).pack(*data))
+def writeUIntArray(file, data):             file.write(getArrayStruct('I', len(data)).pack(*data))
+def writeIntArray(file, data):              file.write(getArrayStruct('i', len(data)).pack(*data))
+def writeFloatArray(file, data):            file.write(getArrayStruct('f', len(data)).pack(*data))
+def writeVec2Array(file, data):             file.write(getArrayStruct('f', 2 * len(data)).pack(*tuple(chain.from_iterable(data))))
+def writeVec3Array(file, data):             file.write(getArrayStruct('f', 3 * len(data)).pack(*tuple(chain.from_iterable(data))))
+def writeVec4Array(file, data):             file.write(getArrayStruct('f', 4 * len(data)).pack(*tuple(chain.from_iterable(data))))
+def writeString(file, data, length):        file.write(getFixedStruct('s', length).pack(bytes(data, 'utf-8')))
 def writeStringPacked(file, data):          file.write(bytes(data, 'utf-8') + b'\x00')
 
 def writeUV2(file, uv):
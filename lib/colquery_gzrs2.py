@@ -0,0 +1,205 @@
+#####
+# Most of the code is based on logic found in...
+#
+### GunZ 1
+# - RSolidBsp.h/.cpp
+#
+# Please report maps and models with unsupported features to me on Discord: Krunk#6051
+#####
+
+import numpy as np
+
+from ..constants_gzrs2 import *
+from ..classes_gzrs2 import *
+
+# Queries run on the flat Col1Tree, a node without children is a leaf and a missing child is empty space
+# Distances are measured along the plane normal, the positive side of a plane is its front
+
+def isCol1Leaf(tree, nodes):
+    return (tree.positives[nodes] < 0) & (tree.negatives[nodes] < 0)
+
+def col1PlaneDistances(planes, nodes, points):
+    nodePlanes = planes[nodes]
+
+    return np.einsum('ij,ij->i', points, nodePlanes[:, :3]) + nodePlanes[:, 3]
+
+def col1PointSolid(tree, points):
+    points = np.asarray(points, dtype = np.float64).reshape(-1, 3)
+    solid = np.zeros(len(points), dtype = bool)
+
+    if len(tree.solids) == 0:
+        return solid
+
+    planes = tree.planes.astype(np.float64)
+    ids = np.arange(len(points))
+    nodes = np.zeros(len(points), dtype = np.int64)
+
+    while len(ids) > 0:
+        leaves = isCol1Leaf(tree, nodes)
+        solid[ids[leaves]] = tree.solids[nodes[leaves]]
+        ids, nodes = ids[~leaves], nodes[~leaves]
+
+        distances = col1PlaneDistances(planes, nodes, points[ids])
+        nodes = np.where(distances >= 0, tree.positives[nodes], tree.negatives[nodes]).astype(np.int64)
+
+        inside = nodes >= 0
+        ids, nodes = ids[inside], nodes[inside]
+
+    return solid
+
+# Every ray is split against the planes it crosses, all rays of a chunk advance one tree level per iteration
+# Pieces that start beyond the closest solid leaf found so far are pruned, so the work stays close to the visited leaves
+# A radius offsets every plane in both directions, like a swept sphere against the bevelled hulls of the exporter
+def col1CastChunk(tree, planes, starts, deltas, radius):
+    rayCount = len(starts)
+    best = np.full(rayCount, np.inf)
+    bestEntries = np.full(rayCount, -1, dtype = np.int64)
+    bestSigns = np.zeros(rayCount)
+
+    rays = np.arange(rayCount)
+    nodes = np.zeros(rayCount, dtype = np.int64)
+    t0s = np.zeros(rayCount)
+    t1s = np.ones(rayCount)
+    entries = np.full(rayCount, -1, dtype = np.int64)
+    signs = np.zeros(rayCount)
+
+    while len(rays) > 0:
+        keep = t0s < best[rays]
+        rays, nodes, t0s, t1s, entries, signs = rays[keep], nodes[keep], t0s[keep], t1s[keep], entries[keep], signs[keep]
+
+        leaves = isCol1Leaf(tree, nodes)
+        hits = leaves & tree.solids[nodes]
+
+        if np.any(hits):
+            hitRays, hitT0s, hitEntries, hitSigns = rays[hits], t0s[hits], entries[hits], signs[hits]
+
+            order = np.lexsort((hitT0s, hitRays))
+            firsts = order[np.r_[True, hitRays[order][1:] != hitRays[order][:-1]]]
+            closer = hitT0s[firsts] < best[hitRays[firsts]]
+            firsts = firsts[closer]
+
+            best[hitRays[firsts]] = hitT0s[firsts]
+            bestEntries[hitRays[firsts]] = hitEntries[firsts]
+            bestSigns[hitRays[firsts]] = hitSigns[firsts]
+
+        rays, nodes, t0s, t1s, entries, signs = rays[~leaves], nodes[~leaves], t0s[~leaves], t1s[~leaves], entries[~leaves], signs[~leaves]
+
+        if len(rays) == 0:
+            break
+
+        d0s = col1PlaneDistances(planes, nodes, starts[rays] + deltas[rays] * t0s[:, None])
+        d1s = col1PlaneDistances(planes, nodes, starts[rays] + deltas[rays] * t1s[:, None])
+
+        front = (d0s >= radius) & (d1s >= radius)
+        back = (d0s < -radius) & (d1s < -radius)
+        split = ~front & ~back
+
+        # Near side first, the far side starts where the ray leaves the offset plane
+        # The near piece ends past the far offset plane and the far piece starts before the near one, by the same epsilon
+        # whichever way the ray crosses, so the pieces overlap and a hit backs off from the surface slightly
+        rising = d0s < d1s
+        falling = d0s > d1s
+        crossing = rising | falling
+        denominators = np.where(crossing, d0s - d1s, 1.0)
+        offsets = np.where(rising, -1.0, 1.0) * (radius + COL1_QUERY_EPSILON)
+
+        nearFracs = np.where(crossing, (d0s + offsets) / denominators, 1.0)
+        farFracs = np.where(crossing, (d0s - offsets) / denominators, 0.0)
+        nearFracs = np.clip(nearFracs, 0.0, 1.0)
+        farFracs = np.clip(farFracs, 0.0, 1.0)
+
+        nearFront = ~rising
+        spans = t1s - t0s
+
+        childNodes = np.concatenate((
+            tree.positives[nodes[front]],
+            tree.negatives[nodes[back]],
+            np.where(nearFront[split], tree.positives[nodes[split]], tree.negatives[nodes[split]]),
+            np.where(nearFront[split], tree.negatives[nodes[split]], tree.positives[nodes[split]])
+        )).astype(np.int64)
+
+        childRays = np.concatenate((rays[front], rays[back], rays[split], rays[split]))
+        childT0s = np.concatenate((t0s[front], t0s[back], t0s[split], t0s[split] + farFracs[split] * spans[split]))
+        childT1s = np.concatenate((t1s[front], t1s[back], t0s[split] + nearFracs[split] * spans[split], t1s[split]))
+        childEntries = np.concatenate((entries[front], entries[back], entries[split], nodes[split]))
+        childSigns = np.concatenate((signs[front], signs[back], signs[split], np.where(nearFront[split], 1.0, -1.0)))
+
+        valid = (childNodes >= 0) & (childT0s <= childT1s)
+        rays, nodes, t0s, t1s, entries, signs = childRays[valid], childNodes[valid], childT0s[valid], childT1s[valid], childEntries[valid], childSigns[valid]
+
+    normals = np.zeros((rayCount, 3))
+    entered = bestEntries >= 0
+    normals[entered] = planes[bestEntries[entered], :3] * bestSigns[entered, None]
+
+    return best, normals
+
+# Returns the hit flags, the fraction along each segment and the normal of the plane that was hit
+# Segments that start inside a solid hit at zero with a zero normal
+def col1SegmentCast(tree, starts, ends, *, radius = 0.0, chunkSize = COL1_QUERY_CHUNK_SIZE):
+    starts = np.asarray(starts, dtype = np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype = np.float64).reshape(-1, 3)
+    deltas = ends - starts
+
+    fractions = np.ones(len(starts))
+    normals = np.zeros((len(starts), 3))
+    hits = np.zeros(len(starts), dtype = bool)
+
+    if len(tree.solids) == 0:
+        return hits, fractions, normals
+
+    planes = tree.planes.astype(np.float64)
+
+    for start in range(0, len(starts), chunkSize):
+        end = min(start + chunkSize, len(starts))
+        best, chunkNormals = col1CastChunk(tree, planes, starts[start:end], deltas[start:end], radius)
+
+        chunkHits = np.isfinite(best)
+        hits[start:end] = chunkHits
+        fractions[start:end] = np.where(chunkHits, best, 1.0)
+        normals[start:end] = chunkNormals
+
+    return hits, fractions, normals
+
+def col1RayCast(tree, origins, directions, maxDistance, *, radius = 0.0):
+    origins = np.asarray(origins, dtype = np.float64).reshape(-1, 3)
+    directions = np.asarray(directions, dtype = np.float64).reshape(-1, 3)
+    lengths = np.linalg.norm(directions, axis = 1, keepdims = True)
+    directions = np.divide(directions, lengths, out = np.zeros_like(directions), where = lengths > 0)
+
+    hits, fractions, normals = col1SegmentCast(tree, origins, origins + directions * maxDistance, radius = radius)
+    distances = fractions * maxDistance
+
+    return hits, distances, origins + directions * distances[:, None], normals
+
+def col1SphereCast(tree, starts, ends, radius):
+    return col1SegmentCast(tree, starts, ends, radius = radius)
+
+# The exporter seals every tree with the six quads of its bounding box
+# Any ray that starts in empty space and leaves the bounds without touching a solid leaf found a hole
+# Returns the origin, direction and exit point of every leaking ray, plus the number of rays cast
+def findCol1Holes(tree, resolution):
+    if len(tree.normals) == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3)), 0
+
+    vertices = tree.vertices.reshape(-1, 3).astype(np.float64)
+    bbmin = vertices.min(axis = 0)
+    bbmax = vertices.max(axis = 0)
+    extents = bbmax - bbmin
+    margin = np.linalg.norm(extents) * 0.01 + COL1_QUERY_EPSILON
+
+    steps = (np.arange(resolution) + 0.5) / resolution
+    grid = np.stack(np.meshgrid(steps, steps, steps, indexing = 'ij'), axis = -1).reshape(-1, 3)
+    origins = bbmin + grid * extents
+    origins = origins[~col1PointSolid(tree, origins)]
+
+    axes = np.concatenate((np.identity(3), -np.identity(3)))
+    rayOrigins = np.repeat(origins, len(axes), axis = 0)
+    rayDirections = np.tile(axes, (len(origins), 1))
+
+    # Distance from each origin to the far side of the bounds along its axis, plus a margin
+    exits = np.where(rayDirections > 0, bbmax - rayOrigins, np.where(rayDirections < 0, rayOrigins - bbmin, np.inf)).min(axis = 1) + margin
+    hits, _, _ = col1SegmentCast(tree, rayOrigins, rayOrigins + rayDirections * exits[:, None])
+
+    leaks = ~hits
+
+    return rayOrigins[leaks], rayDirections[leaks], rayOrigins[leaks] + rayDirections[leaks] * exits[leaks, None], len(rayOrigins)
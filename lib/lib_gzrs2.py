@@ -1,6 +1,9 @@
-import bpy, os, math, random, ctypes, shutil
+import bpy, os, math, time, random, ctypes, shutil, hashlib
+
+import numpy as np
 
 from ctypes import *
+from concurrent.futures import ThreadPoolExecutor
 
 from contextlib import redirect_stdout
 from mathutils import Vector, Matrix, Euler
@@ -890,25 +893,34 @@ def getErrorMat(state):
 
 def setupColPlanes(rootExtras, context, state):
     reorientPlane = Matrix.Rotation(math.radians(90.0), 4, 'X')
+    tree = state.col1Tree
+    planes = tree.planes.tolist()
+    triangleCounts = tree.triangleCounts.tolist()
+    positives = tree.positives.tolist()
+    negatives = tree.negatives.tolist()
+    blRootPlaneObj = None
     p = 0
 
-    def processCol1Hierarchy(node):
-        nonlocal p
+    # Negative children are visited first, matching the original plane numbering
+    stack = [(0, None)] if len(planes) > 0 else []
+
+    while stack:
+        n, blParentObj = stack.pop()
 
         # Forks & bevels only
-        if len(node.triangles) > 0:
-            return None
+        if triangleCounts[n] > 0:
+            continue
 
-        plane = node.plane
-        planeNormal = node.plane.xyz
-        planeDistance = node.plane.w
+        plane = Vector(planes[n])
+        planeNormal = plane.xyz
+        planeDistance = plane.w
 
         # Useful planes only
         if vec3IsClose(planeNormal, Vector((0, 0, 0)), RS_DIR_THRESHOLD):
-            return None
+            continue
 
         if math.isclose(planeDistance, 0, abs_tol = RS_COORD_THRESHOLD):
-            return None
+            continue
 
         planeName = f"{ state.filename }_Plane{ p }"
         p += 1
@@ -928,22 +940,17 @@ def setupColPlanes(rootExtras, context, state):
 
         rootExtras.objects.link(blPlaneObj)
 
-        blPlaneObjNeg = processCol1Hierarchy(node.negative) if node.negative else None
-        blPlaneObjPos = processCol1Hierarchy(node.positive) if node.positive else None
-
-        if blPlaneObjNeg is not None:
-            transform = blPlaneObjNeg.matrix_world
-            blPlaneObjNeg.parent = blPlaneObj
-            blPlaneObjNeg.matrix_world = transform
-
-        if blPlaneObjPos is not None:
-            transform = blPlaneObjPos.matrix_world
-            blPlaneObjPos.parent = blPlaneObj
-            blPlaneObjPos.matrix_world = transform
+        if blParentObj is not None:
+            transform = blPlaneObj.matrix_world
+            blPlaneObj.parent = blParentObj
+            blPlaneObj.matrix_world = transform
+        else:
+            blRootPlaneObj = blPlaneObj
 
-        return blPlaneObj
+        if positives[n] >= 0: stack.append((positives[n], blPlaneObj))
+        if negatives[n] >= 0: stack.append((negatives[n], blPlaneObj))
 
-    return processCol1Hierarchy(state.col1Root)
+    return blRootPlaneObj
 
 def setupColMesh(name, collection, context, extension, state):
     blColMat = setupDebugMat(name, (1.0, 0.0, 1.0, 0.25))
@@ -1262,126 +1269,96 @@ def setupXmlEluMat(self, elupath, xmlEluMat, state):
     state.blXmlEluMats.setdefault(elupath, []).append(blMat)
     state.blXmlEluMatPairs.append((xmlEluMat, blMat))
 
-# TODO: Improve performance of convex id matching
-'''
-def setupRsConvexMesh(self, _, blMesh, _, _, state, *, allowLightmapUVs = True):
-    meshVerts = []
-    meshNorms = []
-    meshFaces = []
-    meshMatIDs = []
-    meshUV1 = []
-    meshUV2 = []
+# Every polygon owns its vertices, so vertices and loops share the same order
+def setupMeshFromArrays(blMesh, polygonStarts, meshVerts, meshNorms, meshUV1, meshUV2):
+    loopCount = len(meshVerts)
 
-    # The convex polygons will never support atlased lightmaps because the lightmap ID can differ across an octree split
-    # It's another reason why atlasing should be phased out, we can just increase lightmap resolution
-    fromLightmap = state.doLightmap and allowLightmapUVs
-
-    offset = 0
-
-    for p, polygon in enumerate(state.rsConvexPolygons):
-        for v in range(polygon.vertexOffset, polygon.vertexOffset + polygon.vertexCount):
-            meshVerts.append(state.rsConvexVerts[v].pos)
-            meshNorms.append(state.rsConvexVerts[v].nor)
-            meshUV1.append(state.rsConvexVerts[v].uv1)
-
-            if fromLightmap:
-                uv2 = state.lmUVs[state.rsConvexVerts[v].oid].copy()
-                uv2.y += 1.0
-
-                meshUV2.append(uv2)
-            else:
-                meshUV2.append(state.rsConvexVerts[v].uv2)
-
-        meshFaces.append(tuple(range(offset, offset + polygon.vertexCount)))
-        offset += polygon.vertexCount
-
-        meshMatIDs.append(polygon.matID)
+    blMesh.vertices.add(loopCount)
+    blMesh.vertices.foreach_set('co', meshVerts.ravel())
+    blMesh.loops.add(loopCount)
+    blMesh.loops.foreach_set('vertex_index', np.arange(loopCount, dtype = np.int32))
+    blMesh.polygons.add(len(polygonStarts))
+    blMesh.polygons.foreach_set('loop_start', polygonStarts.astype(np.int32))
 
-    blMesh.from_pydata(meshVerts, (), meshFaces)
+    blMesh.update()
     blMesh.normals_split_custom_set_from_vertices(meshNorms)
 
     uvLayer1 = blMesh.uv_layers.new()
-    for c, uv in enumerate(meshUV1): uvLayer1.data[c].uv = uv
+    uvLayer1.data.foreach_set('uv', meshUV1.astype(np.float32).ravel())
 
     uvLayer2 = blMesh.uv_layers.new()
-    for c, uv in enumerate(meshUV2): uvLayer2.data[c].uv = uv
+    uvLayer2.data.foreach_set('uv', meshUV2.astype(np.float32).ravel())
 
     blMesh.validate()
     blMesh.update()
 
-    return meshMatIDs
-'''
+def setupRsConvexMesh(self, m, blMesh, convexBuffers, state, *, allowLightmapUVs = True):
+    # The convex polygons will never support atlased lightmaps because the lightmap ID can differ across an octree split
+    # It's another reason why atlasing should be phased out, we can just increase lightmap resolution
+    fromLightmap = state.doLightmap and allowLightmapUVs
 
-def setupRsTreeMesh(self, m, blMesh, treePolygons, treeVerts, state, *, allowLightmapUVs = True):
-    meshVerts = []
-    meshNorms = []
-    meshFaces = []
-    meshMatIDs = []
-    meshUV1 = []
-    meshUV2 = []
+    polygonCounts = convexBuffers.vertexCounts
+    polygonStarts = np.cumsum(polygonCounts) - polygonCounts
 
-    fromLightmap = state.doLightmap and allowLightmapUVs
+    vertexIDs = getPolygonVertexIDs(convexBuffers, np.arange(len(polygonCounts)))
 
     if fromLightmap:
-        numCells = len(state.lmImages)
-        cellSpan = int(math.sqrt(nextSquare(numCells)))
+        meshUV2 = state.lmUVs[state.rsConvexOctreeIDs[vertexIDs]].copy()
+        meshUV2[:, 1] += 1.0
+    else:
+        meshUV2 = convexBuffers.uv2s[vertexIDs]
 
-    found = False
-    offset = 0
+    setupMeshFromArrays(blMesh, polygonStarts, convexBuffers.positions[vertexIDs], convexBuffers.normals[vertexIDs], convexBuffers.uv1s[vertexIDs], meshUV2)
 
-    for p, polygon in enumerate(treePolygons):
-        if state.meshMode != 'BAKE' and polygon.matID != m:
-            continue
+    return tuple(convexBuffers.matIDs.tolist())
 
-        found = True
+# Gathers each selected polygon's vertex range into one contiguous index array
+def getPolygonVertexIDs(treeBuffers, polygonIDs):
+    polygonCounts = treeBuffers.vertexCounts[polygonIDs]
+    polygonStarts = np.cumsum(polygonCounts) - polygonCounts
 
-        if fromLightmap and numCells > 1:
-            c = state.lmLightmapIDs[p]
-            cx = c % cellSpan
-            cy = c // cellSpan
+    return np.arange(int(polygonCounts.sum())) + np.repeat(treeBuffers.vertexOffsets[polygonIDs] - polygonStarts, polygonCounts)
 
-        for v in range(polygon.vertexOffset, polygon.vertexOffset + polygon.vertexCount):
-            meshVerts.append(treeVerts[v].pos)
-            meshNorms.append(treeVerts[v].nor)
-            meshUV1.append(treeVerts[v].uv1)
+def setupRsTreeMesh(self, m, blMesh, treeBuffers, state, *, allowLightmapUVs = True):
+    fromLightmap = state.doLightmap and allowLightmapUVs
 
-            if fromLightmap:
-                uv2 = state.lmUVs[v].copy()
+    if state.meshMode == 'BAKE':    polygonIDs = np.arange(len(treeBuffers.matIDs))
+    else:                           polygonIDs = np.flatnonzero(treeBuffers.matIDs == m)
 
-                if numCells > 1:
-                    uv2.x += cx
-                    uv2.y -= cy
-                    uv2 /= cellSpan
+    if state.meshMode == 'STANDARD' and len(polygonIDs) == 0:
+        self.report({ 'INFO' }, f"GZRS2: Unused rs material slot: { m }, { state.xmlRsMats[m]['name'] }")
+        return False
 
-                uv2.y += 1.0
-                meshUV2.append(uv2)
-            else:
-                meshUV2.append(treeVerts[v].uv2)
+    polygonCounts = treeBuffers.vertexCounts[polygonIDs]
+    polygonStarts = np.cumsum(polygonCounts) - polygonCounts
 
-        meshFaces.append(tuple(range(offset, offset + polygon.vertexCount)))
-        offset += polygon.vertexCount
+    vertexIDs = getPolygonVertexIDs(treeBuffers, polygonIDs)
 
-        if state.meshMode == 'BAKE':
-            meshMatIDs.append(polygon.matID)
+    meshVerts = treeBuffers.positions[vertexIDs]
+    meshNorms = treeBuffers.normals[vertexIDs]
+    meshUV1 = treeBuffers.uv1s[vertexIDs]
 
-    if state.meshMode == 'STANDARD' and not found:
-        self.report({ 'INFO' }, f"GZRS2: Unused rs material slot: { m }, { state.xmlRsMats[m]['name'] }")
-        return False
+    if fromLightmap:
+        numCells = len(state.lmImages)
+        cellSpan = int(math.sqrt(nextSquare(numCells)))
 
-    blMesh.from_pydata(meshVerts, (), meshFaces)
-    blMesh.normals_split_custom_set_from_vertices(meshNorms)
+        meshUV2 = state.lmUVs[vertexIDs].copy()
 
-    uvLayer1 = blMesh.uv_layers.new()
-    for c, uv in enumerate(meshUV1): uvLayer1.data[c].uv = uv
+        if numCells > 1:
+            cells = np.repeat(np.asarray(state.lmLightmapIDs)[polygonIDs], polygonCounts)
 
-    uvLayer2 = blMesh.uv_layers.new()
-    for c, uv in enumerate(meshUV2): uvLayer2.data[c].uv = uv
+            meshUV2[:, 0] += cells % cellSpan
+            meshUV2[:, 1] -= cells // cellSpan
+            meshUV2 /= cellSpan
 
-    blMesh.validate()
-    blMesh.update()
+        meshUV2[:, 1] += 1.0
+    else:
+        meshUV2 = treeBuffers.uv2s[vertexIDs]
+
+    setupMeshFromArrays(blMesh, polygonStarts, meshVerts, meshNorms, meshUV1, meshUV2)
 
     if state.meshMode == 'STANDARD': return True
-    elif state.meshMode == 'BAKE': return tuple(meshMatIDs)
+    elif state.meshMode == 'BAKE': return tuple(treeBuffers.matIDs.tolist())
 
 # This only works if the user has an Info area open somewhere
 # Luckily, the Scripting layout has one by default
@@ -1698,6 +1675,15 @@ def createBackupFile(path, *, purgeUnused = False):
     if purgeUnused:
         os.remove(path)
 
+def openExportFile(path, *, sizeHint = 0):
+    if EXPORT_BUFFERED:
+        return BufferedWriter(path, sizeHint = sizeHint)
+
+    return open(path, 'wb')
+
+def openStreamingExportFile(path):
+    return StreamingWriter(path, chunkSize = EXPORT_CHUNK_SIZE)
+
 # TODO: This pattern is ugly, wrap and generalize with a function call
 # TODO: Try the walrus operator for succinct error handling
 def checkMeshesEmptySlots(blMeshObjs, self = None):
@@ -2118,15 +2104,12 @@ def partitionPolygons(polygons, plane, *, markUsed = True, tuplize = True, gette
 
     return posPolygons, negPolygons
 
-def choosePlane(polygons, *, checkCounts = False, getter = lambda x: x):
+def findPlaneCandidate(polygons, candidates, checkCounts, getter):
     chosenCost = float('inf')
     chosenPolygon = None
     chosenPlane = None
 
-    for polygon1 in polygons:
-        if polygon1.used:
-            continue
-
+    for polygon1 in candidates:
         counts = [0 for _ in range(5)]
 
         normal = polygon1.normal.normalized()
@@ -2167,6 +2150,23 @@ def choosePlane(polygons, *, checkCounts = False, getter = lambda x: x):
         chosenPolygon = polygon1
         chosenPlane = plane
 
+    return chosenPolygon, chosenPlane
+
+# Large nodes only try an evenly spread, jittered sample of the unused planes, small ones try them all
+# The exhaustive search also runs when no sampled plane was usable, so sampling never turns a node into a leaf
+def choosePlane(polygons, *, checkCounts = False, getter = lambda x: x, sampleCount = 0, rng = None):
+    candidates = tuple(polygon for polygon in polygons if not polygon.used)
+    chosenPolygon = None
+
+    if sampleCount > 0 and len(candidates) > max(sampleCount, TREE_SAMPLE_THRESHOLD):
+        stride = len(candidates) / sampleCount
+        samples = tuple(candidates[int((s + rng.random()) * stride)] for s in range(sampleCount))
+
+        chosenPolygon, chosenPlane = findPlaneCandidate(polygons, samples, checkCounts, getter)
+
+    if chosenPolygon is None:
+        chosenPolygon, chosenPlane = findPlaneCandidate(polygons, candidates, checkCounts, getter)
+
     if chosenPolygon:
         chosenPolygon.used = True
 
@@ -2205,7 +2205,8 @@ def createOctreeNode(octPolygons, octPlanes, bbmin, bbmax, depthLimit, *, depth
 
     return Rs2TreeNodeExport(bbmin, bbmax, Vector((0, 0, 0, 0)), None, None, octPolygons)
 
-def createBsptreeNode(bspPolygons, bspPlanes, bbmin, bbmax, *, depth = 0):
+def createBsptreeNode(bspPolygons, bspPlanes, bbmin, bbmax, *, depth = 0, sampleCount = 0, rng = None):
+    rng = rng or random.Random(TREE_SAMPLE_SEED)
     plane = None
     positive = None
     negative = None
@@ -2215,7 +2216,7 @@ def createBsptreeNode(bspPolygons, bspPlanes, bbmin, bbmax, *, depth = 0):
         bspPlanes[depth] = None
 
     if plane is None:
-        plane = choosePlane(bspPolygons, checkCounts = True, getter = lambda x: x.pos)
+        plane = choosePlane(bspPolygons, checkCounts = True, getter = lambda x: x.pos, sampleCount = sampleCount, rng = rng)
 
     if plane is not None:
         posBspPolygons, negBspPolygons = partitionPolygons(bspPolygons, plane, getter = lambda x: x.pos)
@@ -2223,8 +2224,8 @@ def createBsptreeNode(bspPolygons, bspPlanes, bbmin, bbmax, *, depth = 0):
         posbbmin, posbbmax = calcPolygonBounds(posBspPolygons)
         negbbmin, negbbmax = calcPolygonBounds(negBspPolygons)
 
-        if len(posBspPolygons) > 0: positive = createBsptreeNode(posBspPolygons, bspPlanes, posbbmin, posbbmax, depth = depth + 1)
-        if len(negBspPolygons) > 0: negative = createBsptreeNode(negBspPolygons, bspPlanes, negbbmin, negbbmax, depth = depth + 1)
+        if len(posBspPolygons) > 0: positive = createBsptreeNode(posBspPolygons, bspPlanes, posbbmin, posbbmax, depth = depth + 1, sampleCount = sampleCount, rng = rng)
+        if len(negBspPolygons) > 0: negative = createBsptreeNode(negBspPolygons, bspPlanes, negbbmin, negbbmax, depth = depth + 1, sampleCount = sampleCount, rng = rng)
 
         return Rs2TreeNodeExport(bbmin, bbmax, plane, positive, negative, ())
 
@@ -2358,7 +2359,8 @@ def getPartitionPolygon(plane, boundsPolygons):
 
     return True, Col1BoundaryPolygon(vertexCount, posVertices, -up.copy()), Col1BoundaryPolygon(vertexCount, negVertices, up.copy()), outputPolygons
 
-def createColtreeNode(colPolygons, boundsPolygons, checkDegenerate, *, depth = 0):
+def createColtreeNode(colPolygons, boundsPolygons, checkDegenerate, *, depth = 0, sampleCount = 0, rng = None):
+    rng = rng or random.Random(TREE_SAMPLE_SEED)
     colPolygonCount = len(colPolygons)
     boundsPolygonCount = len(boundsPolygons)
 
@@ -2466,7 +2468,7 @@ def createColtreeNode(colPolygons, boundsPolygons, checkDegenerate, *, depth = 0
 
         return result
 
-    if (plane := choosePlane(colPolygons)):
+    if (plane := choosePlane(colPolygons, sampleCount = sampleCount, rng = rng)):
         # print("\t" * depth, "Plane:", plane)
         posColPolygons, negColPolygons = partitionPolygons(colPolygons, plane)
 
@@ -2481,9 +2483,9 @@ def createColtreeNode(colPolygons, boundsPolygons, checkDegenerate, *, depth = 0
         negBoundsPolygons = tuple(negBoundsPolygons)
 
         # print("\t" * depth, "Positive:", len(posColPolygons), len(posBoundsPolygons))
-        positive = createColtreeNode(posColPolygons, posBoundsPolygons, checkDegenerate, depth = depth + 1)
+        positive = createColtreeNode(posColPolygons, posBoundsPolygons, checkDegenerate, depth = depth + 1, sampleCount = sampleCount, rng = rng)
         # print("\t" * depth, "Negative:", len(negColPolygons), len(negBoundsPolygons))
-        negative = createColtreeNode(negColPolygons, negBoundsPolygons, checkDegenerate, depth = depth + 1)
+        negative = createColtreeNode(negColPolygons, negBoundsPolygons, checkDegenerate, depth = depth + 1, sampleCount = sampleCount, rng = rng)
 
         # print("\t" * depth, "Export fork:", bool(positive), bool(negative))
         return Col1TreeNode(plane, False, positive, negative, ())
@@ -2491,6 +2493,194 @@ def createColtreeNode(colPolygons, boundsPolygons, checkDegenerate, *, depth = 0
     # print("\t" * depth, "Export hull:", colPolygonCount)
     return Col1TreeNode(Vector((0, 0, 0, 0)), False, None, None, createColTriangles(colPolygons, checkDegenerate))
 
+def createCol1Tree(planeData, solids, positives, negatives, triangleStarts, triangleCounts, triangleData, convertUnits):
+    # Rounded after every step, like the Vector math in readPlane()
+    planes = normalizeNdarray(np.array(planeData, dtype = np.float32).reshape(-1, 4).astype(np.float64)).astype(np.float32)
+
+    if convertUnits:    planes[:, 3] = planes[:, 3].astype(np.float64) * 0.01
+    planes[:, 1] = -planes[:, 1]
+
+    triangles = np.frombuffer(triangleData, dtype = '<f4').reshape(-1, 12)
+
+    return Col1Tree(
+        planes,
+        np.array(solids, dtype = bool),
+        np.array(positives, dtype = np.int32),
+        np.array(negatives, dtype = np.int32),
+        np.array(triangleStarts, dtype = np.int32),
+        np.array(triangleCounts, dtype = np.int32),
+        transformCoordinateNdarray(triangles[:, :9].reshape(-1, 3), convertUnits, True).reshape(-1, 3, 3),
+        transformDirectionNdarray(triangles[:, 9:], True)
+    )
+
+# Returns the planes and triangles in file layout, ready to be written per node
+def createCol1TreeData(tree, convertUnits):
+    planes = normalizeNdarray(tree.planes.astype(np.float64)).astype(np.float32)
+    planes[:, 1] = -planes[:, 1]
+
+    if convertUnits:    planes[:, 3] = planes[:, 3].astype(np.float64) * 100
+
+    vertices = (tree.vertices * np.array((100.0, -100.0, 100.0) if convertUnits else (1.0, -1.0, 1.0), dtype = np.float32)).reshape(-1, 9)
+    normals = transformDirectionNdarray(tree.normals, True)
+
+    return planes.astype('<f4'), np.concatenate((vertices, normals), axis = 1).astype('<f4')
+
+# Writes the nodes in file order, the header is left to the caller
+def writeCol1Tree(file, tree, convertUnits):
+    planeData, triangleData = createCol1TreeData(tree, convertUnits)
+
+    def enterCol1Node(n):
+        file.write(planeData[n].tobytes())
+        writeBool(file, tree.solids[n])
+
+        return n
+
+    def branchCol1Node(n, b):
+        child = int(tree.negatives[n] if b else tree.positives[n])
+        writeBool(file, child >= 0)
+
+        return child if child >= 0 else None
+
+    def leaveCol1Node(n, children):
+        start = tree.triangleStarts[n]
+        count = tree.triangleCounts[n]
+
+        writeUInt(file, count)
+        file.write(triangleData[start:start + count].tobytes())
+
+    walkTree(0, enterCol1Node, branchCol1Node, leaveCol1Node)
+
+def flattenCol1Tree(root):
+    planes = []
+    solids = []
+    positives = []
+    negatives = []
+    triangleStarts = []
+    triangleCounts = []
+    triangles = []
+
+    def enterCol1Node(node):
+        planes.append(tuple(node.plane))
+        solids.append(node.solid)
+        positives.append(-1)
+        negatives.append(-1)
+        triangleStarts.append(0)
+        triangleCounts.append(0)
+
+        return len(solids) - 1, node
+
+    def branchCol1Node(context, b):
+        n, node = context
+        child = node.positive if b == 0 else node.negative
+
+        if child is not None:
+            if b == 0:  positives[n] = len(solids)
+            else:       negatives[n] = len(solids)
+
+        return child
+
+    def leaveCol1Node(context, children):
+        n, node = context
+
+        triangleStarts[n] = len(triangles)
+        triangleCounts[n] = len(node.triangles)
+        triangles.extend(node.triangles)
+
+    walkTree(root, enterCol1Node, branchCol1Node, leaveCol1Node)
+
+    return Col1Tree(
+        np.array(planes, dtype = np.float32).reshape(-1, 4),
+        np.array(solids, dtype = bool),
+        np.array(positives, dtype = np.int32),
+        np.array(negatives, dtype = np.int32),
+        np.array(triangleStarts, dtype = np.int32),
+        np.array(triangleCounts, dtype = np.int32),
+        np.array([[tuple(vertex) for vertex in triangle.vertices] for triangle in triangles], dtype = np.float32).reshape(-1, 3, 3),
+        np.array([tuple(triangle.normal) for triangle in triangles], dtype = np.float32).reshape(-1, 3)
+    )
+
+def unpackColTriangles(vertices, normals):
+    return [ColTriangle(ndarrayToVectors(triangleVerts), Vector(normal)) for triangleVerts, normal in zip(vertices, normals.tolist())]
+
+def createCol1TreeNodeTriangles(tree, n):
+    start = int(tree.triangleStarts[n])
+    end = start + int(tree.triangleCounts[n])
+
+    return tuple(unpackColTriangles(tree.vertices[start:end], tree.normals[start:end]))
+
+def expandCol1Tree(tree):
+    if len(tree.solids) == 0:
+        return None
+
+    planes = tree.planes.tolist()
+
+    def enterCol1Node(n):
+        return n
+
+    def branchCol1Node(n, b):
+        child = int(tree.positives[n] if b == 0 else tree.negatives[n])
+
+        return child if child >= 0 else None
+
+    def leaveCol1Node(n, children):
+        positive, negative = children
+
+        return Col1TreeNode(Vector(planes[n]), bool(tree.solids[n]), positive, negative, createCol1TreeNodeTriangles(tree, n))
+
+    return walkTree(0, enterCol1Node, branchCol1Node, leaveCol1Node)
+
+# Splits the triangles by the solid flag of their node, in file order
+def createCol1TreeTriangles(tree):
+    counts = tree.triangleCounts
+    ranks = np.arange(len(tree.normals)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    triangleSolids = np.zeros(len(tree.normals), dtype = bool)
+    triangleSolids[np.repeat(tree.triangleStarts, counts) + ranks] = np.repeat(tree.solids, counts)
+
+    triangles = unpackColTriangles(tree.vertices, tree.normals)
+
+    colTrisHull = [triangle for triangle, solid in zip(triangles, triangleSolids.tolist()) if not solid]
+    colTrisSolid = [triangle for triangle, solid in zip(triangles, triangleSolids.tolist()) if solid]
+
+    return colTrisHull, colTrisSolid
+
+# Faces are degenerate when they repeat a vertex, or share all three vertices with another face regardless of winding
+def countDegenerateNavFaces(faces):
+    repeatCount = 0
+    faceCounts = {}
+
+    for face in faces:
+        key = tuple(sorted(face))
+
+        if key[0] == key[1] or key[1] == key[2]:
+            repeatCount += 1
+            continue
+
+        faceCounts[key] = faceCounts.get(key, 0) + 1
+
+    return repeatCount + sum(count for count in faceCounts.values() if count > 1)
+
+# Each face links across its edges to the first other face sharing them, or -1 if none
+# Edges are visited in the same order as MeshLoopTriangle.edge_keys
+def createNavLinks(faces):
+    edgeFaces = {}
+    faceEdges = []
+
+    for f, (v1, v2, v3) in enumerate(faces):
+        edges = ((min(v1, v2), max(v1, v2)), (min(v2, v3), max(v2, v3)), (min(v3, v1), max(v3, v1)))
+        faceEdges.append(edges)
+
+        for edge in edges:
+            edgeFaces.setdefault(edge, []).append(f)
+
+    links = []
+
+    for f, edges in enumerate(faceEdges):
+        for edge in edges:
+            links.append(next((other for other in edgeFaces[edge] if other != f), -1))
+
+    return tuple(links)
+
 def getTreeNodeCount(tree):
     count = 1
 
@@ -2545,35 +2735,27 @@ def unpackLmImages(context, state):
     if numCells == 0:
         return
 
-    lmImage = state.lmImages[0]
-    imageSize = lmImage.size
+    imageSize = state.lmImages[0].size
+    cellSpan = int(math.sqrt(nextSquare(numCells))) if numCells > 1 else 1
+    atlasSize = imageSize * cellSpan
 
-    if numCells == 1:
-        blLmImage = bpy.data.images.new(f"{ state.filename }_LmImage", imageSize, imageSize)
-        blLmImage.pixels = tuple(v for p in range(imageSize * imageSize) for v in (lmImage.data[p * 3 + 2], lmImage.data[p * 3 + 1], lmImage.data[p * 3 + 0], 1.0))
-    elif numCells > 1:
-        cellSpan = int(math.sqrt(nextSquare(numCells)))
-        atlasSize = imageSize * cellSpan
-        atlasPixels = [i for _ in range(atlasSize * atlasSize) for i in (0.0, 0.0, 0.0, 1.0)]
+    # Image data is stored as BGR, cells fill the atlas left to right then top to bottom
+    atlasPixels = np.zeros((atlasSize, atlasSize, 4), dtype = np.float32)
+    atlasPixels[:, :, 3] = 1.0
 
-        for c, lmImage in enumerate(state.lmImages):
-            cx = c % cellSpan
-            cy = cellSpan - 1 - c // cellSpan
-
-            for p in range(imageSize * imageSize):
-                px = p % imageSize
-                py = p // imageSize
+    for c, lmImage in enumerate(state.lmImages):
+        cx = c % cellSpan
+        cy = cellSpan - 1 - c // cellSpan
 
-                a = cx * imageSize
-                a += cy * imageSize * atlasSize
-                a += px + py * atlasSize
-
-                atlasPixels[a * 4 + 0] = lmImage.data[p * 3 + 2]
-                atlasPixels[a * 4 + 1] = lmImage.data[p * 3 + 1]
-                atlasPixels[a * 4 + 2] = lmImage.data[p * 3 + 0]
+        cellPixels = atlasPixels[cy * imageSize:(cy + 1) * imageSize, cx * imageSize:(cx + 1) * imageSize]
+        cellPixels[:, :, :3] = lmImage.data.reshape(imageSize, imageSize, 3)[:, :, ::-1]
 
+    if numCells == 1:
+        blLmImage = bpy.data.images.new(f"{ state.filename }_LmImage", atlasSize, atlasSize)
+    else:
         blLmImage = bpy.data.images.new(f"{ state.filename }_LmAtlas{ numCells }", atlasSize, atlasSize)
-        blLmImage.pixels = atlasPixels
+
+    blLmImage.pixels.foreach_set(atlasPixels.ravel())
 
     blLmImage.pack()
 
@@ -2584,22 +2766,34 @@ def unpackLmImages(context, state):
 
 def packLmImageData(self, imageSize, floats, state, *, fromAtlas = False, atlasSize = 0, cx = 0, cy = 0):
     sopath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clib_gzrs2', 'clib_gzrs2.x86_64-w64-mingw32.so')
-    success = True
 
-    try:
-        clib = ctypes.CDLL(sopath)
-    except OSError as ex:
-        print(f"GZRS2: Failed to load C library, defaulting to pure Python: { ex }, { sopath }")
-        success = False
+    # The C library only knows the original endpoint fit and always encodes the whole image
+    success = not state.lmVersion4 or (state.lmEncodeFit == 'BRIGHTNESS' and state.lmBlockCache is None)
+
+    if success:
+        try:
+            clib = ctypes.CDLL(sopath)
+        except OSError as ex:
+            print(f"GZRS2: Failed to load C library, defaulting to pure Python: { ex }, { sopath }")
+            success = False
 
     if success:
         clib.packLmImageData.restype = py_object
         clib.packLmImageData.argtypes = [c_uint, py_object, c_bool, c_bool, c_bool, c_uint, c_uint, c_uint]
 
         try:
-            return clib.packLmImageData(imageSize, floats, state.lmVersion4, state.mod4Fix, fromAtlas, atlasSize, cx, cy)
+            imageData = clib.packLmImageData(imageSize, floats, state.lmVersion4, state.mod4Fix, fromAtlas, atlasSize, cx, cy)
         except (ValueError, ctypes.ArgumentError) as ex:
             print(f"GZRS2: Failed to call C function, defaulting to pure Python: { ex }, { sopath }")
+            imageData = None
+
+        if imageData is not None:
+            if state.lmVersion4:
+                imageData = bytearray(imageData) + packLmMipmapData(imageSize, getLmImagePixels(imageSize, floats, fromAtlas, atlasSize, cx, cy), state)
+            else:
+                imageData = padBMPRows(imageData, imageSize)
+
+            return imageData
 
     pixelCount = imageSize ** 2
 
@@ -2625,115 +2819,78 @@ def packLmImageData(self, imageSize, floats, state, *, fromAtlas = False, atlasS
                 imageData[p * 3 + 1] = int(floats[f * 4 + 1] * exportRange)
                 imageData[p * 3 + 2] = int(floats[f * 4 + 0] * exportRange)
 
+        imageData = padBMPRows(imageData, imageSize)
     else:
-        imageData = bytearray(pixelCount // 2)
-        imageShorts = memoryview(imageData).cast('H')
-        imageInts = memoryview(imageData).cast('I')
-        missed = False
-
-        blockLength = 4
-        blockStride = blockLength ** 2
-        blockCount = pixelCount // blockStride
-        blockSpan = int(math.sqrt(blockCount))
-
-        blocks = [[Vector((0, 0, 0)), Vector((0, 0, 0)), [Vector((0, 0, 0)) for _ in range(blockStride)]] for b in range(blockCount)]
-
-        for b, block in enumerate(blocks):
-            bx = b % blockSpan
-            by = b // blockSpan
-            maximum = Vector((0, 0, 0))
-            minimum = Vector((1, 1, 1))
-            maxlen2 = 0
-            minlen2 = 3
-
-            for p in range(blockStride):
-                px = p % blockLength
-                py = p // blockLength
-
-                if not fromAtlas:
-                    f = bx * blockLength
-                    f += by * blockLength * imageSize
-                    f += px + py * imageSize
-                else:
-                    f = cx * imageSize
-                    f += cy * imageSize * atlasSize
-                    f += bx * blockLength
-                    f += by * blockLength * atlasSize
-                    f += px + py * atlasSize
+        pixels = getLmImagePixels(imageSize, floats, fromAtlas, atlasSize, cx, cy)
+        imageData, missed = encodeDXT1Cached(pixels, state)
 
-                pixel = Vector((floats[f * 4 + 0], floats[f * 4 + 1], floats[f * 4 + 2]))
-                len2 = pixel.length_squared
+        if missed:
+            print("Warning! Failed to pick a distance for one or more dds pixels!")
 
-                if len2 > maxlen2:
-                    maxlen2 = len2
-                    maximum = pixel
+        imageData += packLmMipmapData(imageSize, pixels, state)
 
-                if len2 < minlen2:
-                    minlen2 = len2
-                    minimum = pixel
+    return imageData
 
-                block[2][p] = pixel
+def getLmImagePixels(imageSize, floats, fromAtlas, atlasSize, cx, cy):
+    if not fromAtlas:
+        return np.asarray(floats, dtype = np.float32).reshape(imageSize, imageSize, 4)[:, :, :3]
 
-            block[0] = maximum
-            block[1] = minimum
+    pixels = np.asarray(floats, dtype = np.float32).reshape(atlasSize, atlasSize, 4)
 
-        for b, block in enumerate(blocks):
-            ushort1 = vectorToRGB565(block[0])
-            ushort2 = vectorToRGB565(block[1])
+    return pixels[cy * imageSize:(cy + 1) * imageSize, cx * imageSize:(cx + 1) * imageSize, :3]
 
-            if ushort1 == ushort2:
-                if ushort1 == 0:
-                    imageShorts[b * 4 + 0] = ushort1 + 1
-                    imageShorts[b * 4 + 1] = ushort1
-                    imageInts[b * 2 + 1] = 21845 # 0x5555 -> 0101010101010101
-                else:
-                    imageShorts[b * 4 + 0] = ushort1
-                    imageShorts[b * 4 + 1] = ushort1 - 1
-                    imageInts[b * 2 + 1] = 0
-            else:
-                rgb1 = block[0]
-                rgb2 = block[1]
-
-                if ushort1 < ushort2:
-                    ushort1, ushort2 = ushort2, ushort1
-                    rgb1, rgb2 = rgb2, rgb1
-
-                imageShorts[b * 4 + 0] = ushort1
-                imageShorts[b * 4 + 1] = ushort2
-
-                p0 = rgb1
-                p1 = rgb2
-                p2 = (2.0 * rgb1 + rgb2) / 3.0
-                p3 = (2.0 * rgb2 + rgb1) / 3.0
-
-                for p, pixel in enumerate(block[2]):
-                    d0 = (p0 - pixel).length_squared
-                    d1 = (p1 - pixel).length_squared
-                    d2 = (p2 - pixel).length_squared
-                    d3 = (p3 - pixel).length_squared
-
-                    minimum = min(d0, d1, d2, d3)
-
-                    s = p * 2
-
-                    if minimum == d0:
-                        imageInts[b * 2 + 1] &= ~(3 << (s + 0)) # Set both bits to 0        = 0
-                    elif minimum == d1:
-                        imageInts[b * 2 + 1] |=  (1 << (s + 0)) # Set bit 1 & clear bit 2   = 1
-                        imageInts[b * 2 + 1] &= ~(1 << (s + 1))
-                    elif minimum == d2:
-                        imageInts[b * 2 + 1] &= ~(1 << (s + 0)) # Clear bit 1 & set bit 2   = 2
-                        imageInts[b * 2 + 1] |=  (1 << (s + 1))
-                    elif minimum == d3:
-                        imageInts[b * 2 + 1] |=  (3 << (s + 0)) # Set both bits to 1        = 3
-                    else:
-                        missed = True
+# Chains stop at a single 4x4 block, the smaller levels would still take a whole block each
+def getLmMipCount(imageSize, state):
+    if not state.lmVersion4 or state.lmMipmaps == 'NONE':
+        return 1
 
-        if missed:
-            print("Warning! Failed to pick a distance for one or more dds pixels!")
+    return max(1, int(math.log2(imageSize)) - 1)
+
+# Taps sit at half texel steps around each destination texel, measured in destination texels
+def createKaiserWeights():
+    offsets = np.arange(-LM_KAISER_WIDTH + 0.25, LM_KAISER_WIDTH, 0.5)
+    windows = np.i0(LM_KAISER_ALPHA * np.sqrt(np.clip(1.0 - (offsets / LM_KAISER_WIDTH) ** 2, 0.0, 1.0))) / np.i0(LM_KAISER_ALPHA)
+    weights = np.sinc(offsets) * windows
+
+    return (weights / weights.sum()).astype(np.float32)
+
+# Halves one axis, texels past the edges repeat the border
+def downsampleKaiser(pixels, axis, weights):
+    pixels = np.moveaxis(pixels, axis, 0)
+    size = pixels.shape[0] // 2
+    firstTap = len(weights) // 2 - 1
+    downsampled = np.zeros((size,) + pixels.shape[1:], dtype = np.float32)
+
+    for t, weight in enumerate(weights):
+        sources = np.clip(np.arange(size) * 2 + t - firstTap, 0, pixels.shape[0] - 1)
+        downsampled += weight * pixels[sources]
+
+    return np.moveaxis(downsampled, 0, axis)
+
+def createLmMipmaps(pixels, mipFilter, mipCount):
+    levels = [pixels]
+    weights = createKaiserWeights()
+
+    for _ in range(mipCount - 1):
+        height, width = pixels.shape[:2]
 
-        imageShorts.release()
-        imageInts.release()
+        if mipFilter == 'BOX':
+            pixels = pixels.reshape(height // 2, 2, width // 2, 2, 3).mean(axis = (1, 3), dtype = np.float32)
+        else:
+            # Negative lobes can ring below black next to bright texels
+            pixels = np.maximum(downsampleKaiser(downsampleKaiser(pixels, 0, weights), 1, weights), 0.0)
+
+        levels.append(pixels)
+
+    return levels
+
+# Returns the encoded levels that follow the full resolution image, empty when mipmaps are off
+def packLmMipmapData(imageSize, pixels, state):
+    imageData = bytearray()
+
+    for level in createLmMipmaps(pixels, state.lmMipmaps, getLmMipCount(imageSize, state))[1:]:
+        levelData, _ = encodeDXT1Cached(level, state)
+        imageData += levelData
 
     return imageData
 
@@ -2751,16 +2908,302 @@ def rgb565ToVector(rgb):
 
     return Vector((r, g, b))
 
-def writeDDSHeader(file, imageSize, pixelCount, ddsSize):
+def rgb565ToNdarray(rgb):
+    r = ((rgb >> 11) & 0b11111 ) / 31.0
+    g = ((rgb >>  5) & 0b111111) / 63.0
+    b = ((rgb >>  0) & 0b11111 ) / 31.0
+
+    return np.stack((r, g, b), axis = -1).astype(np.float32)
+
+# Mirrors the float32 math of the per block decoder, including the palette mode being picked by comparing
+# color lengths the way mathutils compares vectors, so the output stays bit-identical
+def decodeDXT1(imageData, width, height):
+    blocks = np.frombuffer(imageData, dtype = '<u2', count = width * height // 4).reshape(-1, 4)
+    indices = blocks[:, 2].astype(np.uint32) | (blocks[:, 3].astype(np.uint32) << 16)
+
+    p0 = rgb565ToNdarray(blocks[:, 0])
+    p1 = rgb565ToNdarray(blocks[:, 1])
+
+    len0 = (p0[:, 2] * p0[:, 2] + p0[:, 1] * p0[:, 1]) + p0[:, 0] * p0[:, 0]
+    len1 = (p1[:, 2] * p1[:, 2] + p1[:, 1] * p1[:, 1]) + p1[:, 0] * p1[:, 0]
+    fourColor = (len0 > len1)[:, None]
+
+    two = np.float32(2.0)
+    third = np.float32(1.0) / np.float32(3.0)
+    half = np.float32(0.5)
+
+    palette = np.empty((len(blocks), 4, 3), dtype = np.float32)
+    palette[:, 0] = p0
+    palette[:, 1] = p1
+    palette[:, 2] = np.where(fourColor, (two * p0 + p1) * third, (p0 + p1) * half)
+    palette[:, 3] = np.where(fourColor, (two * p1 + p0) * third, np.float32(0.0))
+
+    texelIndices = (indices[:, None] >> (np.arange(16, dtype = np.uint32) * 2)) & 3
+    texels = palette[np.arange(len(blocks))[:, None], texelIndices]
+
+    # Blocks run left to right then top to bottom, each one holds four rows of four texels
+    return texels.reshape(height // 4, width // 4, 4, 4, 3).transpose(0, 2, 1, 3, 4).reshape(height, width, 3)
+
+def vectorsToRGB565(vecs):
+    vecs = np.clip(vecs.astype(np.float64), 0.0, 1.0)
+    r = np.trunc((vecs[..., 0] + 8 / 255.0) * 31).astype(np.uint32) << 11
+    g = np.trunc((vecs[..., 1] + 4 / 255.0) * 63).astype(np.uint32) << 5
+    b = np.trunc((vecs[..., 2] + 8 / 255.0) * 31).astype(np.uint32)
+
+    return r | g | b
+
+def lengthSquaredFloat32(vecs):
+    return (vecs[..., 2] * vecs[..., 2] + vecs[..., 1] * vecs[..., 1]) + vecs[..., 0] * vecs[..., 0]
+
+# The original heuristic, endpoints are the brightest and darkest texels and nothing beats the starting guesses
+# of black for the maximum and white for the minimum
+def fitDXT1Brightness(blocks):
+    blockIDs = np.arange(len(blocks))
+    len2 = lengthSquaredFloat32(blocks)
+    maxTexels = np.argmax(len2, axis = 1)
+    minTexels = np.argmin(len2, axis = 1)
+
+    rgb1 = np.where((len2[blockIDs, maxTexels] > 0)[:, None], blocks[blockIDs, maxTexels], np.float32(0.0))
+    rgb2 = np.where((len2[blockIDs, minTexels] < 3)[:, None], blocks[blockIDs, minTexels], np.float32(1.0))
+
+    return rgb1, rgb2
+
+# Corners of the color bounding box, inset slightly and flipped along the channels that fall as red rises
+def fitDXT1Box(blocks):
+    mins = blocks.min(axis = 1)
+    maxs = blocks.max(axis = 1)
+    insets = (maxs - mins) / 16.0
+    mins, maxs = mins + insets, maxs - insets
+
+    centered = blocks - blocks.mean(axis = 1, keepdims = True)
+    flips = np.einsum('bp,bpi->bi', centered[:, :, 0], centered) < 0
+
+    return np.where(flips, mins, maxs), np.where(flips, maxs, mins)
+
+# Extremes of the texels projected on the principal axis of each block, found by power iteration
+def fitDXT1Axis(blocks):
+    means = blocks.mean(axis = 1)
+    centered = blocks - means[:, None]
+    covariances = np.einsum('bpi,bpj->bij', centered, centered)
+    axes = np.ones_like(means)
+
+    for _ in range(LM_AXIS_FIT_ITERATIONS):
+        axes = np.einsum('bij,bj->bi', covariances, axes)
+        axes /= np.maximum(np.linalg.norm(axes, axis = 1, keepdims = True), 1e-12)
+
+    projections = np.einsum('bpi,bi->bp', centered, axes)
+
+    rgb1 = np.clip(means + axes * projections.max(axis = 1)[:, None], 0.0, 1.0)
+    rgb2 = np.clip(means + axes * projections.min(axis = 1)[:, None], 0.0, 1.0)
+
+    return rgb1, rgb2
+
+def createDXT1Palettes(rgb1, rgb2):
+    two = np.float32(2.0)
+    third = np.float32(1.0) / np.float32(3.0)
+
+    return np.stack((rgb1, rgb2, (two * rgb1 + rgb2) * third, (two * rgb2 + rgb1) * third), axis = 1)
+
+# Returns the endpoints in descending order along with the palette the indices are measured against, either the
+# quantized colors or the unquantized ones like the original encoder
+# This is the only place endpoints are ordered, every fit and the cluster refinement go through it
+def quantizeDXT1Endpoints(rgb1, rgb2, quantizedPalette):
+    ushort1 = vectorsToRGB565(rgb1)
+    ushort2 = vectorsToRGB565(rgb2)
+
+    swap = ushort1 < ushort2
+    ushort1, ushort2 = np.where(swap, ushort2, ushort1), np.where(swap, ushort1, ushort2)
+
+    if quantizedPalette:
+        rgb1, rgb2 = rgb565ToNdarray(ushort1), rgb565ToNdarray(ushort2)
+    else:
+        rgb1, rgb2 = np.where(swap[:, None], rgb2, rgb1), np.where(swap[:, None], rgb1, rgb2)
+
+    return ushort1, ushort2, createDXT1Palettes(rgb1, rgb2)
+
+def indexDXT1(blocks, palettes):
+    distances = lengthSquaredFloat32(palettes[:, None, :, :] - blocks[:, :, None, :])
+    texelIndices = np.argmin(distances, axis = 2)
+
+    return texelIndices, np.take_along_axis(distances, texelIndices[:, :, None], axis = 2)[:, :, 0].sum(axis = 1), bool(np.isnan(distances).any())
+
+# Least squares endpoints for the current index assignment, each index blends the endpoints with fixed weights
+# Blocks only take the refined endpoints when their error drops, so the result is never worse than the axis fit
+def refineDXT1Cluster(blocks, ushort1, ushort2, texelIndices, errors):
+    weights = np.array((1.0, 0.0, 2.0 / 3.0, 1.0 / 3.0), dtype = np.float32)
+
+    for _ in range(LM_CLUSTER_FIT_ITERATIONS):
+        alphas = weights[texelIndices]
+        betas = 1.0 - alphas
+
+        aa = (alphas * alphas).sum(axis = 1)
+        ab = (alphas * betas).sum(axis = 1)
+        bb = (betas * betas).sum(axis = 1)
+        ax = np.einsum('bp,bpi->bi', alphas, blocks)
+        bx = np.einsum('bp,bpi->bi', betas, blocks)
+
+        determinants = aa * bb - ab * ab
+        solvable = np.abs(determinants) > 1e-6
+        determinants = np.where(solvable, determinants, 1.0)[:, None]
+
+        rgb1 = np.clip((bb[:, None] * ax - ab[:, None] * bx) / determinants, 0.0, 1.0)
+        rgb2 = np.clip((aa[:, None] * bx - ab[:, None] * ax) / determinants, 0.0, 1.0)
+
+        newUshort1, newUshort2, palettes = quantizeDXT1Endpoints(rgb1, rgb2, True)
+        newIndices, newErrors, _ = indexDXT1(blocks, palettes)
+
+        better = solvable & (newErrors < errors)
+
+        if not np.any(better):
+            break
+
+        ushort1 = np.where(better, newUshort1, ushort1)
+        ushort2 = np.where(better, newUshort2, ushort2)
+        texelIndices = np.where(better[:, None], newIndices, texelIndices)
+        errors = np.where(better, newErrors, errors)
+
+    return ushort1, ushort2, texelIndices
+
+def splitDXT1Blocks(pixels):
+    height, width = pixels.shape[:2]
+
+    return pixels.reshape(height // 4, 4, width // 4, 4, 3).transpose(0, 2, 1, 3, 4).reshape((height // 4) * (width // 4), 16, 3)
+
+# Encodes all blocks at once, the brightness fit keeps the float32 math of the original per block encoder so its bytes match
+def encodeDXT1(pixels, fit = 'BRIGHTNESS'):
+    blocks = splitDXT1Blocks(pixels)
+    blockCount = len(blocks)
+
+    if fit == 'BRIGHTNESS':   rgb1, rgb2 = fitDXT1Brightness(blocks)
+    elif fit == 'BOX':        rgb1, rgb2 = fitDXT1Box(blocks)
+    else:                     rgb1, rgb2 = fitDXT1Axis(blocks)
+
+    ushort1, ushort2, palettes = quantizeDXT1Endpoints(rgb1, rgb2, fit != 'BRIGHTNESS')
+    texelIndices, errors, missed = indexDXT1(blocks, palettes)
+
+    if fit == 'CLUSTER':
+        ushort1, ushort2, texelIndices = refineDXT1Cluster(blocks, ushort1, ushort2, texelIndices, errors)
+
+    indices = np.bitwise_or.reduce(texelIndices.astype(np.uint32) << (np.arange(16, dtype = np.uint32) * 2), axis = 1)
+
+    # Flat blocks store a second endpoint one step away, black ones point half their texels at it
+    # Either way p0 stays above p1, so every block decodes with the four color palette
+    flat = ushort1 == ushort2
+    black = flat & (ushort1 == 0)
+
+    ushort1 = np.where(black, 1, ushort1)
+    ushort2 = np.where(flat & ~black, ushort2 - 1, ushort2)
+    indices = np.where(black, 21845, np.where(flat, 0, indices)) # 0x5555 -> 0101010101010101
+
+    imageData = np.empty((blockCount, 4), dtype = '<u2')
+    imageData[:, 0] = ushort1
+    imageData[:, 1] = ushort2
+    imageData[:, 2] = indices & 0xFFFF
+    imageData[:, 3] = indices >> 16
+
+    return bytearray(imageData.tobytes()), missed
+
+# Blocks are stored row by row, so shards of whole block rows can be encoded independently and joined in order
+# The heavy lifting happens inside numpy, which releases the GIL, so threads are enough to spread the work
+def encodeDXT1Sharded(pixels, workerCount, fit):
+    blockRows = pixels.shape[0] // 4
+    workerCount = workerCount or os.cpu_count() or 1
+    shardRows = max(1, min(LM_ENCODE_SHARD_ROWS, -(-blockRows // workerCount)))
+
+    if blockRows <= shardRows:
+        return encodeDXT1(pixels, fit)
+
+    shards = tuple(pixels[r * 4:(r + shardRows) * 4] for r in range(0, blockRows, shardRows))
+
+    with ThreadPoolExecutor(max_workers = workerCount) as executor:
+        results = tuple(executor.map(encodeDXT1, shards, (fit,) * len(shards)))
+
+    return bytearray().join(imageData for imageData, _ in results), any(missed for _, missed in results)
+
+# Cheap first pass, blocks are only compared against the block at the same position
+# Every word is salted with its lane and mixed before the lanes are summed
+def hashDXT1Blocks(blocks):
+    words = np.ascontiguousarray(blocks, dtype = np.float32).reshape(len(blocks), -1).view(np.uint64)
+    lanes = np.arange(1, words.shape[1] + 1, dtype = np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+    mixed = words ^ lanes
+    mixed = (mixed ^ (mixed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return np.sum(mixed ^ (mixed >> np.uint64(31)), axis = 1, dtype = np.uint64)
+
+# A 64 bit hash can still collide, so a hit is only trusted when the digests of the source texels match as well
+def digestDXT1Blocks(blocks):
+    data = memoryview(np.ascontiguousarray(blocks, dtype = np.float32).tobytes())
+    blockSize = 16 * 3 * 4
+
+    digests = b''.join(hashlib.blake2b(data[b:b + blockSize], digest_size = LM_BLOCK_DIGEST_SIZE).digest() for b in range(0, len(data), blockSize))
+
+    return np.frombuffer(digests, dtype = np.uint8).reshape(len(blocks), LM_BLOCK_DIGEST_SIZE)
+
+# Blocks that hash and digest the same as in the previous export reuse its bytes, only the rest go through the encoder
+# Levels are matched in the order they are encoded, a level that changed size is encoded in full
+def encodeDXT1Cached(pixels, state):
+    blockCache = state.lmBlockCache
+
+    if blockCache is None:
+        return encodeDXT1Sharded(pixels, state.lmWorkerCount, state.lmEncodeFit)
+
+    cacheStart = time.perf_counter()
+    blocksWide = pixels.shape[1] // 4
+    blocks = splitDXT1Blocks(pixels)
+    hashes = hashDXT1Blocks(blocks)
+    digests = digestDXT1Blocks(blocks)
+    imageData = np.zeros((len(blocks), 8), dtype = np.uint8)
+    changed = np.ones(len(blocks), dtype = bool)
+    level = len(blockCache.hashes)
+
+    if level < len(blockCache.previousHashes) and blockCache.previousHashes[level].shape == hashes.shape:
+        changed = blockCache.previousHashes[level] != hashes
+        changed |= np.any(blockCache.previousDigests[level] != digests, axis = 1)
+        imageData[~changed] = blockCache.previousBlocks[level][~changed]
+
+    changedCount = int(np.count_nonzero(changed))
+    missed = False
+
+    if changedCount > 0:
+        # Packed back into rows of the original width, so the changed blocks shard like a whole image
+        rowCount = -(-changedCount // blocksWide)
+        packed = np.zeros((rowCount * blocksWide, 16, 3), dtype = np.float32)
+        packed[:changedCount] = blocks[changed]
+        packed = packed.reshape(rowCount, blocksWide, 4, 4, 3).transpose(0, 2, 1, 3, 4).reshape(rowCount * 4, blocksWide * 4, 3)
+
+        encodeStart = time.perf_counter()
+        encoded, missed = encodeDXT1Sharded(packed, state.lmWorkerCount, state.lmEncodeFit)
+        blockCache.encodeTime += time.perf_counter() - encodeStart
+
+        imageData[changed] = np.frombuffer(encoded, dtype = np.uint8).reshape(-1, 8)[:changedCount]
+
+    blockCache.hashes.append(hashes)
+    blockCache.digests.append(digests)
+    blockCache.blocks.append(imageData)
+    blockCache.blockCount += len(blocks)
+    blockCache.hitCount += len(blocks) - changedCount
+    blockCache.cacheTime += time.perf_counter() - cacheStart
+
+    return bytearray(imageData.tobytes()), missed
+
+def writeDDSHeader(file, imageSize, pixelCount, ddsSize, mipCount = 1):
+    ddsFlags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    ddsCaps = DDSCAPS_TEXTURE
+
+    if mipCount > 1:
+        ddsFlags |= DDSD_MIPMAPCOUNT
+        ddsCaps |= DDSCAPS_COMPLEX | DDSCAPS_MIPMAP
+
     writeBytes(file, b'DDS ')
     writeUInt(file, ddsSize)
-    # writeUInt(file, DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_MIPMAPCOUNT | DDSD_LINEARSIZE)
-    writeUInt(file, DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE)
+    writeUInt(file, ddsFlags)
     writeInt(file, imageSize)
     writeInt(file, imageSize)
     writeUInt(file, pixelCount // 2)
     writeUInt(file, 0)
-    writeUInt(file, 0) # writeUInt(file, mipCount)
+    writeUInt(file, mipCount if mipCount > 1 else 0)
     for _ in range(11):
         writeUInt(file, 0)
 
@@ -2770,11 +3213,28 @@ def writeDDSHeader(file, imageSize, pixelCount, ddsSize):
     for _ in range(5):
         writeUInt(file, 0)
 
-    # writeUInt(file, DDSCAPS_COMPLEX | DDSCAPS_TEXTURE | DDSCAPS_MIPMAP)
-    writeUInt(file, DDSCAPS_TEXTURE)
+    writeUInt(file, ddsCaps)
     for _ in range(4):
         writeUInt(file, 0)
 
+# Rows of a 24 bit bmp are padded to four bytes, only sides below four ever need it
+def getBMPRowSize(width):
+    return (width * 3 + 3) & ~3
+
+def getBMPSize(imageSize):
+    return 14 + 40 + getBMPRowSize(imageSize) * imageSize
+
+def padBMPRows(imageData, imageSize):
+    rowSize = getBMPRowSize(imageSize)
+
+    if rowSize == imageSize * 3:
+        return imageData
+
+    rows = np.zeros((imageSize, rowSize), dtype = np.uint8)
+    rows[:, :imageSize * 3] = np.frombuffer(imageData, dtype = np.uint8).reshape(imageSize, imageSize * 3)
+
+    return bytearray(rows.tobytes())
+
 def writeBMPHeader(file, imageSize, bmpSize):
     writeBytes(file, b'BM')
     writeUInt(file, bmpSize)
@@ -2845,10 +3305,10 @@ def dumpImageData(imageDatas, imageSizes, imageCount, directory, filename, state
 
         with open(imgpath, 'wb') as file:
             if state.lmVersion4:
-                ddsSize = 76 + 32 + 20 + pixelCount // 2
-                writeDDSHeader(file, imageSize, pixelCount, ddsSize)
+                ddsSize = 76 + 32 + 20 + len(imageData)
+                writeDDSHeader(file, imageSize, pixelCount, ddsSize, getLmMipCount(imageSize, state))
             else:
-                bmpSize = 14 + 40 + pixelCount * 3
+                bmpSize = getBMPSize(imageSize)
                 writeBMPHeader(file, imageSize, bmpSize)
 
             file.write(imageData)
@@ -0,0 +1,328 @@
+#####
+# Most of the code is based on logic found in...
+#
+### GunZ 1
+# - RNavigationMesh.h/.cpp
+# - RNavigationNode.h/.cpp
+# - RAStar.h/.cpp
+#
+# Please report maps and models with unsupported features to me on Discord: Krunk#6051
+#####
+
+import math, heapq
+
+import numpy as np
+
+from collections import deque
+
+from ..constants_gzrs2 import *
+from ..classes_gzrs2 import *
+from .lib_gzrs2 import *
+
+# Queries run on a NavQueryMesh, faces are located from above so only the horizontal extents matter to the bvh
+# Paths are searched over face centers like the game does, then pulled tight through the shared edges with a funnel
+
+def findNavIslands(links):
+    links = np.asarray(links, dtype = np.int32).reshape(-1, 3)
+    islands = np.full(len(links), -1, dtype = np.int32)
+    neighbors = links.tolist()
+    islandCount = 0
+
+    for seed in range(len(links)):
+        if islands[seed] >= 0:
+            continue
+
+        islands[seed] = islandCount
+        queue = deque((seed,))
+
+        while queue:
+            for neighbor in neighbors[queue.popleft()]:
+                if neighbor >= 0 and islands[neighbor] < 0:
+                    islands[neighbor] = islandCount
+                    queue.append(neighbor)
+
+        islandCount += 1
+
+    return islands, islandCount
+
+def createNavBvh(query):
+    corners = query.vertices[query.faces]
+    faceMins = corners.min(axis = 1)
+    faceMaxs = corners.max(axis = 1)
+    faceCount = len(query.faces)
+
+    order = np.arange(faceCount, dtype = np.int32)
+    mins, maxs, lefts, rights, starts, counts = [], [], [], [], [], []
+    stack = [(0, faceCount, -1, False)] if faceCount > 0 else []
+
+    while stack:
+        start, count, parent, right = stack.pop()
+        segment = order[start:start + count]
+        node = len(mins)
+
+        mins.append(faceMins[segment].min(axis = 0))
+        maxs.append(faceMaxs[segment].max(axis = 0))
+        lefts.append(-1)
+        rights.append(-1)
+        starts.append(start)
+        counts.append(count)
+
+        if parent >= 0:
+            if right:   rights[parent] = node
+            else:       lefts[parent] = node
+
+        if count <= NAV_QUERY_LEAF_SIZE:
+            continue
+
+        # Median split along the longer horizontal axis of the face centers
+        centers = query.centers[segment, :2]
+        axis = int(np.argmax(centers.max(axis = 0) - centers.min(axis = 0)))
+        half = count // 2
+
+        order[start:start + count] = segment[np.argpartition(centers[:, axis], half)]
+
+        stack.append((start + half, count - half, node, True))
+        stack.append((start, half, node, False))
+
+    query.bvhMins = np.array(mins, dtype = np.float64).reshape(-1, 3)
+    query.bvhMaxs = np.array(maxs, dtype = np.float64).reshape(-1, 3)
+    query.bvhLefts = np.array(lefts, dtype = np.int32)
+    query.bvhRights = np.array(rights, dtype = np.int32)
+    query.bvhStarts = np.array(starts, dtype = np.int32)
+    query.bvhCounts = np.array(counts, dtype = np.int32)
+    query.bvhFaces = order
+
+# Links are rebuilt from shared edges when not given, as they would be on export
+def createNavQueryMesh(vertices, faces, links = None):
+    query = NavQueryMesh()
+
+    query.vertices = np.asarray(vertices, dtype = np.float64).reshape(-1, 3)
+    query.faces = np.asarray(faces, dtype = np.int32).reshape(-1, 3)
+    query.links = np.asarray(createNavLinks(query.faces.tolist()) if links is None else links, dtype = np.int32).reshape(-1, 3)
+    query.centers = query.vertices[query.faces].mean(axis = 1)
+    query.islands, query.islandCount = findNavIslands(query.links)
+
+    createNavBvh(query)
+
+    return query
+
+# Returns the face under or above each point, picking the vertically closest one where floors overlap, or -1 if there is none
+def navLocatePoints(query, points):
+    points = np.asarray(points, dtype = np.float64).reshape(-1, 3)
+    located = np.full(len(points), -1, dtype = np.int32)
+
+    if len(query.bvhMins) == 0:
+        return located
+
+    pointIDs = np.arange(len(points))
+    nodes = np.zeros(len(points), dtype = np.int32)
+    candidatePoints, candidateFaces = [], []
+
+    while len(pointIDs) > 0:
+        xy = points[pointIDs, :2]
+        inside = np.all((xy >= query.bvhMins[nodes, :2] - NAV_QUERY_EPSILON) & (xy <= query.bvhMaxs[nodes, :2] + NAV_QUERY_EPSILON), axis = 1)
+        pointIDs, nodes = pointIDs[inside], nodes[inside]
+
+        leaves = query.bvhLefts[nodes] < 0
+
+        if np.any(leaves):
+            leafPoints, leafNodes = pointIDs[leaves], nodes[leaves]
+            leafCounts = query.bvhCounts[leafNodes]
+            offsets = np.arange(leafCounts.sum()) - np.repeat(np.cumsum(leafCounts) - leafCounts, leafCounts)
+
+            candidatePoints.append(np.repeat(leafPoints, leafCounts))
+            candidateFaces.append(query.bvhFaces[np.repeat(query.bvhStarts[leafNodes], leafCounts) + offsets])
+
+        pointIDs, nodes = pointIDs[~leaves], nodes[~leaves]
+        pointIDs = np.concatenate((pointIDs, pointIDs))
+        nodes = np.concatenate((query.bvhLefts[nodes], query.bvhRights[nodes]))
+
+    if not candidatePoints:
+        return located
+
+    candidatePoints = np.concatenate(candidatePoints)
+    candidateFaces = np.concatenate(candidateFaces)
+
+    # Barycentric coordinates on the horizontal plane, vertical faces have no area and never contain a point
+    corners = query.vertices[query.faces[candidateFaces]]
+    v0 = corners[:, 1, :2] - corners[:, 0, :2]
+    v1 = corners[:, 2, :2] - corners[:, 0, :2]
+    v2 = points[candidatePoints, :2] - corners[:, 0, :2]
+
+    denominators = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+    valid = np.abs(denominators) > NAV_QUERY_EPSILON * NAV_QUERY_EPSILON
+    denominators = np.where(valid, denominators, 1.0)
+
+    u = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / denominators
+    v = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / denominators
+    contained = valid & (u >= -NAV_QUERY_EPSILON) & (v >= -NAV_QUERY_EPSILON) & (u + v <= 1.0 + NAV_QUERY_EPSILON)
+
+    candidatePoints, candidateFaces, corners, u, v = candidatePoints[contained], candidateFaces[contained], corners[contained], u[contained], v[contained]
+
+    if len(candidatePoints) == 0:
+        return located
+
+    heights = corners[:, 0, 2] + u * (corners[:, 1, 2] - corners[:, 0, 2]) + v * (corners[:, 2, 2] - corners[:, 0, 2])
+    gaps = np.abs(points[candidatePoints, 2] - heights)
+
+    order = np.lexsort((gaps, candidatePoints))
+    firsts = order[np.r_[True, candidatePoints[order][1:] != candidatePoints[order][:-1]]]
+    located[candidatePoints[firsts]] = candidateFaces[firsts]
+
+    return located
+
+# A* over the link graph, takes plain lists so bulk queries only convert the mesh once
+# The cost of every link is the distance between face centers, precomputed per mesh
+# The straight line to the goal never overestimates, so the default weight of one always finds the shortest corridor
+# Weights above one narrow the search on large meshes, but the corridor may then be up to that factor longer
+def navSearchCorridor(links, linkCosts, centers, startFace, endFace, heuristicWeight = NAV_QUERY_HEURISTIC_WEIGHT):
+    goal = centers[endFace]
+    costs = { startFace: 0.0 }
+    parents = { startFace: -1 }
+    heap = [(heuristicWeight * math.dist(centers[startFace], goal), -0.0, startFace)]
+
+    while heap:
+        _, cost, face = heapq.heappop(heap)
+        cost = -cost
+
+        if face == endFace:
+            corridor = []
+
+            while face >= 0:
+                corridor.append(face)
+                face = parents[face]
+
+            corridor.reverse()
+
+            return corridor
+
+        # Ties go to the deeper face, stale entries are skipped instead of keeping a closed set
+        if cost > costs[face]:
+            continue
+
+        for neighbor, linkCost in zip(links[face], linkCosts[face]):
+            if neighbor < 0:
+                continue
+
+            neighborCost = cost + linkCost
+
+            if neighborCost < costs.get(neighbor, math.inf):
+                costs[neighbor] = neighborCost
+                parents[neighbor] = face
+                heapq.heappush(heap, (neighborCost + heuristicWeight * math.dist(centers[neighbor], goal), -neighborCost, neighbor))
+
+    return None
+
+def navCross(origin, a, b):
+    return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (b[0] - origin[0])
+
+def navSamePoint(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 < NAV_QUERY_EPSILON * NAV_QUERY_EPSILON
+
+# Each portal is the edge shared by two faces of the corridor, ordered left to right as seen from the first face
+def createNavPortals(vertices, faces, centers, corridor, start, end):
+    portals = [(start, start)]
+
+    for face, nextFace in zip(corridor, corridor[1:]):
+        shared = [v for v in faces[face] if v in faces[nextFace]]
+
+        if len(shared) != 2:
+            return None
+
+        p, q = vertices[shared[0]], vertices[shared[1]]
+        portals.append((q, p) if navCross(centers[face], p, q) > 0 else (p, q))
+
+    portals.append((end, end))
+
+    return portals
+
+# Simple stupid funnel, the apex walks along the corridor and only bends around the corners that block the view
+def navFunnelPath(portals):
+    path = [portals[0][0]]
+    apex, left, right = portals[0][0], portals[0][0], portals[0][1]
+    apexIndex, leftIndex, rightIndex = 0, 0, 0
+    p = 1
+
+    while p < len(portals):
+        portalLeft, portalRight = portals[p]
+
+        if navCross(apex, right, portalRight) >= 0:
+            if navSamePoint(apex, right) or navCross(apex, left, portalRight) < 0:
+                right, rightIndex = portalRight, p
+            else:
+                if not navSamePoint(path[-1], left):
+                    path.append(left)
+
+                apex, apexIndex = left, leftIndex
+                left, right = apex, apex
+                leftIndex, rightIndex = apexIndex, apexIndex
+                p = apexIndex + 1
+                continue
+
+        if navCross(apex, left, portalLeft) <= 0:
+            if navSamePoint(apex, left) or navCross(apex, right, portalLeft) > 0:
+                left, leftIndex = portalLeft, p
+            else:
+                if not navSamePoint(path[-1], right):
+                    path.append(right)
+
+                apex, apexIndex = right, rightIndex
+                left, right = apex, apex
+                leftIndex, rightIndex = apexIndex, apexIndex
+                p = apexIndex + 1
+                continue
+
+        p += 1
+
+    if not navSamePoint(path[-1], portals[-1][0]) or len(path) == 1:
+        path.append(portals[-1][0])
+
+    return path
+
+def navCreatePath(vertices, faces, links, linkCosts, centers, start, end, startFace, endFace, heuristicWeight = NAV_QUERY_HEURISTIC_WEIGHT):
+    corridor = navSearchCorridor(links, linkCosts, centers, startFace, endFace, heuristicWeight)
+
+    if corridor is None:
+        return None
+
+    portals = createNavPortals(vertices, faces, centers, corridor, start, end)
+
+    if portals is None:
+        return None
+
+    return np.array(navFunnelPath(portals), dtype = np.float64).reshape(-1, 3)
+
+# Returns one array of path points per pair, or None where either end is off the mesh or the faces are not connected
+# Also returns the faces each end was located on, so islands and stray points can be told apart
+def navFindPaths(query, starts, ends, heuristicWeight = NAV_QUERY_HEURISTIC_WEIGHT):
+    starts = np.asarray(starts, dtype = np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype = np.float64).reshape(-1, 3)
+
+    startFaces = navLocatePoints(query, starts)
+    endFaces = navLocatePoints(query, ends)
+
+    located = (startFaces >= 0) & (endFaces >= 0)
+    connected = located.copy()
+    connected[located] = query.islands[startFaces[located]] == query.islands[endFaces[located]]
+
+    paths = [None] * len(starts)
+
+    if not np.any(connected):
+        return paths, startFaces, endFaces
+
+    vertices = [tuple(vertex) for vertex in query.vertices.tolist()]
+    faces = query.faces.tolist()
+    links = query.links.tolist()
+    linkCosts = np.linalg.norm(query.centers[np.maximum(query.links, 0)] - query.centers[:, None], axis = 2).tolist()
+    centers = [tuple(center) for center in query.centers.tolist()]
+    startList, endList = starts.tolist(), ends.tolist()
+
+    for p in np.flatnonzero(connected).tolist():
+        paths[p] = navCreatePath(vertices, faces, links, linkCosts, centers, tuple(startList[p]), tuple(endList[p]), int(startFaces[p]), int(endFaces[p]), heuristicWeight)
+
+    return paths, startFaces, endFaces
+
+def navFindPath(query, start, end, heuristicWeight = NAV_QUERY_HEURISTIC_WEIGHT):
+    paths, _, _ = navFindPaths(query, (start,), (end,), heuristicWeight)
+
+    return paths[0]
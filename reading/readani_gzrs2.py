@@ -36,8 +36,7 @@ def readVisData(file, version, state):
             visTicks = [0 for _ in range(visKeyCount)]
 
             for k in range(visKeyCount):
-                visValues[k] = readFloat(file)
-                visTicks[k] = readInt(file)
+                visValues[k], visTicks[k] = readLayout(file, 'aniVisKey')
 
             visValues = tuple(visValues)
             visTicks = tuple(visTicks)
@@ -147,8 +146,9 @@ def readAni(self, file, path, state):
             tmTicks = [0 for _ in range(tmKeyCount)]
 
             for k in range(tmKeyCount):
-                tmMats[k] = readTransform(file, state.convertUnits, swizzle = True)
-                tmTicks[k] = readInt(file)
+                key = readLayout(file, 'aniTmKey')
+                tmMats[k] = createTransform(key, state.convertUnits, swizzle = True)
+                tmTicks[k] = key[16]
 
             tmMats = tuple(tmMats)
             tmTicks = tuple(tmTicks)
@@ -199,8 +199,9 @@ def readAni(self, file, path, state):
                 posTicks = [0 for _ in range(posKeyCount)]
 
                 for k in range(posKeyCount):
-                    posVectors[k] = readCoordinate(file, state.convertUnits, False, swizzle = True)
-                    posTicks[k] = readInt(file)
+                    key = readLayout(file, 'aniPosKey')
+                    posVectors[k] = createCoordinate(key[0:3], state.convertUnits, False, swizzle = True)
+                    posTicks[k] = key[3]
 
                 posVectors = tuple(posVectors)
                 posTicks = tuple(posTicks)
@@ -225,24 +226,16 @@ def readAni(self, file, path, state):
 
                 if version > ANI_1002:
                     for k in range(rotKeyCount):
-                        x = readFloat(file)
-                        y = readFloat(file)
-                        z = readFloat(file)
-                        w = readFloat(file)
+                        x, y, z, w, rotTicks[k] = readLayout(file, 'aniRotKey')
 
                         # Swizzle and reverse
                         rotQuats[k] = Quaternion((-w, x, z, y))
-                        rotTicks[k] = readInt(file)
                 else:
                     for k in range(rotKeyCount):
-                        x = readFloat(file)
-                        y = readFloat(file)
-                        z = readFloat(file)
-                        angle = readFloat(file)
+                        x, y, z, angle, rotTicks[k] = readLayout(file, 'aniRotKey')
 
                         # Swizzle and reverse
                         rotQuats[k] = Quaternion((x, z, y), -angle)
-                        rotTicks[k] = readInt(file)
 
                 rotQuats = tuple(rotQuats)
                 rotTicks = tuple(rotTicks)
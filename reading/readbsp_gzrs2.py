@@ -18,6 +18,8 @@ from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
 from ..lib.lib_gzrs2 import *
 
+from .readrstree_gzrs2 import *
+
 def readBsp(self, file, path, state):
     file.seek(0, os.SEEK_END)
     fileSize = file.tell()
@@ -70,57 +72,48 @@ def readBsp(self, file, path, state):
     vertexOffset = 0
     p = 0
 
-    def openRSBsptreeNode():
-        nonlocal nodeCount, vertexOffset, p
+    vertexData = bytearray()
+    matIDs = []
+    convexIDs = []
+    drawFlags = []
+    vertexCounts = []
 
-        state.bspTreeBounds.append(readBounds(file, state.convertUnits))
+    def enterRSBsptreeNode(_):
+        state.bspTreeBounds.append(createBounds(readLayout(file, 'rsTreeNode'), state.convertUnits))
 
-        skipBytes(file, 4 * 4) # skip plane
+    def branchRSBsptreeNode(_, b):
+        return True if readBool(file) else None # positive, negative
 
-        if readBool(file): openRSBsptreeNode() # positive
-        if readBool(file): openRSBsptreeNode() # negative
+    def leaveRSBsptreeNode(_, children):
+        nonlocal nodeCount, vertexOffset, p
 
         for _ in range(readUInt(file)):
-            matID = readInt(file)
-            convexID = readUInt(file)
-            drawFlags = readUInt(file)
-            vertexCount = readUInt(file)
-
-            for v in range(vertexCount):
-                pos = readCoordinate(file, state.convertUnits, True)
-                nor = readDirection(file, True)
-                uv1 = readUV2(file)
-                uv2 = readUV2(file) # lightmap uvs are always garbled for vanilla maps, so we get them from the .lm file instead
+            vertexStart = len(vertexData)
+            matID, convexID, polygonFlags, vertexCount = readRs2TreePolygon(file, vertexData)
 
-                state.bspTreeVerts.append(Rs2TreeVertex(pos, nor, uv1, uv2))
-
-                if state.logBspVerts:
-                    print(f"===== Vertex { v }   ===========================")
-                    print("Position:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*pos))
-                    print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*nor))
-                    print("UV1:                ({:>6.03f}, {:>6.03f})".format(*uv1))
-                    print("UV2:                ({:>6.03f}, {:>6.03f})".format(*uv2))
-                    print()
-
-            skipBytes(file, 4 * 3) # skip face normal
+            if state.logBspVerts:
+                printRs2TreeVertices(vertexData[vertexStart:], state.convertUnits)
 
             if state.rsCPolygonCount is not None:
                 if convexID < 0 or convexID >= state.rsCPolygonCount:
                     self.report({ 'ERROR' }, f"GZRS2: Convex ID out of bounds! Please submit to Krunk#6051 for testing!")
-                    return { 'CANCELLED' }
+                    return TREE_WALK_ABORT
 
             if not (0 <= matID < len(state.xmlRsMats)): # TODO: Perhaps we should wait and assign the error material instead...
                 self.report({ 'WARNING' }, f"GZRS2: Material ID out of bounds, setting to 0 and continuing. { matID }, { len(state.xmlRsMats) }")
                 matID = 0
 
-            state.bspTreePolygons.append(Rs2TreePolygon(matID, convexID, drawFlags, vertexCount, vertexOffset))
+            matIDs.append(matID)
+            convexIDs.append(convexID)
+            drawFlags.append(polygonFlags)
+            vertexCounts.append(vertexCount)
             vertexOffset += vertexCount
 
             if state.logBspPolygons:
                 print(f"===== Polygon { p }  =============================")
                 print(f"Material ID:        { matID }")
                 print(f"Convex ID:          { convexID }")
-                print(f"Draw Flags:         { drawFlags }")
+                print(f"Draw Flags:         { polygonFlags }")
                 print(f"Vertex Count:       { vertexCount }")
                 print(f"Vertex Offset:      { vertexOffset }")
                 print()
@@ -128,16 +121,19 @@ def readBsp(self, file, path, state):
             p += 1
         nodeCount += 1
 
-    openRSBsptreeNode()
+    if walkTree(None, enterRSBsptreeNode, branchRSBsptreeNode, leaveRSBsptreeNode) is TREE_WALK_ABORT:
+        return { 'CANCELLED' }
+
+    state.bspTreeBuffers = createRs2TreeBuffers(vertexData, matIDs, convexIDs, drawFlags, vertexCounts, state.convertUnits)
 
     if state.bspNodeCount != nodeCount:
         self.report({ 'ERROR' }, f"GZRS2: BSP node count did not match nodes traversed! { state.bspNodeCount }, { nodeCount }")
 
-    if state.bspPolygonCount != len(state.bspTreePolygons):
-        self.report({ 'ERROR' }, f"GZRS2: BSP polygon count did not match polygons written! { state.bspPolygonCount }, { len(state.bspTreePolygons) }")
+    if state.bspPolygonCount != len(state.bspTreeBuffers.matIDs):
+        self.report({ 'ERROR' }, f"GZRS2: BSP polygon count did not match polygons written! { state.bspPolygonCount }, { len(state.bspTreeBuffers.matIDs) }")
 
-    if state.bspVertexCount != len(state.bspTreeVerts):
-        self.report({ 'ERROR' }, f"GZRS2: BSP vertex count did not match vertices written! { state.bspVertexCount }, { len(state.bspTreeVerts) }")
+    if state.bspVertexCount != len(state.bspTreeBuffers.positions):
+        self.report({ 'ERROR' }, f"GZRS2: BSP vertex count did not match vertices written! { state.bspVertexCount }, { len(state.bspTreeBuffers.positions) }")
 
     # TODO: Improve performance of convex id matching
     # TODO: Add convex id matching for bsp mesh as well
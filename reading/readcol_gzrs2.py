@@ -34,9 +34,26 @@
 
 import os, io
 
+import numpy as np
+
 from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
+from ..lib.lib_gzrs2 import *
+
+COL2_TRIANGLE_DTYPE = np.dtype([('vertices', '<f4', (3, 3)), ('attributes', '<u4'), ('matID', '<u4')])
+
+# Triangles are gathered raw from every leaf and decoded all at once
+# Normals are rebuilt from the winding, the cross product is evaluated in single precision like the Vector math it replaces
+def decodeCol2Triangles(triangleData, convertUnits):
+    triangles = np.frombuffer(triangleData, dtype = COL2_TRIANGLE_DTYPE)
+    vertices = transformCoordinateNdarray(triangles['vertices'].reshape(-1, 3), convertUnits, False).reshape(-1, 3, 3)
+
+    sideA = vertices[:, 1] - vertices[:, 0]
+    sideC = vertices[:, 2] - vertices[:, 0]
+    normals = normalizeNdarray(np.cross(sideC, sideA).astype(np.float64)).astype(np.float32)
+
+    return vertices, normals, triangles['attributes'], triangles['matID']
 
 def readCol(self, file, path, state):
     file.seek(0, os.SEEK_END)
@@ -65,59 +82,79 @@ def readCol(self, file, path, state):
     if version == COL1_VERSION:
         colNodeCount = readUInt(file)
         colTriangleCount = readUInt(file)
-        n = 0
 
         if state.logColHeaders:
             print(f"Node Count:         { colNodeCount }")
             print(f"Total Triangles:    { colTriangleCount }")
             print()
 
-        def openCol1Node():
-            nonlocal n, trianglesRead
+        planeData = []
+        solids = []
+        positives = []
+        negatives = []
+        triangleStarts = []
+        triangleCounts = []
+        triangleData = bytearray()
+        leaveOrder = []
+
+        # Nodes are numbered in file order, so each child index is simply the next node to be entered
+        def enterCol1Node(_):
+            node = readLayout(file, 'col1Node')
+            planeData.append(node[0:4])
+            solids.append(node[4])
+            positives.append(-1)
+            negatives.append(-1)
+            triangleStarts.append(0)
+            triangleCounts.append(0)
 
-            plane = readPlane(file, state.convertUnits, True)
-            solid = readBool(file)
+            return len(solids) - 1
 
-            positive = None
-            negative = None
+        def branchCol1Node(n, b):
+            if not readBool(file):
+                return None
 
-            if readBool(file): positive = openCol1Node() # positive
-            if readBool(file): negative = openCol1Node() # negative
+            if b == 0:  positives[n] = len(solids) # positive
+            else:       negatives[n] = len(solids) # negative
+
+            return n
+
+        def leaveCol1Node(n, children):
+            nonlocal trianglesRead
 
             triangleCount = readUInt(file)
+            triangleStarts[n] = trianglesRead
+            triangleCounts[n] = triangleCount
             trianglesRead += triangleCount
 
-            if state.logColNodes:
-                print(f"===== Node { n } =============================")
-                print("Plane:              ({:>6.03f}, {:>6.03f}, {:>6.03f}, {:>6.03f})".format(*plane))
-                print(f"Solid:              { solid }")
-                print(f"Triangle Count:     { triangleCount }")
-                print()
+            triangleData.extend(readBytes(file, triangleCount * 4 * 12))
+            leaveOrder.append(n)
 
-            triangles = []
+        walkTree(None, enterCol1Node, branchCol1Node, leaveCol1Node)
 
-            for t in range(triangleCount):
-                vertices = readCoordinateArray(file, 3, state.convertUnits, True)
-                normal = readDirection(file, True)
-                triangle = ColTriangle(vertices, normal)
-                triangles.append(triangle)
+        state.col1Tree = createCol1Tree(planeData, solids, positives, negatives, triangleStarts, triangleCounts, triangleData, state.convertUnits)
+        state.colTrisHull, state.colTrisSolid = createCol1TreeTriangles(state.col1Tree)
 
-                if not solid:   state.colTrisHull.append(triangle)
-                else:           state.colTrisSolid.append(triangle)
+        if state.logColNodes or state.logColTris:
+            for l, node in enumerate(leaveOrder):
+                start = triangleStarts[node]
 
-                if state.logColTris:
-                    print(f"===== Triangle { t } ===========================")
-                    print("Vertices:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[0]))
-                    print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[1]))
-                    print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[2]))
-                    print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*normal))
+                if state.logColNodes:
+                    print(f"===== Node { l } =============================")
+                    print("Plane:              ({:>6.03f}, {:>6.03f}, {:>6.03f}, {:>6.03f})".format(*state.col1Tree.planes[node]))
+                    print(f"Solid:              { solids[node] }")
+                    print(f"Triangle Count:     { triangleCounts[node] }")
                     print()
 
-            n += 1
-
-            return Col1TreeNode(plane, solid, positive, negative, tuple(triangles))
+                if state.logColTris:
+                    for t in range(triangleCounts[node]):
+                        vertices = state.col1Tree.vertices[start + t]
 
-        state.col1Root = openCol1Node()
+                        print(f"===== Triangle { t } ===========================")
+                        print("Vertices:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[0]))
+                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[1]))
+                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[2]))
+                        print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*state.col1Tree.normals[start + t]))
+                        print()
     else:
         colTriangleCount = readUInt(file)
         colNodeCount = readUInt(file)
@@ -148,34 +185,29 @@ def readCol(self, file, path, state):
                     print(f"Triangle Count:     { triangleCount }")
                     print()
 
-                for t in range(triangleCount):
-                    vertices = readCoordinateArray(file, 3, state.convertUnits, False)
-
-                    sideA = vertices[1] - vertices[0]
-                    sideC = vertices[2] - vertices[0]
-
-                    normal = sideC.cross(sideA)
-                    normal.normalize()
+                triangleBlock = readBytes(file, triangleCount * COL2_TRIANGLE_DTYPE.itemsize)
+                triangleData.extend(triangleBlock)
 
-                    if state.logColTris:
-                        attributes = readUInt(file)
-                        matID = readUInt(file)
+                if state.logColTris:
+                    vertices, _, attributes, matIDs = decodeCol2Triangles(triangleBlock, state.convertUnits)
 
+                    for t in range(triangleCount):
                         print(f"===== Triangle { t } ===========================")
-                        print("Vertices:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[0]))
-                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[1]))
-                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[2]))
-                        print(f"Attributes:         { attributes }")
-                        print(f"Material ID:        { matID }")
+                        print("Vertices:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[t][0]))
+                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[t][1]))
+                        print("                    ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*vertices[t][2]))
+                        print(f"Attributes:         { attributes[t] }")
+                        print(f"Material ID:        { matIDs[t] }")
                         print()
-                    else:
-                        skipBytes(file, 4 * 2) # skip attributes and material ID
-
-                    state.colTrisHull.append(ColTriangle(vertices, normal))
             n += 1
 
+        triangleData = bytearray()
+
         openCol2Node()
 
+        vertices, normals, _, _ = decodeCol2Triangles(triangleData, state.convertUnits)
+        state.colTrisHull = unpackColTriangles(vertices, normals)
+
     if trianglesRead != colTriangleCount:
         self.report({ 'ERROR' }, f"GZRS2: The number of Col triangles read did not match the recorded count! { trianglesRead }, { colTriangleCount }")
 
@@ -107,8 +107,8 @@ def readEluRS2Materials(self, path, file, version, matCount, state):
     eluMats = []
 
     for m in range(matCount):
-        matID = readUInt(file)
-        subMatID = readInt(file)
+        material = readLayout(file, 'eluMaterial')
+        matID, subMatID = material[0:2]
 
         if state.logEluMats:
             print(f"===== Material { m } =====")
@@ -116,10 +116,8 @@ def readEluRS2Materials(self, path, file, version, matCount, state):
             print(f"Sub Mat ID:         { subMatID }")
             print()
 
-        ambient = readVec4(file)
-        diffuse = readVec4(file)
-        specular = readVec4(file)
-        exponent = readFloat(file)
+        ambient, diffuse, specular = material[2:6], material[6:10], material[10:14]
+        exponent = material[14]
 
         if version <= ELU_5002:
             if exponent == 20.0:
@@ -132,7 +130,7 @@ def readEluRS2Materials(self, path, file, version, matCount, state):
             print(f"Exponent:           { exponent }")
             print()
 
-        subMatCount = readUInt(file)
+        subMatCount = material[15]
 
         if version == ELU_0:
             texpath = readPath(file, readUShort(file))
@@ -10,6 +10,8 @@
 
 import math, io
 
+import numpy as np
+
 from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
@@ -79,23 +81,17 @@ def readLm(self, file, path, state):
                 print(f"Dimensions:         { width } x { height }")
                 print()
 
-            state.lmImages.append(LmImage(width, tuple(readUChar(file) / 255.0 for _ in range(width * height * 3))))
+            # The channels stay in file order as BGR and the rows stay bottom-up
+            rowSize = getBMPRowSize(width)
+            pixels = np.frombuffer(readBytes(file, rowSize * height), dtype = np.uint8).reshape(height, rowSize)[:, :width * 3]
+
+            state.lmImages.append(LmImage(width, np.divide(pixels, np.float32(255.0), dtype = np.float32).ravel()))
         elif type == 'DD':
             skipBytes(file, 2)
-            skipBytes(file, 4) # skip dds size
-            ddsFlags = readUInt(file)
-            width = readUInt(file)
-            height = readUInt(file)
-            skipBytes(file, 4 + 4) # skip pitch/linearsize and depth
-            mipCount = readUInt(file)
-            for _ in range(11):
-                skipBytes(file, 4)
-
-            skipBytes(file, 4) # skip ddspf size
-            ddspfFlags = readUInt(file)
-            ddspfFourCC = decodeBytes(file, 4)
-            for _ in range(5): # skip rgb bit count and masks
-                skipBytes(file, 4)
+
+            # Skips the dds size, pitch/linearsize, depth, reserved words, ddspf size, rgb bit count and masks
+            ddsFlags, width, height, mipCount, ddspfFlags, ddspfFourCC, ddsCaps = readLayout(file, 'ddsHeader')
+            ddspfFourCC = ddspfFourCC.decode('utf-8')
 
             if ddspfFlags & (1 << DDPF_FOURCC):
                 self.report({ 'ERROR' }, f"GZRS2: Lm DDS unsupported pixel format! Currently, FourCC is the only supported format. { ddspfFlags }")
@@ -105,10 +101,6 @@ def readLm(self, file, path, state):
                 self.report({ 'ERROR' }, f"GZRS2: Lm DDS unsupported compression type! Currently, DXT1 is the only supported type. { ddspfFourCC }")
                 return { 'CANCELLED' }
 
-            ddsCaps = readUInt(file)
-            for _ in range(4):
-                skipBytes(file, 4)
-
             if state.logLmImages:
                 print(f"===== DDS { i } ==============================")
                 print(f"Byte Count:         { byteCount }")
@@ -120,58 +112,13 @@ def readLm(self, file, path, state):
                 print(f"Caps:               { ddsCaps }")
                 print()
 
-            pixelCount = width * height
-            blockLength = 4
-            blockStride = blockLength ** 2
-            blockCount = pixelCount // blockStride
-            blockSpan = int(math.sqrt(blockCount))
-
-            imageData = readBytes(file, pixelCount // 2)
-            imageShorts = memoryview(imageData).cast('H')
-            imageInts = memoryview(imageData).cast('I')
-
-            pixels = [0 for _ in range(width * height * 3)]
-
-            for b in range(blockCount):
-                p0 = rgb565ToVector(imageShorts[b * 4 + 0])
-                p1 = rgb565ToVector(imageShorts[b * 4 + 1])
-                indices = imageInts[b * 2 + 1]
-
-                if p0 > p1:
-                    p2 = (2.0 * p0 + p1) / 3.0
-                    p3 = (2.0 * p1 + p0) / 3.0
-                else:
-                    p2 = (p0 + p1) / 2.0
-                    p3 = Vector((0, 0, 0))
-
-                bx = b % blockSpan
-                by = b // blockSpan
-
-                for p in range(blockStride):
-                    s = p * 2
-
-                    index = (indices & (3 << s)) >> s
-
-                    if index == 0: pixel = p0
-                    elif index == 1: pixel = p1
-                    elif index == 2: pixel = p2
-                    elif index == 3: pixel = p3
-
-                    px = p % blockLength
-                    py = p // blockLength
-
-                    f = bx * blockLength
-                    f += by * blockLength * width
-                    f += px + py * width
-
-                    pixels[f * 3 + 2] = pixel.x
-                    pixels[f * 3 + 1] = pixel.y
-                    pixels[f * 3 + 0] = pixel.z
+            pixels = decodeDXT1(readBytes(file, width * height // 2), width, height)
 
-            imageShorts.release()
-            imageInts.release()
+            # Only the full resolution level is used, the rest of the chain is skipped
+            if ddsFlags & DDSD_MIPMAPCOUNT and mipCount > 1:
+                skipBytes(file, sum(max(1, (width >> m) // 4) * max(1, (height >> m) // 4) * 8 for m in range(1, mipCount)))
 
-            state.lmImages.append(LmImage(width, tuple(pixels)))
+            state.lmImages.append(LmImage(width, pixels[:, :, ::-1].ravel()))
         else:
             self.report({ 'ERROR' }, f"GZRS2: Lm data type is not supported yet! Lightmap will not load properly! Please submit to Krunk#6051 for testing! { type }")
             return { 'CANCELLED' }
@@ -187,7 +134,7 @@ def readLm(self, file, path, state):
         sortedIDs[state.lmPolygonOrder[p]] = lightmapIDs[p]
 
     state.lmLightmapIDs = tuple(sortedIDs)
-    state.lmUVs = readUV2Array(file, state.rsOVertexCount)
+    state.lmUVs = readUV2Ndarray(file, state.rsOVertexCount)
 
     if state.logLmHeaders or state.logLmImages:
         bytesRemaining = fileSize - file.tell()
@@ -27,10 +27,74 @@
 
 import os, io, math
 
+import numpy as np
+
 from ..constants_gzrs2 import *
 from ..classes_gzrs2 import *
 from ..io_gzrs2 import *
 
+from .readrstree_gzrs2 import *
+
+# Header-only pass over a GunZ 1 .rs, returns None for anything else
+# Readers can seek straight to the recorded offsets instead of decoding every preceding section
+def scanRs(file):
+    file.seek(0, os.SEEK_END)
+    fileSize = file.tell()
+    file.seek(0, os.SEEK_SET)
+
+    id = readUInt(file)
+    version = readUInt(file)
+
+    if id != RS2_ID or version != RS2_VERSION:
+        return None
+
+    index = RsSectionIndex(id, version, fileSize)
+
+    index.matCount = readInt(file)
+    index.matOffset = file.tell()
+
+    for _ in range(index.matCount):
+        skipPackedString(file, RS_PATH_LENGTH)
+
+    index.convexPolygonCount = readUInt(file)
+    index.convexVertexCount = readUInt(file)
+    index.convexOffset = file.tell()
+
+    for _ in range(index.convexPolygonCount):
+        skipBytes(file, 4 + 4 + 4 * 4 + 4) # skip material id, draw flags, plane and area data
+        skipBytes(file, 2 * readUInt(file) * 3 * 4) # skip vertex positions and normals
+
+    index.bspCountsOffset = file.tell()
+    index.bspNodeCount, index.bspPolygonCount, index.bspVertexCount, index.bspIndexCount = readUIntArray(file, 4)
+
+    index.octreeCountsOffset = file.tell()
+    index.octreeNodeCount, index.octreePolygonCount, index.octreeVertexCount, index.octreeIndexCount = readUIntArray(file, 4)
+
+    index.octreeOffset = file.tell()
+
+    return index
+
+def logRsSectionIndex(path, index):
+    print("===================  Scan Rs  ===================")
+    print()
+    print(f"Path:               { path }")
+    print(f"ID:                 { hex(index.id) }")
+    print(f"Version:            { hex(index.version) }")
+    print(f"File Size:          { index.fileSize }")
+    print()
+    print(f"Materials:          { index.matCount } @ { index.matOffset }")
+    print(f"Convex Polygons:    { index.convexPolygonCount } @ { index.convexOffset }")
+    print(f"Convex Vertices:    { index.convexVertexCount }")
+    print(f"Bsptree Nodes:      { index.bspNodeCount } @ { index.bspCountsOffset }")
+    print(f"Bsptree Polygons:   { index.bspPolygonCount }")
+    print(f"Bsptree Vertices:   { index.bspVertexCount }")
+    print(f"Bsptree Indices:    { index.bspIndexCount }")
+    print(f"Octree Nodes:       { index.octreeNodeCount } @ { index.octreeOffset }")
+    print(f"Octree Polygons:    { index.octreePolygonCount }")
+    print(f"Octree Vertices:    { index.octreeVertexCount }")
+    print(f"Octree Indices:     { index.octreeIndexCount }")
+    print()
+
 def readRs(self, file, path, state):
     file.seek(0, os.SEEK_END)
     fileSize = file.tell()
@@ -60,9 +124,7 @@ def readRs(self, file, path, state):
             self.report({ 'WARNING' }, f"GZRS2: RS material count did not match the XML parse! Corruption may occur! { rsMatCount }, { len(state.xmlRsMats) }")
 
         for _ in range(rsMatCount): # skip packed material strings
-            for __ in range(RS_PATH_LENGTH):
-                if file.read(1) == b'\x00':
-                    break
+            skipPackedString(file, RS_PATH_LENGTH)
 
         state.rsCPolygonCount = readUInt(file)
         state.rsCVertexCount = readUInt(file)
@@ -72,52 +134,48 @@ def readRs(self, file, path, state):
             print(f"Convex Vertices:    { state.rsCVertexCount }")
             print()
 
-        for p in range(state.rsCPolygonCount):
-            skipBytes(file, 4 + 4 + 4 * 4 + 4) # skip material id, draw flags, plane and area data
-            skipBytes(file, 2 * readUInt(file) * 3 * 4) # skip vertex positions and normals
-
-        # TODO: Improve performance of convex id matching
-        '''
+        positionData = bytearray()
+        normalData = bytearray()
+        matIDs = []
+        drawFlags = []
+        vertexCounts = []
         vertexOffset = 0
 
         for p in range(state.rsCPolygonCount):
-            matID = readInt(file)
-            drawFlags = readUInt(file)
-            skipBytes(file, 4 * 4 + 4) # skip plane and area data
-            vertexCount = readUInt(file)
-
-            positions = readCoordinateArray(file, vertexCount, state.convertUnits, True)
-            normals = readDirectionArray(file, vertexCount, True)
-
-            for v in range(vertexCount):
-                pos = positions[v]
-                nor = normals[v]
+            vertexStart = len(positionData)
+            matID, polygonFlags, vertexCount = readRsConvexPolygon(file, positionData, normalData)
 
-                state.rsConvexVerts.append(Rs2ConvexVertex(pos, nor, (0, 0), (0, 0), -1))
+            if state.logRsVerts:
+                positions = transformCoordinateNdarray(np.frombuffer(positionData[vertexStart:], dtype = '<f4').reshape(-1, 3), state.convertUnits, True)
+                normals = transformDirectionNdarray(np.frombuffer(normalData[vertexStart:], dtype = '<f4').reshape(-1, 3), True)
 
-                if state.logRsVerts:
+                for v, (pos, nor) in enumerate(zip(positions, normals)):
                     print(f"===== Vertex { v }   ===========================")
                     print("Position:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*pos))
                     print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*nor))
                     print()
 
-            state.rsConvexPolygons.append(RsConvexPolygon(matID, drawFlags, vertexCount, vertexOffset))
+            matIDs.append(matID)
+            drawFlags.append(polygonFlags)
+            vertexCounts.append(vertexCount)
             vertexOffset += vertexCount
 
             if state.logRsPolygons:
                 print(f"===== Polygon { p }  =============================")
                 print(f"Material ID:        { matID }")
-                print(f"Draw Flags:         { drawFlags }")
+                print(f"Draw Flags:         { polygonFlags }")
                 print(f"Vertex Count:       { vertexCount }")
                 print(f"Vertex Offset:      { vertexOffset }")
                 print()
 
-        if state.rsCPolygonCount != len(state.rsConvexPolygons):
-            self.report({ 'ERROR' }, f"GZRS2: RS convex polygon count did not match polygons written! { state.rsCPolygonCount }, { len(state.rsConvexPolygons) }")
+        state.rsConvexBuffers = createRsConvexBuffers(positionData, normalData, matIDs, drawFlags, vertexCounts, state.convertUnits)
+
+        if state.rsCPolygonCount != len(state.rsConvexBuffers.matIDs):
+            self.report({ 'ERROR' }, f"GZRS2: RS convex polygon count did not match polygons written! { state.rsCPolygonCount }, { len(state.rsConvexBuffers.matIDs) }")
+
+        if state.rsCVertexCount != len(state.rsConvexBuffers.positions):
+            self.report({ 'ERROR' }, f"GZRS2: RS convex vertex count did not match vertices written! { state.rsCVertexCount }, { len(state.rsConvexBuffers.positions) }")
 
-        if state.rsCVertexCount != len(state.rsConvexVerts):
-            self.report({ 'ERROR' }, f"GZRS2: RS convex vertex count did not match vertices written! { state.rsCVertexCount }, { len(state.rsConvexVerts) }")
-        '''
         state.rsBNodeCount = readUInt(file)
         state.rsBPolygonCount = readUInt(file)
         state.rsBVertexCount = readUInt(file)
@@ -137,62 +195,51 @@ def readRs(self, file, path, state):
         nodeCount = 0
         vertexOffset = 0
         p = 0
+        warnConvexMaterial = False
 
-        def openRS2OctreeNode():
-            nonlocal nodeCount, vertexOffset, p
+        vertexData = bytearray()
+        matIDs = []
+        convexIDs = []
+        drawFlags = []
+        vertexCounts = []
 
-            state.rsOctreeBounds.append(readBounds(file, state.convertUnits))
+        def enterRS2OctreeNode(_):
+            state.rsOctreeBounds.append(createBounds(readLayout(file, 'rsTreeNode'), state.convertUnits))
 
-            skipBytes(file, 4 * 4) # skip plane
+        def branchRS2OctreeNode(_, b):
+            return True if readBool(file) else None # positive, negative
 
-            if readBool(file): openRS2OctreeNode() # positive
-            if readBool(file): openRS2OctreeNode() # negative
+        def leaveRS2OctreeNode(_, children):
+            nonlocal nodeCount, vertexOffset, p, warnConvexMaterial
 
             for _ in range(readUInt(file)):
-                matID = readInt(file)
-                convexID = readUInt(file)
-                drawFlags = readUInt(file)
-                vertexCount = readUInt(file)
-
-                for v in range(vertexCount):
-                    pos = readCoordinate(file, state.convertUnits, True)
-                    nor = readDirection(file, True)
-                    uv1 = readUV2(file)
-                    uv2 = readUV2(file) # lightmap uvs are always garbled for vanilla maps, so we get them from the .lm file instead
-
-                    state.rsOctreeVerts.append(Rs2TreeVertex(pos, nor, uv1, uv2))
-
-                    if state.logRsVerts:
-                        print(f"===== Vertex { v }   ===========================")
-                        print("Position:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*pos))
-                        print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*nor))
-                        print("UV1:                ({:>6.03f}, {:>6.03f})".format(*uv1))
-                        print("UV2:                ({:>6.03f}, {:>6.03f})".format(*uv2))
-                        print()
+                vertexStart = len(vertexData)
+                matID, convexID, polygonFlags, vertexCount = readRs2TreePolygon(file, vertexData)
 
-                skipBytes(file, 4 * 3) # skip face normal
+                if state.logRsVerts:
+                    printRs2TreeVertices(vertexData[vertexStart:], state.convertUnits)
 
                 if convexID < 0 or convexID >= state.rsCPolygonCount:
                     self.report({ 'ERROR' }, f"GZRS2: Convex ID out of bounds! Please submit to Krunk#6051 for testing!")
-                    return { 'CANCELLED' }
-                # TODO: Improve performance of convex id matching
-                '''
-                elif state.rsConvexPolygons[convexID].matID != matID:
-                    self.report({ 'WARNING' }, f"GZRS2: Octree material ID did not match convex material ID! Please submit to Krunk#6051 for testing!")
-                '''
+                    return TREE_WALK_ABORT
+                elif state.rsConvexBuffers.matIDs[convexID] != matID:
+                    warnConvexMaterial = True
 
                 if not (0 <= matID < len(state.xmlRsMats)): # TODO: Perhaps we should wait and assign the error material instead...
                     self.report({ 'WARNING' }, f"GZRS2: Material ID out of bounds, setting to 0 and continuing. { matID }, { len(state.xmlRsMats) }")
                     matID = 0
 
-                state.rsOctreePolygons.append(Rs2TreePolygon(matID, convexID, drawFlags, vertexCount, vertexOffset))
+                matIDs.append(matID)
+                convexIDs.append(convexID)
+                drawFlags.append(polygonFlags)
+                vertexCounts.append(vertexCount)
                 vertexOffset += vertexCount
 
                 if state.logRsPolygons:
                     print(f"===== Polygon { p }  =============================")
                     print(f"Material ID:        { matID }")
                     print(f"Convex ID:          { convexID }")
-                    print(f"Draw Flags:         { drawFlags }")
+                    print(f"Draw Flags:         { polygonFlags }")
                     print(f"Vertex Count:       { vertexCount }")
                     print(f"Vertex Offset:      { vertexOffset }")
                     print()
@@ -200,66 +247,53 @@ def readRs(self, file, path, state):
                 p += 1
             nodeCount += 1
 
-        openRS2OctreeNode()
-
-        if state.rsONodeCount != nodeCount:
-            self.report({ 'ERROR' }, f"GZRS2: RS octree node count did not match nodes traversed! { state.rsONodeCount }, { nodeCount }")
-
-        if state.rsOPolygonCount != len(state.rsOctreePolygons):
-            self.report({ 'ERROR' }, f"GZRS2: RS octree polygon count did not match polygons written! { state.rsOPolygonCount }, { len(state.rsOctreePolygons) }")
-
-        if state.rsOVertexCount != len(state.rsOctreeVerts):
-            self.report({ 'ERROR' }, f"GZRS2: RS octree vertex count did not match vertices written! { state.rsOVertexCount }, { len(state.rsOctreeVerts) }")
-
-        # TODO: Improve performance of convex id matching
-        '''
-        # The octree polygons hold the UV data, so we need to infer them
-        # This will fail if any polygons are degenerate or just too small
-        warnDistanceThreshold = False
-        warnNormalThreshold = False
+        if walkTree(None, enterRS2OctreeNode, branchRS2OctreeNode, leaveRS2OctreeNode) is TREE_WALK_ABORT:
+            return { 'CANCELLED' }
 
-        for p1, convexPolygon in enumerate(state.rsConvexPolygons):
-            for v1 in range(convexPolygon.vertexOffset, convexPolygon.vertexOffset + convexPolygon.vertexCount):
-                convexVertex = state.rsConvexVerts[v1]
-                convexNormal = state.rsConvexVerts[v1].nor
-                octreeMatches = []
+        if warnConvexMaterial:
+            self.report({ 'WARNING' }, f"GZRS2: Octree material ID did not match convex material ID! Please submit to Krunk#6051 for testing!")
 
-                for octreePolygon in state.rsOctreePolygons:
-                    if octreePolygon.convexID != p1:
-                        continue
+        state.rsOctreeBuffers = createRs2TreeBuffers(vertexData, matIDs, convexIDs, drawFlags, vertexCounts, state.convertUnits)
 
-                    for v2 in range(octreePolygon.vertexOffset, octreePolygon.vertexOffset + octreePolygon.vertexCount):
-                        octreeMatches.append((v2, (convexVertex.pos - state.rsOctreeVerts[v2].pos).length_squared))
+        if state.rsONodeCount != nodeCount:
+            self.report({ 'ERROR' }, f"GZRS2: RS octree node count did not match nodes traversed! { state.rsONodeCount }, { nodeCount }")
 
-                if len(octreeMatches) == 0:
-                    self.report({ 'ERROR' }, f"GZRS2: RS vertex match failed! Please submit to Krunk#6051 for testing!")
-                    return { 'CANCELLED' }
+        if state.rsOPolygonCount != len(state.rsOctreeBuffers.matIDs):
+            self.report({ 'ERROR' }, f"GZRS2: RS octree polygon count did not match polygons written! { state.rsOPolygonCount }, { len(state.rsOctreeBuffers.matIDs) }")
 
-                octreeMatch = sorted(octreeMatches, key = lambda x : x[1])[0]
-                octreeVertex = state.rsOctreeVerts[octreeMatch[0]]
-                octreeNormal = octreeVertex.nor
+        if state.rsOVertexCount != len(state.rsOctreeBuffers.positions):
+            self.report({ 'ERROR' }, f"GZRS2: RS octree vertex count did not match vertices written! { state.rsOVertexCount }, { len(state.rsOctreeBuffers.positions) }")
 
-                if octreeMatch[1] > RS_COORD_THRESHOLD_SQUARED:
-                    warnDistanceThreshold = True
+        # The octree polygons hold the UV data, so we need to infer them, but only the convex mesh uses them
+        # This will fail if any polygons are degenerate or just too small, the rest of the map still imports without it
+        if state.doConvex:
+            result = matchRsConvexVertices(state.rsConvexBuffers, state.rsOctreeBuffers)
 
-                if not vec3IsClose(convexNormal, octreeNormal, RS_COORD_THRESHOLD):
-                    warnNormalThreshold = True
+            if result is None:
+                self.report({ 'WARNING' }, f"GZRS2: RS vertex match failed, skipping the convex mesh! Please submit to Krunk#6051 for testing!")
+                state.rsConvexBuffers = RsTreeBuffers()
+            else:
+                octreeIDs, distances = result
+                convexNormals = state.rsConvexBuffers.normals
+                octreeNormals = state.rsOctreeBuffers.normals[octreeIDs]
 
-                convexVertex.uv1 = octreeVertex.uv1
-                convexVertex.uv2 = octreeVertex.uv2
-                convexVertex.oid = octreeMatch[0]
+                if np.any(distances > RS_COORD_THRESHOLD_SQUARED):
+                    self.report({ 'WARNING' }, f"GZRS2: RS vertex match indexed a convex vertex beyond the threshold! Please submit to Krunk#6051 for testing!")
 
-        if warnDistanceThreshold:
-            self.report({ 'WARNING' }, f"GZRS2: RS vertex match indexed a convex vertex beyond the threshold! Please submit to Krunk#6051 for testing!")
+                if np.any(np.abs(convexNormals - octreeNormals) > RS_COORD_THRESHOLD):
+                    self.report({ 'WARNING' }, f"GZRS2: RS vertex match indexed a convex vertex with a normal outside the acceptable tolerance! Please submit to Krunk#6051 for testing!")
 
-        if warnNormalThreshold:
-            self.report({ 'WARNING' }, f"GZRS2: RS vertex match indexed a convex vertex with a normal outside the acceptable tolerance! Please submit to Krunk#6051 for testing!")
-        '''
+                state.rsConvexBuffers.uv1s = state.rsOctreeBuffers.uv1s[octreeIDs]
+                state.rsConvexBuffers.uv2s = state.rsOctreeBuffers.uv2s[octreeIDs]
+                state.rsConvexOctreeIDs = octreeIDs
     elif id == RS3_ID and version >= RS3_VERSION1:
         if version not in RS_SUPPORTED_VERSIONS:
             self.report({ 'ERROR' }, f"GZRS2: RS3 version is not supported yet! Model will not load properly! Please submit to Krunk#6051 for testing! { path }, { hex(version) }")
             return { 'CANCELLED' }
 
+        rs3TreeVerts = []
+        rs3TreePolygons = []
+
         for p in range(readUInt(file)):
             name = readString(file, readInt(file))
             vertices = tuple(readVec3(file) for _ in range(readUInt(file)))
@@ -308,7 +342,7 @@ def readRs(self, file, path, state):
                     uv1 = readUV2(file)
                     uv2 = readUV2(file)
 
-                    state.rsOctreeVerts.append(Rs3TreeVertex(pos, nor, col, uv1, uv2))
+                    rs3TreeVerts.append(Rs3TreeVertex(pos, nor, col, uv1, uv2))
 
                     if state.logRsVerts:
                         print(f"===== Vertex { v }   ===========================")
@@ -328,14 +362,16 @@ def readRs(self, file, path, state):
                     treeVertexCount = readInt(file)
                     p = 0
 
-                    def openRS3OctreeNode():
-                        nonlocal vertexOffset, p
-
+                    def enterRS3OctreeNode(_):
                         state.rsOctreeBounds.append(readBounds(file, state.convertUnits))
 
-                        if not readBool(file):
-                            openRS3OctreeNode() # positive
-                            openRS3OctreeNode() # negative
+                        return readBool(file) # leaf
+
+                    def branchRS3OctreeNode(leaf, b):
+                        return None if leaf else True # positive, negative
+
+                    def leaveRS3OctreeNode(_, children):
+                        nonlocal vertexOffset, p
 
                         for _ in range(readUInt(file)):
                             matID = readInt(file)
@@ -347,7 +383,7 @@ def readRs(self, file, path, state):
                             vertexCount = readInt(file)
                             skipBytes(file, 4) # skip vertex offset, we determine our own TODO: verify?
 
-                            state.rsOctreePolygons.append(Rs3TreePolygon(matID, drawFlags, vertexCount, vertexOffset))
+                            rs3TreePolygons.append(Rs3TreePolygon(matID, drawFlags, vertexCount, vertexOffset))
                             vertexOffset += vertexCount
 
                             if state.logRsPolygons:
@@ -360,7 +396,7 @@ def readRs(self, file, path, state):
 
                             p += 1
 
-                    openRS3OctreeNode()
+                    walkTree(None, enterRS3OctreeNode, branchRS3OctreeNode, leaveRS3OctreeNode)
 
                     trees.append(Rs3Tree(matCount, lightmapID, treeVertexCount))
 
@@ -391,6 +427,8 @@ def readRs(self, file, path, state):
                 print(f"Geometry:           { len(geometry) }")
                 print()
 
+        state.rsOctreeBuffers = createRs3TreeBuffers(rs3TreeVerts, rs3TreePolygons)
+
     if state.logRsHeaders or state.logRsPortals or state.logRsCells or state.logRsGeometry or state.logRsTrees or state.logRsPolygons or state.logRsVerts:
         bytesRemaining = fileSize - file.tell()
 
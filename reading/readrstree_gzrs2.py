@@ -0,0 +1,154 @@
+#####
+# Most of the code is based on logic found in...
+#
+### GunZ 1
+# - RBspObject.h/.cpp
+# - RBspObject_bsp.cpp
+#
+# Please report maps and models with unsupported features to me on Discord: Krunk#6051
+#####
+
+import numpy as np
+
+from mathutils.kdtree import KDTree
+
+from ..constants_gzrs2 import *
+from ..classes_gzrs2 import *
+from ..io_gzrs2 import *
+from ..lib.lib_gzrs2 import *
+
+RS2_TREE_VERTEX_DTYPE = np.dtype([('pos', '<f4', 3), ('nor', '<f4', 3), ('uv1', '<f4', 2), ('uv2', '<f4', 2)])
+
+# Shared by readRs() and readBsp()
+# A polygon is a header, a contiguous block of fixed-stride vertices and a face normal
+# The vertex blocks are gathered raw into vertexData and decoded all at once by createRs2TreeBuffers()
+def readRs2TreePolygon(file, vertexData):
+    matID, convexID, drawFlags, vertexCount = readLayout(file, 'rs2TreePolygon')
+
+    vertexData += readBytes(file, vertexCount * RS2_TREE_VERTEX_DTYPE.itemsize)
+    skipBytes(file, 4 * 3) # skip face normal
+
+    return matID, convexID, drawFlags, vertexCount
+
+def decodeRs2TreeVertices(vertexData, convertUnits):
+    vertices = np.frombuffer(vertexData, dtype = RS2_TREE_VERTEX_DTYPE)
+
+    positions = transformCoordinateNdarray(vertices['pos'], convertUnits, True)
+    normals = transformDirectionNdarray(vertices['nor'], True)
+    uv1s = transformUV2Ndarray(vertices['uv1'])
+    uv2s = transformUV2Ndarray(vertices['uv2']) # lightmap uvs are always garbled for vanilla maps, so we get them from the .lm file instead
+
+    return positions, normals, uv1s, uv2s
+
+def printRs2TreeVertices(vertexData, convertUnits):
+    for v, (pos, nor, uv1, uv2) in enumerate(zip(*decodeRs2TreeVertices(vertexData, convertUnits))):
+        print(f"===== Vertex { v }   ===========================")
+        print("Position:           ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*pos))
+        print("Normal:             ({:>6.03f}, {:>6.03f}, {:>6.03f})".format(*nor))
+        print("UV1:                ({:>6.03f}, {:>6.03f})".format(*uv1))
+        print("UV2:                ({:>6.03f}, {:>6.03f})".format(*uv2))
+        print()
+
+def createPolygonBuffers(matIDs, convexIDs, drawFlags, vertexCounts, vertexOffsets = None):
+    vertexCounts = np.array(vertexCounts, dtype = np.int32)
+
+    if vertexOffsets is None:   vertexOffsets = np.cumsum(vertexCounts) - vertexCounts
+
+    return {
+        'matIDs':           np.array(matIDs, dtype = np.int32),
+        'convexIDs':        np.array(convexIDs, dtype = np.int32),
+        'drawFlags':        np.array(drawFlags, dtype = np.uint32),
+        'vertexOffsets':    np.array(vertexOffsets, dtype = np.int32),
+        'vertexCounts':     vertexCounts
+    }
+
+def createRs2TreeBuffers(vertexData, matIDs, convexIDs, drawFlags, vertexCounts, convertUnits):
+    positions, normals, uv1s, uv2s = decodeRs2TreeVertices(vertexData, convertUnits)
+
+    return RsTreeBuffers(positions, normals, uv1s, uv2s, **createPolygonBuffers(matIDs, convexIDs, drawFlags, vertexCounts))
+
+# RS3 vertices are interleaved with colors and decoded individually, so we only pack the results
+def createRs3TreeBuffers(treeVerts, treePolygons):
+    positions = np.array([vertex.pos for vertex in treeVerts], dtype = np.float32).reshape(-1, 3)
+    normals = np.array([vertex.nor for vertex in treeVerts], dtype = np.float32).reshape(-1, 3)
+    uv1s = np.array([vertex.uv1 for vertex in treeVerts], dtype = np.float32).reshape(-1, 2)
+    uv2s = np.array([vertex.uv2 for vertex in treeVerts], dtype = np.float32).reshape(-1, 2)
+
+    matIDs = tuple(polygon.matID for polygon in treePolygons)
+    convexIDs = tuple(0 for _ in treePolygons)
+    drawFlags = tuple(polygon.drawFlags for polygon in treePolygons)
+    vertexCounts = tuple(polygon.vertexCount for polygon in treePolygons)
+    vertexOffsets = tuple(polygon.vertexOffset for polygon in treePolygons)
+
+    return RsTreeBuffers(positions, normals, uv1s, uv2s, **createPolygonBuffers(matIDs, convexIDs, drawFlags, vertexCounts, vertexOffsets))
+
+# Convex polygons store positions and normals as two separate blocks, without uvs
+def readRsConvexPolygon(file, positionData, normalData):
+    matID, drawFlags, *_, vertexCount = readLayout(file, 'rsConvexPolygon')
+
+    positionData += readBytes(file, vertexCount * 3 * 4)
+    normalData += readBytes(file, vertexCount * 3 * 4)
+
+    return matID, drawFlags, vertexCount
+
+def createRsConvexBuffers(positionData, normalData, matIDs, drawFlags, vertexCounts, convertUnits):
+    positions = transformCoordinateNdarray(np.frombuffer(positionData, dtype = '<f4').reshape(-1, 3), convertUnits, True)
+    normals = transformDirectionNdarray(np.frombuffer(normalData, dtype = '<f4').reshape(-1, 3), True)
+    uv1s = np.zeros((len(positions), 2), dtype = np.float32)
+    uv2s = np.zeros((len(positions), 2), dtype = np.float32)
+
+    return RsTreeBuffers(positions, normals, uv1s, uv2s, **createPolygonBuffers(matIDs, range(len(matIDs)), drawFlags, vertexCounts))
+
+# The octree polygons hold the UV data, so we need to infer them for the convex polygons
+# Octree vertices are bucketed by the convex ID of their polygon, then every convex vertex looks up the closest vertex
+# in a KDTree of its own bucket, so the work stays proportional to the vertex counts instead of their product
+# Exact duplicates only enter a bucket once, so ties resolve to the lowest octree vertex
+# Returns the matched octree vertex and squared distance for each convex vertex, or None if any bucket is empty
+def matchRsConvexVertices(convexBuffers, octreeBuffers):
+    convexCount = len(convexBuffers.vertexCounts)
+
+    octreeIDs = getPolygonVertexIDs(octreeBuffers, np.arange(len(octreeBuffers.vertexCounts)))
+    octreeBuckets = np.repeat(octreeBuffers.convexIDs, octreeBuffers.vertexCounts)
+
+    bucketOrder = np.argsort(octreeBuckets, kind = 'stable')
+    bucketIDs = octreeIDs[bucketOrder]
+    bucketCounts = np.bincount(octreeBuckets, minlength = convexCount)[:convexCount]
+    bucketEnds = np.cumsum(bucketCounts)
+
+    if np.any((bucketCounts == 0) & (convexBuffers.vertexCounts > 0)):
+        return None
+
+    convexIDs = getPolygonVertexIDs(convexBuffers, np.arange(convexCount))
+    convexEnds = np.cumsum(convexBuffers.vertexCounts)
+
+    bucketPositions = octreeBuffers.positions[bucketIDs].tolist()
+    convexPositions = convexBuffers.positions[convexIDs].tolist()
+    bucketMatches = [0] * len(convexIDs)
+
+    bucketStart = 0
+    convexStart = 0
+
+    for bucketEnd, convexEnd in zip(bucketEnds.tolist(), convexEnds.tolist()):
+        if convexEnd > convexStart:
+            firsts = {}
+
+            for b in range(bucketStart, bucketEnd):
+                firsts.setdefault(tuple(bucketPositions[b]), b)
+
+            kdTree = KDTree(len(firsts))
+
+            for position, b in firsts.items():
+                kdTree.insert(position, b)
+
+            kdTree.balance()
+
+            for v in range(convexStart, convexEnd):
+                bucketMatches[v] = kdTree.find(convexPositions[v])[1]
+
+        bucketStart = bucketEnd
+        convexStart = convexEnd
+
+    matches = bucketIDs[np.array(bucketMatches, dtype = np.int64)]
+    deltas = octreeBuffers.positions[matches].astype(np.float64) - convexBuffers.positions[convexIDs]
+
+    return matches, np.einsum('ij,ij->i', deltas, deltas)
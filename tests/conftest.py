@@ -0,0 +1,10 @@
+import os, sys, types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Registers the add-on under its installed name without running its __init__, which needs a live Blender session
+if 'io_scene_gzrs2' not in sys.modules:
+    package = types.ModuleType('io_scene_gzrs2')
+    package.__file__ = os.path.join(ROOT, '__init__.py')
+    package.__path__ = [ROOT]
+    sys.modules['io_scene_gzrs2'] = package
@@ -0,0 +1,67 @@
+import tracemalloc
+
+from dataclasses import fields
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import flattenCol1Tree
+
+from test_col1_tree import createNodeTree, writeCol, readColTree, readCol1TreeOld
+
+TREE_DEPTH = 13
+
+@pytest.fixture(scope = 'module')
+def colpath(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('col') / 'map.rs.col')
+    writeCol(path, flattenCol1Tree(createNodeTree(np.random.default_rng(0), TREE_DEPTH)), True)
+
+    return path
+
+def readNodes(path):
+    with MappedCursor(path) as file:
+        file.seek(16)
+        return readCol1TreeOld(file, True)
+
+def readTable(path):
+    return readColTree(path, True).col1Tree
+
+READERS = {
+    'nodes':    readNodes,
+    'table':    readTable,
+}
+
+# Bytes still allocated once the reader returns, only the tree is kept alive
+def measureRetained(reader, path):
+    tracemalloc.start()
+
+    try:
+        tree = reader(path)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return tree, retained
+
+@pytest.mark.parametrize('reader', READERS)
+def test_col1_tree_footprint(benchmark, colpath, reader):
+    tree, retained = measureRetained(READERS[reader], colpath)
+
+    benchmark.group = f"readCol, depth { TREE_DEPTH } COL1 tree"
+    benchmark.extra_info['retainedBytes'] = retained
+    benchmark.pedantic(READERS[reader], args = (colpath,), rounds = 3)
+
+    if reader == 'table':
+        tableBytes = sum(getattr(tree, treeField.name).nbytes for treeField in fields(Col1Tree))
+        _, nodeBytes = measureRetained(readNodes, colpath)
+
+        benchmark.extra_info['tableBytes'] = tableBytes
+        benchmark.extra_info['nodeBytes'] = nodeBytes
+
+        assert tableBytes * 4 < nodeBytes
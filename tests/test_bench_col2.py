@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.reading.readcol_gzrs2 import decodeCol2Triangles
+
+from test_col2 import writeCol2, readCol2, readCol2Old
+
+TRIANGLE_COUNT = 200000
+
+@pytest.fixture(scope = 'module')
+def cl2path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('cl2') / 'map.rs.cl2')
+    writeCol2(path, TRIANGLE_COUNT, 10)
+
+    return path
+
+def readOld(path):
+    with MappedCursor(path) as file:
+        return readCol2Old(file, True)
+
+READERS = {
+    'before':   readOld,
+    'after':    lambda path: readCol2(path, True),
+}
+
+@pytest.mark.parametrize('reader', READERS)
+def test_read_col2(benchmark, cl2path, reader):
+    benchmark.group = 'readCol, 200k triangle .cl2'
+    triangles = benchmark.pedantic(READERS[reader], args = (cl2path,), rounds = 1 if reader == 'before' else 3)
+
+    assert len(triangles) == TRIANGLE_COUNT
+
+# The bulk decode alone, without building the ColTriangle records
+def test_decode_col2_triangles(benchmark):
+    triangleData = np.random.default_rng(0).uniform(-5000.0, 5000.0, (TRIANGLE_COUNT, 11)).astype('<f4').tobytes()
+
+    benchmark.group = 'decodeCol2Triangles, 200k triangles'
+    vertices, normals, _, _ = benchmark(decodeCol2Triangles, triangleData, True)
+
+    assert vertices.shape == (TRIANGLE_COUNT, 3, 3) and normals.shape == (TRIANGLE_COUNT, 3)
@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import flattenCol1Tree
+from io_scene_gzrs2.lib.colquery_gzrs2 import col1SegmentCast
+
+from test_col1_tree import createNodeTree
+
+RAY_COUNT = 1000000
+TREE_DEPTH = 12
+
+@pytest.fixture(scope = 'module')
+def tree():
+    return flattenCol1Tree(createNodeTree(np.random.default_rng(0), TREE_DEPTH))
+
+@pytest.mark.parametrize('radius', (0.0, 0.05))
+def test_segment_cast(benchmark, tree, radius):
+    rng = np.random.default_rng(1)
+    starts = rng.uniform(-2.0, 2.0, (RAY_COUNT, 3))
+    ends = rng.uniform(-2.0, 2.0, (RAY_COUNT, 3))
+
+    benchmark.group = f"col1SegmentCast, 1M random rays, { len(tree.solids) } nodes"
+    hits, fractions, _ = benchmark.pedantic(col1SegmentCast, args = (tree, starts, ends), kwargs = { 'radius': radius }, rounds = 1)
+
+    benchmark.extra_info['hitRate'] = float(hits.mean())
+    benchmark.extra_info['raysPerSecond'] = RAY_COUNT / benchmark.stats.stats.mean
+
+    assert 0.0 < hits.mean() < 1.0
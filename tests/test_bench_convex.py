@@ -0,0 +1,21 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils.kdtree')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.reading.readrstree_gzrs2 import matchRsConvexVertices
+
+from test_convex_match import createQuadMap
+
+# Every quad makes two octree polygons, so the largest case matches against 200k octree polygons
+@pytest.mark.parametrize('quadCount', (1000, 10000, 100000))
+def test_match_convex_vertices(benchmark, quadCount):
+    convexBuffers, octreeBuffers = createQuadMap(quadCount, jitter = 0.01)
+
+    benchmark.group = 'matchRsConvexVertices'
+    benchmark.extra_info['octreePolygons'] = len(octreeBuffers.vertexCounts)
+    matches, distances = benchmark.pedantic(matchRsConvexVertices, args = (convexBuffers, octreeBuffers), rounds = 3)
+
+    assert len(matches) == len(distances) == quadCount * 4
@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import createDXT1Palettes, decodeDXT1, encodeDXT1, rgb565ToNdarray, splitDXT1Blocks
+
+from test_dxt1 import createLightmap, encodeDXT1PerBlock
+
+def getPSNR(imageData, pixels):
+    imageSize = pixels.shape[0]
+    decoded = decodeDXT1(bytes(imageData), imageSize, imageSize).astype(np.float64)
+
+    return 10.0 * math.log10(1.0 / np.mean((decoded - pixels[:, :, :3]) ** 2))
+
+@pytest.mark.parametrize('imageSize', (256, 512, 1024, 2048))
+def test_encode(benchmark, imageSize):
+    pixels = createLightmap(imageSize)
+
+    benchmark.group = f"DXT1 encode, { imageSize }^2"
+    imageData, _ = benchmark.pedantic(encodeDXT1, args = (pixels[:, :, :3],), rounds = 3)
+
+    benchmark.extra_info['psnr'] = getPSNR(imageData, pixels)
+
+# The per block fallback takes seconds per image, so it only runs on the smaller sizes
+@pytest.mark.parametrize('imageSize', (256, 512))
+def test_encode_per_block(benchmark, imageSize):
+    pixels = createLightmap(imageSize)
+    floats = pixels.ravel().tolist()
+
+    benchmark.group = f"DXT1 encode, { imageSize }^2"
+    imageData, _ = benchmark.pedantic(encodeDXT1PerBlock, args = (imageSize, floats), rounds = 1)
+
+    assert imageData == encodeDXT1(pixels[:, :, :3])[0]
+
+    benchmark.extra_info['psnr'] = getPSNR(imageData, pixels)
+
+# Soft blobs of light over a dim floor, closer to a baked lightmap than the ripple
+def createBlobs(imageSize, seed):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:imageSize, 0:imageSize] / imageSize
+    pixels = np.full((imageSize, imageSize, 3), 0.1)
+
+    for cx, cy, radius, color in zip(rng.random(16), rng.random(16), rng.uniform(0.02, 0.2, 16), rng.random((16, 3))):
+        pixels += np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (radius * radius))[:, :, None] * color
+
+    return np.clip(pixels, 0.0, 1.0).astype(np.float32)
+
+def getLightmapSet():
+    return (createLightmap(1024)[:, :, :3], createBlobs(1024, 0), createBlobs(512, 1))
+
+# Picks the palette mode by comparing the endpoint words like graphics hardware does, decodeDXT1 compares
+# color lengths instead to match the importer, which would misjudge some of the blocks the fits produce
+def getSquaredErrors(imageData, pixels):
+    blocks = np.frombuffer(imageData, dtype = '<u2').reshape(-1, 4)
+    indices = blocks[:, 2].astype(np.uint32) | (blocks[:, 3].astype(np.uint32) << 16)
+
+    assert np.all(blocks[:, 0] > blocks[:, 1])
+
+    palettes = createDXT1Palettes(rgb565ToNdarray(blocks[:, 0]), rgb565ToNdarray(blocks[:, 1]))
+    texelIndices = (indices[:, None] >> (np.arange(16, dtype = np.uint32) * 2)) & 3
+    texels = palettes[np.arange(len(blocks))[:, None], texelIndices]
+
+    return float(np.sum((texels.astype(np.float64) - splitDXT1Blocks(pixels)) ** 2))
+
+def encodeSet(images, fit):
+    return tuple(encodeDXT1(pixels, fit)[0] for pixels in images)
+
+@pytest.mark.parametrize('fit', ('BRIGHTNESS', 'BOX', 'AXIS', 'CLUSTER'))
+def test_encode_tiers(benchmark, fit):
+    images = getLightmapSet()
+
+    benchmark.group = 'DXT1 encode tiers, 1024^2 + 1024^2 + 512^2'
+    results = benchmark.pedantic(encodeSet, args = (images, fit), rounds = 3)
+
+    squaredErrors, texelCount = 0.0, 0
+
+    for imageData, pixels in zip(results, images):
+        squaredErrors += getSquaredErrors(imageData, pixels)
+        texelCount += pixels.size
+
+    benchmark.extra_info['rmse'] = math.sqrt(squaredErrors / texelCount)
@@ -0,0 +1,53 @@
+import tracemalloc
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import unpackLmImages
+
+from test_lm_atlas import images, createState, unpackLmImagesOld
+
+def getPeak(unpack, state):
+    tracemalloc.start()
+    unpack(None, state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+# 16 cells of 1024, a 4096 atlas
+def test_unpack_atlas(benchmark, images):
+    state = createState(16, 1024)
+
+    benchmark.group = 'unpackLmImages'
+    benchmark.pedantic(unpackLmImages, args = (None, state), rounds = 3)
+
+    # Traced separately, tracing slows the assembly down
+    state.blLmImage = None
+    benchmark.extra_info['atlasSize'] = 4096
+    benchmark.extra_info['peakMB'] = getPeak(unpackLmImages, state) / 1e6
+
+# The per pixel assembly takes minutes on a 4096 atlas, so it runs on 16 cells of 256 instead
+def test_unpack_atlas_per_pixel(benchmark, images):
+    state = createState(16, 256)
+
+    benchmark.group = 'unpackLmImages'
+    benchmark.pedantic(unpackLmImagesOld, args = (None, state), rounds = 1)
+
+    state.blLmImage = None
+    benchmark.extra_info['atlasSize'] = 1024
+    benchmark.extra_info['peakMB'] = getPeak(unpackLmImagesOld, state) / 1e6
+
+def test_unpack_small_atlas(benchmark, images):
+    state = createState(16, 256)
+
+    benchmark.group = 'unpackLmImages'
+    benchmark.pedantic(unpackLmImages, args = (None, state), rounds = 3)
+
+    state.blLmImage = None
+    benchmark.extra_info['atlasSize'] = 1024
+    benchmark.extra_info['peakMB'] = getPeak(unpackLmImages, state) / 1e6
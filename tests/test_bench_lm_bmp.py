@@ -0,0 +1,60 @@
+import tracemalloc
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import getBMPRowSize
+
+from test_lm_bmp import writeLm, readBMPOld
+from test_lm_mipmaps import readLmImages
+
+IMAGE_SIZE = 1024
+IMAGE_COUNT = 64
+
+@pytest.fixture(scope = 'module')
+def lmpath(tmp_path_factory):
+    imageData = np.random.default_rng(0).integers(0, 256, getBMPRowSize(IMAGE_SIZE) * IMAGE_SIZE, dtype = np.uint8).tobytes()
+    path = str(tmp_path_factory.mktemp('lm') / 'map.rs.lm')
+
+    writeLm(path, ((IMAGE_SIZE, imageData),) * IMAGE_COUNT)
+
+    return path
+
+def readTraced(path):
+    tracemalloc.start()
+    lmImages = readLmImages(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return lmImages, peak
+
+def test_read_bmp_lightmaps(benchmark, lmpath):
+    benchmark.group = f"readLm, { IMAGE_COUNT } x { IMAGE_SIZE }^2 bmp"
+    lmImages = benchmark.pedantic(readLmImages, args = (lmpath,), rounds = 3)
+
+    assert len(lmImages) == IMAGE_COUNT
+
+    # Traced separately, tracing slows the read down
+    del lmImages
+    _, peak = readTraced(lmpath)
+
+    benchmark.extra_info['peakMB'] = peak / 1e6
+
+# One image only, the per texel reader takes minutes over all of them
+def test_read_bmp_lightmap_per_texel(benchmark, lmpath):
+    def readOne():
+        with open(lmpath, 'rb') as file:
+            file.seek(20 + 4 + 14 + 40)
+
+            return readBMPOld(file, IMAGE_SIZE, IMAGE_SIZE)
+
+    benchmark.group = f"readLm, { IMAGE_COUNT } x { IMAGE_SIZE }^2 bmp"
+    image = benchmark.pedantic(readOne, rounds = 1)
+
+    assert len(image.data) == IMAGE_SIZE * IMAGE_SIZE * 3
+
+    benchmark.extra_info['images'] = 1
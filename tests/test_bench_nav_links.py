@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import countDegenerateNavFaces, createNavLinks
+
+from test_nav_links import createGrid, toLoopTriangles, countDegenerateOld, createLinksOld
+
+# Grid sizes in quads, every quad is two faces
+SIZES = {
+    1000:   (25, 20),
+    10000:  (100, 50),
+    100000: (250, 200),
+    200000: (400, 250),
+}
+
+def checkNavFaces(faces):
+    return countDegenerateNavFaces(faces), createNavLinks(faces)
+
+def checkNavFacesOld(faces):
+    loopTriangles = toLoopTriangles(faces)
+
+    return countDegenerateOld(loopTriangles), createLinksOld(loopTriangles)
+
+@pytest.mark.parametrize('faceCount', SIZES)
+def test_nav_links(benchmark, faceCount):
+    faces = createGrid(*SIZES[faceCount])
+
+    benchmark.group = 'countDegenerateNavFaces + createNavLinks'
+    degenerateCount, links = benchmark.pedantic(checkNavFaces, args = (faces,), rounds = 3)
+
+    assert degenerateCount == 0 and len(links) == faceCount * 3
+
+# The nested searches grow with the square of the face count, so only the smallest mesh is feasible
+def test_nav_links_nested_search(benchmark):
+    faces = createGrid(*SIZES[1000])
+
+    benchmark.group = 'countDegenerateNavFaces + createNavLinks'
+    degenerateCount, links = benchmark.pedantic(checkNavFacesOld, args = (faces,), rounds = 1)
+
+    assert degenerateCount == 0 and links == createNavLinks(faces)
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.lib.navquery_gzrs2 import *
+
+from test_navquery import createCells
+
+# A 200 by 200 cell floor with a fifth of the cells knocked out, 64k faces split over a few islands
+@pytest.fixture(scope = 'module')
+def floor():
+    rng = np.random.default_rng(0)
+    cells = [(x, y) for x in range(200) for y in range(200) if rng.random() < 0.8]
+    vertices, faces, _ = createCells(cells)
+
+    centers = np.array(cells, dtype = np.float64) + 0.5
+    picks = rng.integers(0, len(cells), (1000, 2))
+    starts = np.column_stack((centers[picks[:, 0]], np.zeros(len(picks))))
+    ends = np.column_stack((centers[picks[:, 1]], np.zeros(len(picks))))
+
+    return vertices, faces, starts, ends
+
+def test_build_query_mesh(benchmark, floor):
+    vertices, faces, _, _ = floor
+
+    benchmark.group = 'createNavQueryMesh'
+    query = benchmark.pedantic(createNavQueryMesh, args = (vertices, faces), rounds = 3)
+
+    benchmark.extra_info['faces'] = len(faces)
+    benchmark.extra_info['islands'] = query.islandCount
+
+@pytest.mark.parametrize('heuristicWeight', (NAV_QUERY_HEURISTIC_WEIGHT, 2.0))
+def test_bulk_paths(benchmark, floor, heuristicWeight):
+    vertices, faces, starts, ends = floor
+    query = createNavQueryMesh(vertices, faces)
+
+    benchmark.group = 'navFindPaths, 1000 pairs'
+    paths, startFaces, endFaces = benchmark.pedantic(navFindPaths, args = (query, starts, ends, heuristicWeight), rounds = 1)
+
+    found = [path for path in paths if path is not None]
+    lengths = [float(np.linalg.norm(np.diff(path, axis = 0), axis = 1).sum()) for path in found]
+
+    assert np.all(startFaces >= 0) and np.all(endFaces >= 0) and found
+
+    benchmark.extra_info['paths'] = len(found)
+    benchmark.extra_info['totalLength'] = sum(lengths)
@@ -0,0 +1,22 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import getTreeDepth, getTreeNodeCount, getTreePolygonCount
+
+from test_plane_sampling import createBoxes, buildTree
+
+# 200 boxes, 1200 polygons, zero samples is the exhaustive search
+QUADS = createBoxes(200)
+
+@pytest.mark.parametrize('sampleCount', (8, 32, 128, 0))
+def test_build_bsptree(benchmark, sampleCount):
+    benchmark.group = f"createBsptreeNode, { len(QUADS) } polygons"
+    tree = benchmark.pedantic(buildTree, args = (QUADS, sampleCount), rounds = 1)
+
+    benchmark.extra_info['splits'] = getTreePolygonCount(tree) - len(QUADS)
+    benchmark.extra_info['depth'] = getTreeDepth(tree)
+    benchmark.extra_info['nodes'] = getTreeNodeCount(tree)
@@ -0,0 +1,130 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.reading.readrs_gzrs2 import *
+from io_scene_gzrs2.reading.readrstree_gzrs2 import RS2_TREE_VERTEX_DTYPE
+
+VERTEX_COUNT =      500000
+POLYGON_SIZE =      4
+OCTREE_DEPTH =      11
+
+CONVEX_DTYPE = np.dtype([
+    ('matID', '<i4'), ('drawFlags', '<u4'), ('plane', '<f4', 4), ('area', '<f4'), ('vertexCount', '<u4'),
+    ('pos', '<f4', (POLYGON_SIZE, 3)), ('nor', '<f4', (POLYGON_SIZE, 3))
+])
+
+OCTREE_DTYPE = np.dtype([
+    ('matID', '<i4'), ('convexID', '<u4'), ('drawFlags', '<u4'), ('vertexCount', '<u4'),
+    ('vertices', RS2_TREE_VERTEX_DTYPE, POLYGON_SIZE), ('normal', '<f4', 3)
+])
+
+OPENERS = {
+    'file':     lambda path: open(path, 'rb'),
+    'mmap':     MappedCursor
+}
+
+# A GunZ 1 .rs with quads spread over the leaves of a balanced octree, every quad is its own convex polygon
+def writeSyntheticRs(path):
+    polygonCount = VERTEX_COUNT // POLYGON_SIZE
+    rng = np.random.default_rng(0)
+
+    positions = rng.uniform(-1000.0, 1000.0, (polygonCount, POLYGON_SIZE, 3)).astype(np.float32)
+    normals = np.zeros((polygonCount, POLYGON_SIZE, 3), dtype = np.float32)
+    normals[:, :, 2] = 1.0
+
+    convex = np.zeros(polygonCount, dtype = CONVEX_DTYPE)
+    convex['vertexCount'] = POLYGON_SIZE
+    convex['pos'] = positions
+    convex['nor'] = normals
+
+    octree = np.zeros(polygonCount, dtype = OCTREE_DTYPE)
+    octree['convexID'] = np.arange(polygonCount)
+    octree['vertexCount'] = POLYGON_SIZE
+    octree['vertices']['pos'] = positions
+    octree['vertices']['nor'] = normals
+
+    leafCount = 1 << OCTREE_DEPTH
+    leafStarts = np.linspace(0, polygonCount, leafCount + 1).astype(np.int64)
+    nodeCount = 2 * leafCount - 1
+    nodeHeader = struct.pack('<10f', *([0.0] * 10))
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<3I', RS2_ID, RS2_VERSION, 1))
+        file.write(b'material\x00')
+        file.write(struct.pack('<2I', polygonCount, VERTEX_COUNT))
+        file.write(convex.tobytes())
+        file.write(struct.pack('<4I', 0, 0, 0, 0))
+        file.write(struct.pack('<4I', nodeCount, polygonCount, VERTEX_COUNT, 0))
+
+        leaf = 0
+
+        def writeNode(depth):
+            nonlocal leaf
+
+            file.write(nodeHeader)
+
+            if depth < OCTREE_DEPTH:
+                file.write(b'\x01')
+                writeNode(depth + 1)
+                file.write(b'\x01')
+                writeNode(depth + 1)
+                file.write(struct.pack('<I', 0))
+            else:
+                start, end = leafStarts[leaf], leafStarts[leaf + 1]
+                leaf += 1
+
+                file.write(b'\x00\x00')
+                file.write(struct.pack('<I', end - start))
+                file.write(octree[start:end].tobytes())
+
+        writeNode(0)
+
+@pytest.fixture(scope = 'module')
+def rspath(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('rs') / 'synthetic.rs')
+    writeSyntheticRs(path)
+
+    return path
+
+def readSyntheticRs(opener, path):
+    state = GZRS2State()
+    state.xmlRsMats = [None]
+    state.doConvex = True
+    reports = GZRS2ReportBuffer()
+
+    with opener(path) as file:
+        result = readRs(reports, file, path, state)
+
+    assert result is None, reports.reports
+    assert not reports.reports
+
+    return state
+
+def scanSyntheticRs(opener, path):
+    with opener(path) as file:
+        return scanRs(file)
+
+@pytest.mark.parametrize('opener', OPENERS)
+def test_scan_rs(benchmark, opener, rspath):
+    benchmark.group = 'scanRs, 500k vertices'
+    index = benchmark(scanSyntheticRs, OPENERS[opener], rspath)
+
+    assert index.convexVertexCount == VERTEX_COUNT
+    assert index.octreeVertexCount == VERTEX_COUNT
+
+@pytest.mark.parametrize('opener', OPENERS)
+def test_read_rs(benchmark, opener, rspath):
+    benchmark.group = 'readRs, 500k vertices'
+    state = benchmark.pedantic(readSyntheticRs, args = (OPENERS[opener], rspath), rounds = 3)
+
+    assert len(state.rsOctreeBuffers.positions) == VERTEX_COUNT
+    assert np.array_equal(state.rsConvexOctreeIDs, np.arange(VERTEX_COUNT))
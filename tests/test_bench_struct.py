@@ -0,0 +1,92 @@
+import io, struct
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('pytest_benchmark')
+
+from io_scene_gzrs2 import io_gzrs2
+
+RECORD_COUNT = 20000
+
+# The helpers as they were before the layouts were precompiled, every call re-parses its format string
+BEFORE = {
+    'skipBytes':        lambda file, length: file.seek(length, 1),
+    'decodeBytes':      lambda file, length: file.read(length).decode('utf-8'),
+    'readBool':         lambda file: struct.unpack('<?', file.read(1))[0],
+    'readUInt':         lambda file: struct.unpack('<I', file.read(4))[0],
+    'readInt':          lambda file: struct.unpack('<i', file.read(4))[0],
+    'readFloat':        lambda file: struct.unpack('<f', file.read(4))[0],
+    'readVec3':         lambda file: struct.unpack('<3f', file.read(3 * 4)),
+    'readVec4':         lambda file: struct.unpack('<4f', file.read(4 * 4)),
+    'readVec4Array':    lambda file, length: tuple(struct.iter_unpack('<4f', file.read(4 * 4 * length))),
+    'readUShortArray':  lambda file, length: struct.unpack(f'<{ length }H', file.read(2 * length)),
+    'readIntArray':     lambda file, length: struct.unpack(f'<{ length }i', file.read(4 * length)),
+}
+
+AFTER = {
+    'readLayout':       io_gzrs2.readLayout,
+    **{ name: getattr(io_gzrs2, name) for name in BEFORE },
+}
+
+# The record each reader decodes most, as the (helper, arguments) calls the reader made before and makes now
+BSP_NODE =      (('readVec3', ()), ('readVec3', ()), ('skipBytes', (16,)), ('readBool', ()), ('readBool', ()), ('readUInt', ()))
+COL_NODE =      (('readVec4', ()), ('readBool', ()), ('readBool', ()), ('readBool', ()), ('readUInt', ()))
+NAV_FACE =      (('readUShortArray', (3,)), ('readIntArray', (3,)))
+SKIP =          ('skipBytes', (4,))
+LM_DDS =        (('skipBytes', (2,)), SKIP, ('readUInt', ()), ('readUInt', ()), ('readUInt', ()), ('skipBytes', (8,)), ('readUInt', ())) + (SKIP,) * 12
+LM_DDS +=       (('readUInt', ()), ('decodeBytes', (4,))) + (SKIP,) * 5 + (('readUInt', ()),) + (SKIP,) * 4
+ELU_MATERIAL =  (('readUInt', ()), ('readInt', ()), ('readVec4', ()), ('readVec4', ()), ('readVec4', ()), ('readFloat', ()), ('readUInt', ()))
+ANI_KEYS =      (('readVec4Array', (4,)), ('readInt', ()), ('readVec3', ()), ('readInt', ())) + (('readFloat', ()),) * 4 + (('readInt', ()),)
+
+RECORDS = {
+    'rs':       ((('readInt', ()), ('readUInt', ()), ('readVec4', ()), ('readFloat', ()), ('readUInt', ())), (('readLayout', ('rsConvexPolygon',)),)),
+    'bsp':      (BSP_NODE, (('readLayout', ('rsTreeNode',)), ('readBool', ()), ('readBool', ()), ('readUInt', ()))),
+    'col':      (COL_NODE, (('readLayout', ('col1Node',)), ('readBool', ()), ('readBool', ()), ('readUInt', ()))),
+    'nav':      (NAV_FACE, NAV_FACE),
+    'lm':       (LM_DDS, (('skipBytes', (2,)), ('readLayout', ('ddsHeader',)))),
+    'elu':      (ELU_MATERIAL, (('readLayout', ('eluMaterial',)),)),
+    'ani':      (ANI_KEYS, (('readLayout', ('aniTmKey',)), ('readLayout', ('aniPosKey',)), ('readLayout', ('aniRotKey',)))),
+}
+
+def getRecordCalls(format, codec):
+    before, after = RECORDS[format]
+
+    if codec == 'before':   return tuple((BEFORE[name], args) for name, args in before)
+    else:                   return tuple((AFTER[name], args) for name, args in after)
+
+def getRecordSize(format):
+    file = io.BytesIO(bytes(256))
+
+    for helper, args in getRecordCalls(format, 'before'):
+        helper(file, *args)
+
+    return file.tell()
+
+def decodeRecords(file, calls):
+    file.seek(0)
+
+    for _ in range(RECORD_COUNT):
+        for helper, args in calls:
+            helper(file, *args)
+
+# Before, importers read through a plain file object, they now read through a MappedCursor
+OPENERS = {
+    'before':   lambda path: open(path, 'rb'),
+    'after':    io_gzrs2.MappedCursor,
+}
+
+@pytest.mark.parametrize('codec', ('before', 'after'))
+@pytest.mark.parametrize('format', RECORDS)
+def test_record_overhead(benchmark, tmp_path, format, codec):
+    recordSize = getRecordSize(format)
+    path = tmp_path / f"records.{ format }"
+    path.write_bytes(bytes(RECORD_COUNT * recordSize))
+
+    benchmark.group = f".{ format } records"
+
+    with OPENERS[codec](str(path)) as file:
+        benchmark.pedantic(decodeRecords, args = (file, getRecordCalls(format, codec)), rounds = 5)
+
+        assert file.tell() == RECORD_COUNT * recordSize
@@ -0,0 +1,173 @@
+import io, struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from mathutils import Vector
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import *
+from io_scene_gzrs2.reading.readcol_gzrs2 import readCol
+
+# A random node tree the way createColtreeNode() builds them, some inner nodes miss a child and leaves hold the triangles
+def createNodeTree(rng, depth):
+    plane = rng.normal(size = 4)
+    plane /= np.linalg.norm(plane)
+
+    if depth == 0:
+        triangles = tuple(ColTriangle(tuple(Vector(vertex) for vertex in rng.uniform(-1000.0, 1000.0, (3, 3)).tolist()), Vector(rng.normal(size = 3) / 10.0).normalized())
+                          for _ in range(int(rng.integers(0, 4))))
+
+        return Col1TreeNode(Vector(plane.tolist()), bool(rng.integers(0, 2)), None, None, triangles)
+
+    positive = createNodeTree(rng, depth - 1)
+    negative = createNodeTree(rng, depth - 1) if rng.random() < 0.7 else None
+
+    return Col1TreeNode(Vector(plane.tolist()), False, positive, negative, ())
+
+# Writes the header the exporters write, then the tree itself
+def writeCol(path, tree, convertUnits):
+    file = io.BytesIO()
+    file.write(struct.pack('<4I', COL1_ID, COL1_VERSION, len(tree.solids), len(tree.normals)))
+    writeCol1Tree(file, tree, convertUnits)
+
+    with open(path, 'wb') as output:
+        output.write(file.getvalue())
+
+def readColTree(path, convertUnits):
+    state = GZRS2State()
+    state.convertUnits = convertUnits
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = readCol(reports, file, path, state)
+
+    assert result is None and not reports.reports
+
+    return state
+
+def assertSameNodes(a, b):
+    if a is None or b is None:
+        assert a is None and b is None
+        return
+
+    assert np.allclose(tuple(a.plane), tuple(b.plane), rtol = 0.0, atol = 1e-6)
+    assert a.solid == b.solid
+    assert len(a.triangles) == len(b.triangles)
+
+    for triangleA, triangleB in zip(a.triangles, b.triangles):
+        assert np.allclose([tuple(vertex) for vertex in triangleA.vertices], [tuple(vertex) for vertex in triangleB.vertices], rtol = 1e-6, atol = 0.0)
+        assert np.allclose(tuple(triangleA.normal), tuple(triangleB.normal), rtol = 0.0, atol = 1e-6)
+
+    assertSameNodes(a.positive, b.positive)
+    assertSameNodes(a.negative, b.negative)
+
+def assertSameTrees(a, b):
+    assert np.allclose(a.planes, b.planes, rtol = 0.0, atol = 1e-6)
+    assert np.array_equal(a.solids, b.solids)
+    assert np.array_equal(a.positives, b.positives)
+    assert np.array_equal(a.negatives, b.negatives)
+    assert np.array_equal(a.triangleStarts, b.triangleStarts)
+    assert np.array_equal(a.triangleCounts, b.triangleCounts)
+    assert np.allclose(a.vertices, b.vertices, rtol = 1e-6, atol = 1e-9)
+    assert np.allclose(a.normals, b.normals, rtol = 0.0, atol = 1e-6)
+
+def test_flatten_expand_round_trip():
+    root = createNodeTree(np.random.default_rng(0), 6)
+    tree = flattenCol1Tree(root)
+
+    assert tree.positives[0] == 1 and np.all(tree.triangleCounts[tree.positives >= 0] == 0)
+
+    assertSameNodes(expandCol1Tree(tree), root)
+    assertSameTrees(flattenCol1Tree(expandCol1Tree(tree)), tree)
+
+def test_expand_empty_tree():
+    assert expandCol1Tree(Col1Tree()) is None
+
+# The per node writer and reader the converters replaced, kept verbatim as the reference
+def writeCol1TreeOld(file, root, convertUnits):
+    def enterCol1Node(node):
+        writePlane(file, node.plane, convertUnits, True)
+        writeBool(file, node.solid)
+
+        return node
+
+    def branchCol1Node(node, b):
+        child = node.negative if b else node.positive
+        writeBool(file, child is not None)
+
+        return child
+
+    def leaveCol1Node(node, children):
+        writeUInt(file, len(node.triangles))
+
+        for triangle in node.triangles:
+            writeCoordinateArray(file, triangle.vertices, convertUnits, True)
+            writeDirection(file, triangle.normal, True)
+
+    walkTree(root, enterCol1Node, branchCol1Node, leaveCol1Node)
+
+def readCol1TreeOld(file, convertUnits):
+    def enterCol1Node(_):
+        return readPlane(file, convertUnits, True), readBool(file)
+
+    def branchCol1Node(_, b):
+        return True if readBool(file) else None # positive, negative
+
+    def leaveCol1Node(context, children):
+        plane, solid = context
+        positive, negative = children
+        triangles = tuple(ColTriangle(readCoordinateArray(file, 3, convertUnits, True), readDirection(file, True)) for _ in range(readUInt(file)))
+
+        return Col1TreeNode(plane, solid, positive, negative, triangles)
+
+    return walkTree(None, enterCol1Node, branchCol1Node, leaveCol1Node)
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+def test_writer_matches_per_node_writer(tmp_path, convertUnits):
+    root = createNodeTree(np.random.default_rng(1), 6)
+    path = str(tmp_path / 'map.rs.col')
+
+    writeCol(path, flattenCol1Tree(root), convertUnits)
+
+    file = io.BytesIO()
+    writeCol1TreeOld(file, root, convertUnits)
+
+    with open(path, 'rb') as written:
+        assert written.read()[16:] == file.getvalue()
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+def test_reader_matches_per_node_reader(tmp_path, convertUnits):
+    tree = flattenCol1Tree(createNodeTree(np.random.default_rng(2), 6))
+    path = str(tmp_path / 'map.rs.col')
+
+    writeCol(path, tree, convertUnits)
+    state = readColTree(path, convertUnits)
+
+    with open(path, 'rb') as file:
+        file.seek(16)
+        expected = readCol1TreeOld(file, convertUnits)
+
+    assertSameNodes(expandCol1Tree(state.col1Tree), expected)
+
+    solidCount = int(np.sum(np.repeat(tree.solids, tree.triangleCounts)))
+    assert len(state.colTrisSolid) == solidCount
+    assert len(state.colTrisHull) == len(tree.normals) - solidCount
+
+# Planes are normalized as 4d vectors on both ends, so only the unconverted file survives a read and write unchanged
+def test_file_round_trip(tmp_path):
+    tree = flattenCol1Tree(createNodeTree(np.random.default_rng(3), 6))
+    path = str(tmp_path / 'map.rs.col')
+
+    writeCol(path, tree, False)
+    state = readColTree(path, False)
+
+    assertSameTrees(state.col1Tree, tree)
+
+    writeCol(str(tmp_path / 'again.col'), state.col1Tree, False)
+    assert (tmp_path / 'again.col').read_bytes() == (tmp_path / 'map.rs.col').read_bytes()
@@ -0,0 +1,108 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.reading.readcol_gzrs2 import COL2_TRIANGLE_DTYPE, readCol
+
+# A balanced tree with the triangles split over its leaves, the first triangle is degenerate so its normal stays zero
+def writeCol2(path, triangleCount, depth, seed = 0):
+    rng = np.random.default_rng(seed)
+    triangles = np.zeros(triangleCount, dtype = COL2_TRIANGLE_DTYPE)
+    triangles['vertices'] = rng.uniform(-5000.0, 5000.0, (triangleCount, 3, 3))
+    triangles['vertices'][0] = triangles['vertices'][0][0]
+    triangles['attributes'] = rng.integers(0, 1 << 16, triangleCount)
+    triangles['matID'] = rng.integers(0, 64, triangleCount)
+
+    leafCount = 1 << depth
+    leafStarts = np.linspace(0, triangleCount, leafCount + 1).astype(np.int64)
+    leaf = 0
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<4I', COL2_ID, COL2_VERSION, triangleCount, 2 * leafCount - 1))
+
+        def writeNode(d):
+            nonlocal leaf
+
+            file.write(struct.pack('<6f', *rng.uniform(-10.0, 10.0, 6)))
+
+            if d < depth:
+                file.write(b'\x00')
+                writeNode(d + 1)
+                writeNode(d + 1)
+            else:
+                start, end = leafStarts[leaf], leafStarts[leaf + 1]
+                leaf += 1
+
+                file.write(b'\x01' + struct.pack('<I', end - start))
+                file.write(triangles[start:end].tobytes())
+
+        writeNode(0)
+
+# The per triangle loop decodeCol2Triangles() replaced, kept verbatim as the reference
+def readCol2Old(file, convertUnits):
+    skipBytes(file, 4 * 4) # skip header and counts
+    triangles = []
+
+    def openCol2Node():
+        readBounds(file, convertUnits)
+
+        if not readBool(file):
+            openCol2Node() # positive
+            openCol2Node() # negative
+        else:
+            for t in range(readUInt(file)):
+                vertices = readCoordinateArray(file, 3, convertUnits, False)
+
+                sideA = vertices[1] - vertices[0]
+                sideC = vertices[2] - vertices[0]
+
+                normal = sideC.cross(sideA)
+                normal.normalize()
+
+                skipBytes(file, 4 * 2) # skip attributes and material ID
+
+                triangles.append(ColTriangle(vertices, normal))
+
+    openCol2Node()
+
+    return triangles
+
+def readCol2(path, convertUnits):
+    state = GZRS2State()
+    state.convertUnits = convertUnits
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = readCol(reports, file, path, state)
+
+    assert result is None and not reports.reports
+
+    return state.colTrisHull
+
+def toArrays(triangles):
+    vertices = np.array([[tuple(vertex) for vertex in triangle.vertices] for triangle in triangles], dtype = np.float32)
+    normals = np.array([tuple(triangle.normal) for triangle in triangles], dtype = np.float32)
+
+    return vertices, normals
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+def test_matches_per_triangle_decode(tmp_path, convertUnits):
+    path = str(tmp_path / 'map.rs.cl2')
+    writeCol2(path, 1000, 4)
+
+    vertices, normals = toArrays(readCol2(path, convertUnits))
+
+    with MappedCursor(path) as file:
+        expectedVertices, expectedNormals = toArrays(readCol2Old(file, convertUnits))
+
+    assert np.array_equal(vertices, expectedVertices)
+    assert np.allclose(normals, expectedNormals, rtol = 0.0, atol = 1e-6)
+    assert np.array_equal(normals[0], (0.0, 0.0, 0.0))
+    assert np.allclose(np.linalg.norm(normals[1:], axis = 1), 1.0, rtol = 0.0, atol = 1e-6)
@@ -0,0 +1,147 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.lib.colquery_gzrs2 import *
+
+AXES = np.concatenate((np.identity(3), -np.identity(3)))
+
+# A closed room spanning [-1, 1] on every axis, every wall node keeps the room on its front and a solid leaf behind it
+# A hole drops the solid leaf of a wall, so the space behind it is empty, flipped walls face out instead
+def createRoom(*, hole = None, flipped = ()):
+    planeCount = len(AXES)
+    planes = np.zeros((planeCount * 2 + 1, 4), dtype = np.float32)
+    positives = np.full(planeCount * 2 + 1, -1, dtype = np.int32)
+    negatives = np.full(planeCount * 2 + 1, -1, dtype = np.int32)
+    solids = np.zeros(planeCount * 2 + 1, dtype = bool)
+
+    for w, axis in enumerate(AXES):
+        inward, solid = w + 1, planeCount + 1 + w
+
+        planes[w] = (*-axis, 1.0)
+        positives[w], negatives[w] = inward, solid if w != hole else -1
+        solids[solid] = True
+
+        if w in flipped:
+            planes[w] = -planes[w]
+            positives[w], negatives[w] = negatives[w], positives[w]
+
+    # Only the bounds of the triangles matter to the queries, two per wall
+    corners = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype = np.float32)
+    vertices = corners[np.array([(0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+                                 (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)])]
+
+    triangleStarts = np.zeros(len(solids), dtype = np.int32)
+    triangleCounts = np.zeros(len(solids), dtype = np.int32)
+    triangleCounts[planeCount + 1] = len(vertices)
+
+    return Col1Tree(planes, solids, positives, negatives, triangleStarts, triangleCounts, vertices, np.zeros((len(vertices), 3), dtype = np.float32))
+
+def test_point_solid():
+    points = ((0.0, 0.0, 0.0), (0.9, -0.9, 0.5), (1.5, 0.0, 0.0), (0.0, 0.0, -3.0), (0.0, 0.0, 2.0))
+
+    assert col1PointSolid(createRoom(), points).tolist() == [False, False, True, True, True]
+    assert col1PointSolid(createRoom(hole = 2), points).tolist() == [False, False, True, True, False]
+    assert col1PointSolid(createRoom(flipped = range(6)), points).tolist() == [False, False, True, True, True]
+
+def test_segment_cast_hits_the_wall():
+    starts = np.zeros((6, 3))
+    hits, fractions, normals = col1SegmentCast(createRoom(), starts, AXES * 3.0)
+
+    assert hits.all()
+    assert np.all(fractions <= 1.0 / 3.0) and np.allclose(fractions, 1.0 / 3.0, rtol = 0.0, atol = COL1_QUERY_EPSILON)
+    assert np.array_equal(normals, -AXES)
+
+def test_segment_cast_misses():
+    room = createRoom(hole = 2)
+
+    # Short of the wall, and through the hole
+    hits, fractions, normals = col1SegmentCast(room, np.zeros((2, 3)), ((0.5, 0.0, 0.0), (0.0, 0.0, 5.0)))
+
+    assert not hits.any()
+    assert np.array_equal(fractions, (1.0, 1.0)) and not normals.any()
+
+def test_segment_cast_starts_in_solid():
+    hits, fractions, normals = col1SegmentCast(createRoom(), ((2.0, 0.0, 0.0),), ((0.0, 0.0, 0.0),))
+
+    assert hits[0] and fractions[0] == 0.0 and not normals.any()
+
+# A wall crossed front to back and the same wall facing out, crossed back to front, stop the cast at the same place
+@pytest.mark.parametrize('radius', (0.0, 0.25))
+def test_cast_ignores_plane_orientation(radius):
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(-0.5, 0.5, (256, 3))
+    ends = starts + rng.normal(size = (256, 3)) * 3.0
+
+    hits, fractions, normals = col1SegmentCast(createRoom(), starts, ends, radius = radius)
+    flippedHits, flippedFractions, flippedNormals = col1SegmentCast(createRoom(flipped = range(6)), starts, ends, radius = radius)
+
+    assert np.array_equal(hits, flippedHits)
+    assert np.allclose(fractions, flippedFractions, rtol = 0.0, atol = 1e-12)
+    assert np.array_equal(normals, flippedNormals)
+
+# A solid sliver just past a wall is only reachable through the epsilon overlap of the near piece
+# It has to be reached the same way whether the wall is crossed front to back or back to front
+@pytest.mark.parametrize('flipped', (False, True))
+def test_near_piece_overlaps_the_crossing(flipped):
+    sliver = 1.0 + COL1_QUERY_EPSILON * 0.5
+    planes = np.array(((-1.0, 0.0, 0.0, 1.0), (1.0, 0.0, 0.0, -sliver), (0.0, 0.0, 0.0, 0.0)))
+    positives = np.array((1, 2, -1), dtype = np.int32)
+    negatives = np.array((-1, -1, -1), dtype = np.int32)
+
+    if flipped:
+        planes[0] = -planes[0]
+        positives[0], negatives[0] = negatives[0], positives[0]
+
+    tree = Col1Tree(planes, np.array((False, False, True)), positives, negatives)
+    hits, fractions, _ = col1SegmentCast(tree, ((0.0, 0.0, 0.0),), ((3.0, 0.0, 0.0),))
+
+    # Backed off from the sliver by the epsilon, like any other hit
+    assert hits[0] and np.isclose(fractions[0] * 3.0, sliver - COL1_QUERY_EPSILON, rtol = 0.0, atol = 1e-9)
+
+def test_sphere_cast_stops_a_radius_early():
+    radius = 0.25
+    hits, fractions, normals = col1SphereCast(createRoom(), np.zeros((6, 3)), AXES * 3.0, radius)
+
+    assert hits.all()
+    assert np.allclose(fractions * 3.0, 1.0 - radius, rtol = 0.0, atol = COL1_QUERY_EPSILON * 3.0)
+    assert np.all(fractions * 3.0 <= 1.0 - radius)
+    assert np.array_equal(normals, -AXES)
+
+    # A segment that stops short of the offset wall misses
+    hits, _, _ = col1SphereCast(createRoom(), np.zeros((1, 3)), ((0.7, 0.0, 0.0),), radius)
+    assert not hits.any()
+
+def test_ray_cast_distance():
+    hits, distances, points, normals = col1RayCast(createRoom(), ((0.5, 0.0, 0.0),), ((2.0, 0.0, 0.0),), 10.0)
+
+    assert hits[0]
+    assert np.isclose(distances[0], 0.5, rtol = 0.0, atol = COL1_QUERY_EPSILON * 10.0)
+    assert np.allclose(points[0], (1.0, 0.0, 0.0), rtol = 0.0, atol = COL1_QUERY_EPSILON * 10.0)
+    assert np.array_equal(normals[0], (-1.0, 0.0, 0.0))
+
+def test_closed_room_has_no_holes():
+    origins, directions, exits, rayCount = findCol1Holes(createRoom(), 4)
+
+    assert rayCount == 4 ** 3 * 6
+    assert len(origins) == len(directions) == len(exits) == 0
+
+def test_holed_room_leaks_through_the_hole():
+    origins, directions, exits, rayCount = findCol1Holes(createRoom(hole = 2), 4)
+
+    # Every origin is empty, and only its ray through the hole escapes
+    assert len(origins) == 4 ** 3
+    assert np.array_equal(directions, np.tile(AXES[2], (len(origins), 1)))
+    assert np.all(exits[:, 2] > 1.0)
+    assert not col1PointSolid(createRoom(hole = 2), origins).any()
+
+def test_empty_tree():
+    hits, fractions, normals = col1SegmentCast(Col1Tree(), np.zeros((2, 3)), np.ones((2, 3)))
+
+    assert not hits.any() and np.array_equal(fractions, (1.0, 1.0))
+    assert not col1PointSolid(Col1Tree(), np.zeros((2, 3))).any()
+    assert findCol1Holes(Col1Tree(), 4)[3] == 0
@@ -0,0 +1,120 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils.kdtree')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.reading.readrs_gzrs2 import readRs
+from io_scene_gzrs2.reading.readrstree_gzrs2 import createPolygonBuffers, matchRsConvexVertices
+
+def createBuffers(positions, convexIDs, vertexCounts):
+    positions = np.asarray(positions, dtype = np.float32).reshape(-1, 3)
+    normals = np.tile(np.array((0.0, 0.0, 1.0), dtype = np.float32), (len(positions), 1))
+    uvs = np.zeros((len(positions), 2), dtype = np.float32)
+
+    return RsTreeBuffers(positions, normals, uvs, uvs.copy(), **createPolygonBuffers([0] * len(vertexCounts), convexIDs, [0] * len(vertexCounts), vertexCounts))
+
+# Every convex quad is split into two octree triangles, which repeat the two vertices along the split
+def createQuadMap(quadCount, seed = 0, jitter = 0.0):
+    rng = np.random.default_rng(seed)
+    corners = np.array(((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)), dtype = np.float32)
+
+    quads = corners[None] * rng.uniform(1.0, 4.0, (quadCount, 1, 1)) + rng.uniform(-5000.0, 5000.0, (quadCount, 1, 3))
+    quads = quads.astype(np.float32)
+    triangles = quads[:, (0, 1, 2, 0, 2, 3)] + rng.normal(0.0, jitter, (quadCount, 6, 3)).astype(np.float32)
+
+    convexBuffers = createBuffers(quads, range(quadCount), [4] * quadCount)
+    octreeBuffers = createBuffers(triangles, np.repeat(np.arange(quadCount), 2), [3] * quadCount * 2)
+
+    return convexBuffers, octreeBuffers
+
+# Scans the whole bucket of every convex vertex, ties go to the lowest octree vertex
+def matchBruteForce(convexBuffers, octreeBuffers):
+    octreeBuckets = np.repeat(octreeBuffers.convexIDs, octreeBuffers.vertexCounts)
+    convexBuckets = np.repeat(np.arange(len(convexBuffers.vertexCounts)), convexBuffers.vertexCounts)
+    matches = []
+
+    for position, bucket in zip(convexBuffers.positions, convexBuckets):
+        candidates = np.flatnonzero(octreeBuckets == bucket)
+        deltas = octreeBuffers.positions[candidates].astype(np.float64) - position
+        matches.append(candidates[np.argmin(np.einsum('ij,ij->i', deltas, deltas))])
+
+    return np.array(matches)
+
+@pytest.mark.parametrize('jitter', (0.0, 0.01))
+def test_match_agrees_with_brute_force(jitter):
+    convexBuffers, octreeBuffers = createQuadMap(64, jitter = jitter)
+
+    matches, distances = matchRsConvexVertices(convexBuffers, octreeBuffers)
+    expected = matchBruteForce(convexBuffers, octreeBuffers)
+
+    assert np.array_equal(matches, expected)
+
+    deltas = octreeBuffers.positions[expected].astype(np.float64) - convexBuffers.positions
+    assert np.allclose(distances, np.einsum('ij,ij->i', deltas, deltas))
+
+    if jitter == 0.0:
+        assert not np.any(distances)
+
+def test_match_stays_inside_the_bucket():
+    # The second quad's octree triangles sit exactly on the first quad, but belong to the second bucket
+    convexBuffers = createBuffers(((0, 0, 0), (1, 0, 0), (1, 1, 0), (10, 0, 0), (11, 0, 0), (11, 1, 0)), (0, 1), (3, 3))
+    octreeBuffers = createBuffers(((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 0, 0), (1, 0, 0), (1, 1, 0)), (1, 0), (3, 3))
+
+    matches, _ = matchRsConvexVertices(convexBuffers, octreeBuffers)
+
+    assert matches.tolist() == [3, 4, 5, 1, 1, 2]
+
+def test_match_fails_on_an_empty_bucket():
+    convexBuffers, octreeBuffers = createQuadMap(4)
+    octreeBuffers.convexIDs[octreeBuffers.convexIDs == 2] = 1
+
+    assert matchRsConvexVertices(convexBuffers, octreeBuffers) is None
+
+# A single convex triangle whose octree polygon points at a convex ID that owns nothing, so its bucket stays empty
+def writeOrphanRs(path):
+    triangle = struct.pack('<9f', 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+    vertices = b''.join(struct.pack('<10f', *position, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0) for position in ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)))
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<3I', RS2_ID, RS2_VERSION, 1))
+        file.write(b'material\x00')
+        file.write(struct.pack('<2I', 2, 6))
+
+        for _ in range(2):
+            file.write(struct.pack('<iI4ffI', 0, 0, 0.0, 0.0, 1.0, 0.0, 0.5, 3))
+            file.write(triangle)
+            file.write(struct.pack('<3f', 0.0, 0.0, 1.0) * 3)
+
+        file.write(struct.pack('<4I', 0, 0, 0, 0))
+        file.write(struct.pack('<4I', 1, 1, 3, 0))
+        file.write(struct.pack('<10f', *([0.0] * 10)) + b'\x00\x00' + struct.pack('<I', 1))
+        file.write(struct.pack('<i3I', 0, 1, 0, 3) + vertices + struct.pack('<3f', 0.0, 0.0, 1.0))
+
+@pytest.mark.parametrize('doConvex', (False, True))
+def test_read_rs_keeps_importing_without_a_match(tmp_path, doConvex):
+    path = str(tmp_path / 'orphan.rs')
+    writeOrphanRs(path)
+
+    state = GZRS2State()
+    state.xmlRsMats = [None]
+    state.doConvex = doConvex
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = readRs(reports, file, path, state)
+
+    assert result is None
+    assert len(state.rsOctreeBuffers.positions) == 3
+
+    if doConvex:
+        assert [type for type, _ in reports.reports] == [{ 'WARNING' }]
+        assert len(state.rsConvexBuffers.matIDs) == 0
+    else:
+        assert not reports.reports
+        assert len(state.rsConvexBuffers.matIDs) == 2
@@ -0,0 +1,70 @@
+import os, io, struct
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gzrs2.io_gzrs2 import *
+
+DATA = struct.pack('<bB?IhHiIf2f3f4f', -3, 250, True, 1, -2, 65000, -70000, 0xdeadbeef, 1.5, 1, 2, 3, 4, 5, 6, 7, 8, 9) + struct.pack('<3H', 1, 2, 3) + b'name\x00junk'
+
+def readAll(file):
+    return (
+        readChar(file), readUChar(file), readBool(file), readBool32(file),
+        readShort(file), readUShort(file), readInt(file), readUInt(file), readFloat(file),
+        readVec2(file), readVec3(file), readVec4(file),
+        readUShortArray(file, 3), readString(file, 9)
+    )
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(DATA)
+
+    return str(path)
+
+def test_helpers_match_file_objects(path):
+    with open(path, 'rb') as file:
+        expected = readAll(file)
+
+    with MappedCursor(path) as file:
+        assert readAll(file) == expected
+        assert file.tell() == len(DATA)
+
+    assert expected[0] == -3
+    assert expected[7] == 0xdeadbeef
+    assert expected[-1] == 'name'
+
+def test_helpers_raise_past_eof(path):
+    with open(path, 'rb') as file, MappedCursor(path) as cursor:
+        file.seek(-2, os.SEEK_END)
+        cursor.seek(-2, os.SEEK_END)
+
+        with pytest.raises(struct.error):   readUInt(file)
+        with pytest.raises(struct.error):   readUInt(cursor)
+
+def test_read_past_eof_matches_file_objects(path):
+    with open(path, 'rb') as file, MappedCursor(path) as cursor:
+        for length in (4, -1):
+            file.seek(len(DATA) + 16)
+            cursor.seek(len(DATA) + 16)
+
+            assert cursor.read(length) == file.read(length) == b''
+            assert cursor.tell() == file.tell() == len(DATA) + 16
+
+        file.seek(len(DATA) - 2)
+        cursor.seek(len(DATA) - 2)
+
+        assert cursor.read(4) == file.read(4) == b'nk'
+        assert cursor.tell() == file.tell() == len(DATA)
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+
+    with MappedCursor(str(path)) as file:
+        assert file.read(4) == b''
+
+        with pytest.raises(struct.error):
+            readUInt(file)
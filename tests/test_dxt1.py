@@ -0,0 +1,282 @@
+import math, struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from mathutils import Vector
+
+from io_scene_gzrs2.lib import lib_gzrs2
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import decodeDXT1, encodeDXT1, encodeDXT1Sharded, rgb565ToVector, vectorToRGB565
+
+# The per block decoder readLm used before decodeDXT1(), kept verbatim as the reference, it only handles square images
+def decodeDXT1PerBlock(imageData, width, height):
+    pixelCount = width * height
+    blockLength = 4
+    blockStride = blockLength ** 2
+    blockCount = pixelCount // blockStride
+    blockSpan = int(math.sqrt(blockCount))
+
+    imageShorts = memoryview(imageData).cast('H')
+    imageInts = memoryview(imageData).cast('I')
+
+    pixels = [0 for _ in range(width * height * 3)]
+
+    for b in range(blockCount):
+        p0 = rgb565ToVector(imageShorts[b * 4 + 0])
+        p1 = rgb565ToVector(imageShorts[b * 4 + 1])
+        indices = imageInts[b * 2 + 1]
+
+        if p0 > p1:
+            p2 = (2.0 * p0 + p1) / 3.0
+            p3 = (2.0 * p1 + p0) / 3.0
+        else:
+            p2 = (p0 + p1) / 2.0
+            p3 = Vector((0, 0, 0))
+
+        bx = b % blockSpan
+        by = b // blockSpan
+
+        for p in range(blockStride):
+            s = p * 2
+
+            index = (indices & (3 << s)) >> s
+
+            if index == 0: pixel = p0
+            elif index == 1: pixel = p1
+            elif index == 2: pixel = p2
+            elif index == 3: pixel = p3
+
+            px = p % blockLength
+            py = p // blockLength
+
+            f = bx * blockLength
+            f += by * blockLength * width
+            f += px + py * width
+
+            pixels[f * 3 + 2] = pixel.x
+            pixels[f * 3 + 1] = pixel.y
+            pixels[f * 3 + 0] = pixel.z
+
+    imageShorts.release()
+    imageInts.release()
+
+    return pixels
+
+def packBlock(color0, color1, indices):
+    return struct.pack('<2HI', color0, color1, indices)
+
+def createFixture():
+    rng = np.random.default_rng(0)
+    blocks = [
+        packBlock(0xffff, 0x0000, 0xe4e4e4e4),  # four colors, every index
+        packBlock(0x0000, 0xffff, 0xe4e4e4e4),  # three colors with transparent black, p0 < p1
+        packBlock(0x7bef, 0x7bef, 0xe4e4e4e4),  # equal endpoints
+        packBlock(0x0000, 0x0000, 0xffffffff),  # black endpoints
+        packBlock(0xffff, 0xffff, 0x55555555),  # white endpoints
+        packBlock(0xf800, 0x001f, 0x1b1b1b1b),  # pure red against pure blue, equal lengths, three colors
+        packBlock(0x8000, 0x07ff, 0xb1b1b1b1),  # 565 order says four colors, length order says three
+    ]
+
+    while len(blocks) < 64:
+        color0, color1 = (int(c) for c in rng.integers(0, 1 << 16, 2))
+        blocks.append(packBlock(color0, color1, int(rng.integers(0, 1 << 32))))
+
+    return b''.join(blocks)
+
+@pytest.mark.parametrize('width', (16, 32))
+def test_decode_matches_per_block_decoder(width):
+    height = width
+    imageData = createFixture()[:width * height // 2]
+
+    expected = np.array(decodeDXT1PerBlock(imageData, width, height), dtype = np.float32)
+    pixels = decodeDXT1(imageData, width, height)
+
+    assert pixels.shape == (height, width, 3)
+    assert np.array_equal(pixels[:, :, ::-1].ravel().view(np.uint32), expected.view(np.uint32))
+
+def test_three_color_mode():
+    pixels = decodeDXT1(packBlock(0x0000, 0xffff, 0xe4e4e4e4), 4, 4)
+
+    # Indices run 0, 1, 2, 3 along each row
+    assert np.array_equal(pixels[0], np.array(((0, 0, 0), (1, 1, 1), (0.5, 0.5, 0.5), (0, 0, 0)), dtype = np.float32))
+
+# The per block encoder of the Python fallback before encodeDXT1(), kept verbatim as the reference without the atlas path
+def encodeDXT1PerBlock(imageSize, floats):
+    pixelCount = imageSize ** 2
+    imageData = bytearray(pixelCount // 2)
+    imageShorts = memoryview(imageData).cast('H')
+    imageInts = memoryview(imageData).cast('I')
+    missed = False
+
+    blockLength = 4
+    blockStride = blockLength ** 2
+    blockCount = pixelCount // blockStride
+    blockSpan = int(math.sqrt(blockCount))
+
+    blocks = [[Vector((0, 0, 0)), Vector((0, 0, 0)), [Vector((0, 0, 0)) for _ in range(blockStride)]] for b in range(blockCount)]
+
+    for b, block in enumerate(blocks):
+        bx = b % blockSpan
+        by = b // blockSpan
+        maximum = Vector((0, 0, 0))
+        minimum = Vector((1, 1, 1))
+        maxlen2 = 0
+        minlen2 = 3
+
+        for p in range(blockStride):
+            px = p % blockLength
+            py = p // blockLength
+
+            f = bx * blockLength
+            f += by * blockLength * imageSize
+            f += px + py * imageSize
+
+            pixel = Vector((floats[f * 4 + 0], floats[f * 4 + 1], floats[f * 4 + 2]))
+            len2 = pixel.length_squared
+
+            if len2 > maxlen2:
+                maxlen2 = len2
+                maximum = pixel
+
+            if len2 < minlen2:
+                minlen2 = len2
+                minimum = pixel
+
+            block[2][p] = pixel
+
+        block[0] = maximum
+        block[1] = minimum
+
+    for b, block in enumerate(blocks):
+        ushort1 = vectorToRGB565(block[0])
+        ushort2 = vectorToRGB565(block[1])
+
+        if ushort1 == ushort2:
+            if ushort1 == 0:
+                imageShorts[b * 4 + 0] = ushort1 + 1
+                imageShorts[b * 4 + 1] = ushort1
+                imageInts[b * 2 + 1] = 21845 # 0x5555 -> 0101010101010101
+            else:
+                imageShorts[b * 4 + 0] = ushort1
+                imageShorts[b * 4 + 1] = ushort1 - 1
+                imageInts[b * 2 + 1] = 0
+        else:
+            rgb1 = block[0]
+            rgb2 = block[1]
+
+            if ushort1 < ushort2:
+                ushort1, ushort2 = ushort2, ushort1
+                rgb1, rgb2 = rgb2, rgb1
+
+            imageShorts[b * 4 + 0] = ushort1
+            imageShorts[b * 4 + 1] = ushort2
+
+            p0 = rgb1
+            p1 = rgb2
+            p2 = (2.0 * rgb1 + rgb2) / 3.0
+            p3 = (2.0 * rgb2 + rgb1) / 3.0
+
+            for p, pixel in enumerate(block[2]):
+                d0 = (p0 - pixel).length_squared
+                d1 = (p1 - pixel).length_squared
+                d2 = (p2 - pixel).length_squared
+                d3 = (p3 - pixel).length_squared
+
+                minimum = min(d0, d1, d2, d3)
+
+                s = p * 2
+
+                if minimum == d0:
+                    imageInts[b * 2 + 1] &= ~(3 << (s + 0)) # Set both bits to 0        = 0
+                elif minimum == d1:
+                    imageInts[b * 2 + 1] |=  (1 << (s + 0)) # Set bit 1 & clear bit 2   = 1
+                    imageInts[b * 2 + 1] &= ~(1 << (s + 1))
+                elif minimum == d2:
+                    imageInts[b * 2 + 1] &= ~(1 << (s + 0)) # Clear bit 1 & set bit 2   = 2
+                    imageInts[b * 2 + 1] |=  (1 << (s + 1))
+                elif minimum == d3:
+                    imageInts[b * 2 + 1] |=  (3 << (s + 0)) # Set both bits to 1        = 3
+                else:
+                    missed = True
+
+    imageShorts.release()
+    imageInts.release()
+
+    return imageData, missed
+
+# Gradients with a sine ripple, plus a black corner and a flat grey patch so the special blocks show up
+def createLightmap(imageSize):
+    y, x = np.mgrid[0:imageSize, 0:imageSize] / imageSize
+    pixels = np.stack((x, y, 0.5 + 0.5 * np.sin(8 * x * y), np.ones_like(x)), axis = 2).astype(np.float32)
+    pixels[:imageSize // 8, :imageSize // 8, :3] = 0.0
+    pixels[imageSize // 8:imageSize // 4, :imageSize // 8, :3] = 0.3
+
+    return pixels
+
+@pytest.mark.parametrize('imageSize', (16, 64))
+def test_encode_matches_per_block_encoder(imageSize):
+    for pixels in (createLightmap(imageSize), np.random.default_rng(imageSize).random((imageSize, imageSize, 4), dtype = np.float32)):
+        expected, _ = encodeDXT1PerBlock(imageSize, pixels.ravel().tolist())
+        imageData, missed = encodeDXT1(pixels[:, :, :3])
+
+        assert not missed
+        assert imageData == expected
+
+def createEncodeImages():
+    rng = np.random.default_rng(1)
+    ramp = np.linspace(0.0, 1.0, 32, dtype = np.float32)[None, :].repeat(32, axis = 0)
+
+    noise = rng.random((32, 32, 3), dtype = np.float32)
+    opposed = np.stack((ramp, ramp[:, ::-1], ramp.T), axis = 2)  # one channel rises while another falls
+    flat = np.full((32, 32, 3), 0.5, dtype = np.float32)
+    black = np.zeros((32, 32, 3), dtype = np.float32)
+
+    return noise, opposed, flat, black
+
+@pytest.mark.parametrize('fit', ('BRIGHTNESS', 'BOX', 'AXIS', 'CLUSTER'))
+def test_encode_endpoint_order(fit):
+    for pixels in createEncodeImages():
+        imageData, _ = encodeDXT1(pixels, fit)
+        blocks = np.frombuffer(imageData, dtype = '<u2').reshape(-1, 4)
+
+        assert np.all(blocks[:, 0] > blocks[:, 1])
+
+# Endpoints handed over in either order come back descending, with the palette swapped to match
+@pytest.mark.parametrize('quantizedPalette', (False, True))
+def test_quantize_orders_endpoints(quantizedPalette):
+    rng = np.random.default_rng(2)
+    rgb1 = rng.random((256, 3), dtype = np.float32)
+    rgb2 = rng.random((256, 3), dtype = np.float32)
+
+    ushort1, ushort2, palettes = lib_gzrs2.quantizeDXT1Endpoints(rgb1, rgb2, quantizedPalette)
+    swappedUshort1, swappedUshort2, swappedPalettes = lib_gzrs2.quantizeDXT1Endpoints(rgb2, rgb1, quantizedPalette)
+
+    assert np.all(ushort1 >= ushort2)
+    assert np.array_equal(ushort1, swappedUshort1) and np.array_equal(ushort2, swappedUshort2)
+
+    # Only endpoints that quantize the same can differ in the unquantized palette
+    distinct = ushort1 != ushort2
+    assert np.array_equal(palettes[distinct], swappedPalettes[distinct])
+
+# Heights that leave a short last shard, and with two or more workers shards smaller than the default
+@pytest.mark.parametrize('fit', ('BRIGHTNESS', 'BOX', 'AXIS', 'CLUSTER'))
+@pytest.mark.parametrize('blockRows', (LM_ENCODE_SHARD_ROWS * 2 + 1, LM_ENCODE_SHARD_ROWS + 37))
+def test_sharded_encode_matches_serial(fit, blockRows):
+    pixels = np.random.default_rng(blockRows).random((blockRows * 4, 32, 3), dtype = np.float32)
+    expected = encodeDXT1(pixels, fit)
+
+    for workerCount in (1, 2, 3, 8, 0):
+        assert encodeDXT1Sharded(pixels, workerCount, fit) == expected
+
+def test_sharded_encode_with_ragged_shards(monkeypatch):
+    monkeypatch.setattr(lib_gzrs2, 'LM_ENCODE_SHARD_ROWS', 3)
+
+    pixels = np.random.default_rng(0).random((7 * 4, 12, 3), dtype = np.float32)
+    expected = encodeDXT1(pixels, 'CLUSTER')
+
+    for workerCount in (1, 2, 4, 16):
+        assert encodeDXT1Sharded(pixels, workerCount, 'CLUSTER') == expected
@@ -0,0 +1,109 @@
+import io, itertools
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from mathutils import Vector
+
+from io_scene_gzrs2.io_gzrs2 import *
+
+# The Vector readers io_gzrs2 used before the ndarray variants, kept verbatim as the reference
+def readUV2ArrayOld(file, length):
+    uvs = tuple(Vector(data) for data in readVec2Array(file, length))
+    for uv in uvs: uv.y = -uv.y
+
+    return uvs
+
+def readCoordinateArrayOld(file, length, convertUnits, flipY, *, swizzle = False):
+    coords = tuple(Vector(data) for data in readVec3Array(file, length))
+
+    if convertUnits:
+        for coord in coords:
+            coord *= 0.01
+
+    if flipY:
+        for coord in coords:
+            coord.y = -coord.y
+
+    if swizzle:
+        for coord in coords:
+            coord.xyz = coord.xzy
+
+    return coords
+
+def readDirectionArrayOld(file, length, flipY, *, swizzle = False):
+    dirs = tuple(Vector(data) for data in readVec3Array(file, length))
+
+    for dir in dirs:
+        dir.normalize()
+
+    if flipY:
+        for dir in dirs:
+            dir.y = -dir.y
+
+    if swizzle:
+        for dir in dirs:
+            dir.xyz = dir.xzy
+
+    return dirs
+
+LENGTH = 257
+
+def createData(width):
+    rng = np.random.default_rng(width)
+    data = rng.uniform(-5000.0, 5000.0, (LENGTH, width)).astype('<f4')
+    data[0] = 0.0   # zero length directions stay zero
+
+    return data.tobytes()
+
+def toArray(vectors):
+    return np.array([tuple(vector) for vector in vectors], dtype = np.float32)
+
+FLAGS = tuple(itertools.product((False, True), repeat = 2))
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+@pytest.mark.parametrize('flipY, swizzle', FLAGS)
+def test_coordinate_parity(convertUnits, flipY, swizzle):
+    data = createData(3)
+
+    expected = toArray(readCoordinateArrayOld(io.BytesIO(data), LENGTH, convertUnits, flipY, swizzle = swizzle))
+    coords = readCoordinateNdarray(io.BytesIO(data), LENGTH, convertUnits, flipY, swizzle = swizzle)
+    wrapped = toArray(readCoordinateArray(io.BytesIO(data), LENGTH, convertUnits, flipY, swizzle = swizzle))
+
+    assert coords.shape == (LENGTH, 3) and coords.dtype == np.float32
+    assert np.allclose(coords, expected, rtol = 1e-6, atol = 0.0)
+    assert np.array_equal(wrapped, coords)
+
+@pytest.mark.parametrize('flipY, swizzle', FLAGS)
+def test_direction_parity(flipY, swizzle):
+    data = createData(3)
+
+    expected = toArray(readDirectionArrayOld(io.BytesIO(data), LENGTH, flipY, swizzle = swizzle))
+    dirs = readDirectionNdarray(io.BytesIO(data), LENGTH, flipY, swizzle = swizzle)
+    wrapped = toArray(readDirectionArray(io.BytesIO(data), LENGTH, flipY, swizzle = swizzle))
+
+    assert dirs.shape == (LENGTH, 3) and dirs.dtype == np.float32
+    assert np.allclose(dirs, expected, rtol = 1e-6, atol = 1e-7)
+    assert np.array_equal(wrapped, dirs)
+    assert np.array_equal(dirs[0], (0.0, 0.0, 0.0))
+
+def test_uv_parity():
+    data = createData(2)
+
+    expected = toArray(readUV2ArrayOld(io.BytesIO(data), LENGTH))
+    uvs = readUV2Ndarray(io.BytesIO(data), LENGTH)
+
+    assert uvs.shape == (LENGTH, 2) and uvs.dtype == np.float32
+    assert np.array_equal(uvs, expected)
+    assert np.array_equal(toArray(readUV2Array(io.BytesIO(data), LENGTH)), uvs)
+
+def test_reads_advance_the_file():
+    data = createData(3) + b'tail'
+    file = io.BytesIO(data)
+
+    readCoordinateNdarray(file, LENGTH, True, True, swizzle = True)
+
+    assert file.read() == b'tail'
@@ -0,0 +1,132 @@
+import math
+
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+bpy = pytest.importorskip('bpy')
+
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.lib import lib_gzrs2
+from io_scene_gzrs2.lib.lib_gzrs2 import ensureWorld, nextSquare, unpackLmImages
+
+# Stands in for bpy.types.Image, keeps whatever the pixels were last set to as float32 without copying float32 buffers
+class Pixels:
+    def foreach_set(self, values):
+        self.values = np.asarray(values, dtype = np.float32)
+
+class Image:
+    def __init__(self, name, width, height):
+        self.name = name
+        self.size = (width, height)
+        self.packed = False
+        self._pixels = Pixels()
+
+    @property
+    def pixels(self):
+        return self._pixels
+
+    @pixels.setter
+    def pixels(self, values):
+        self._pixels.foreach_set(values)
+
+    def pack(self):
+        self.packed = True
+
+# Both the assembly under test and the reference below create images and set the world through these
+@pytest.fixture
+def images(monkeypatch):
+    world = SimpleNamespace(gzrs2 = SimpleNamespace(lightmapImage = None))
+    fakeBpy = SimpleNamespace(data = SimpleNamespace(images = SimpleNamespace(new = Image)))
+
+    for namespace in (vars(lib_gzrs2), globals()):
+        monkeypatch.setitem(namespace, 'bpy', fakeBpy)
+        monkeypatch.setitem(namespace, 'ensureWorld', lambda context: world)
+
+    return world.gzrs2
+
+# The per pixel assembly unpackLmImages() used before the numpy slicing, kept verbatim as the reference
+def unpackLmImagesOld(context, state):
+    numCells = len(state.lmImages)
+
+    if numCells == 0:
+        return
+
+    lmImage = state.lmImages[0]
+    imageSize = lmImage.size
+
+    if numCells == 1:
+        blLmImage = bpy.data.images.new(f"{ state.filename }_LmImage", imageSize, imageSize)
+        blLmImage.pixels = tuple(v for p in range(imageSize * imageSize) for v in (lmImage.data[p * 3 + 2], lmImage.data[p * 3 + 1], lmImage.data[p * 3 + 0], 1.0))
+    elif numCells > 1:
+        cellSpan = int(math.sqrt(nextSquare(numCells)))
+        atlasSize = imageSize * cellSpan
+        atlasPixels = [i for _ in range(atlasSize * atlasSize) for i in (0.0, 0.0, 0.0, 1.0)]
+
+        for c, lmImage in enumerate(state.lmImages):
+            cx = c % cellSpan
+            cy = cellSpan - 1 - c // cellSpan
+
+            for p in range(imageSize * imageSize):
+                px = p % imageSize
+                py = p // imageSize
+
+                a = cx * imageSize
+                a += cy * imageSize * atlasSize
+                a += px + py * atlasSize
+
+                atlasPixels[a * 4 + 0] = lmImage.data[p * 3 + 2]
+                atlasPixels[a * 4 + 1] = lmImage.data[p * 3 + 1]
+                atlasPixels[a * 4 + 2] = lmImage.data[p * 3 + 0]
+
+        blLmImage = bpy.data.images.new(f"{ state.filename }_LmAtlas{ numCells }", atlasSize, atlasSize)
+        blLmImage.pixels = atlasPixels
+
+    blLmImage.pack()
+
+    worldProps = ensureWorld(context).gzrs2
+    worldProps.lightmapImage = blLmImage
+
+    state.blLmImage = blLmImage
+
+def createState(cellCount, imageSize, seed = 0):
+    rng = np.random.default_rng(seed)
+
+    state = GZRS2State()
+    state.filename = 'map'
+    state.lmImages = [LmImage(imageSize, rng.random(imageSize * imageSize * 3, dtype = np.float32)) for _ in range(cellCount)]
+
+    return state
+
+# One image, a partly filled atlas, a barely started one and a full one
+@pytest.mark.parametrize('cellCount, imageSize', ((1, 64), (3, 32), (5, 16), (16, 32)))
+def test_atlas_matches_per_pixel_assembly(images, cellCount, imageSize):
+    state = createState(cellCount, imageSize)
+
+    unpackLmImages(None, state)
+    image = state.blLmImage
+
+    unpackLmImagesOld(None, state)
+    expected = state.blLmImage
+
+    assert image.name == expected.name and image.size == expected.size
+    assert image.packed and images.lightmapImage is expected
+    assert np.array_equal(image.pixels.values, expected.pixels.values)
+
+def test_empty_cells_stay_black(images):
+    state = createState(3, 8)
+    unpackLmImages(None, state)
+
+    # Rows run bottom up, so the first two cells fill the top half and the fourth one is bottom right
+    atlas = state.blLmImage.pixels.values.reshape(16, 16, 4)
+
+    assert not atlas[:8, 8:, :3].any() and np.all(atlas[:, :, 3] == 1.0)
+    assert atlas[8:, :8, :3].all() and atlas[8:, 8:, :3].all() and atlas[:8, :8, :3].all()
+
+def test_no_images(images):
+    state = createState(0, 8)
+    unpackLmImages(None, state)
+
+    assert state.blLmImage == [] and images.lightmapImage is None
@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2 import cache_gzrs2
+from io_scene_gzrs2.lib import lib_gzrs2
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import encodeDXT1, encodeDXT1Cached
+
+def createState(blockCache):
+    return RSLMExportState(lmWorkerCount = 1, lmEncodeFit = 'BOX', lmBlockCache = blockCache)
+
+# Starts the next export from the blocks the last one stored, the same way the sidecar does
+def carryOver(blockCache):
+    return LmBlockCache(previousHashes = blockCache.hashes, previousDigests = blockCache.digests, previousBlocks = blockCache.blocks)
+
+def test_unchanged_blocks_are_reused():
+    pixels = np.random.default_rng(0).random((16, 16, 3), dtype = np.float32)
+
+    state = createState(LmBlockCache())
+    first, _ = encodeDXT1Cached(pixels, state)
+
+    state = createState(carryOver(state.lmBlockCache))
+    second, _ = encodeDXT1Cached(pixels, state)
+
+    assert second == first
+    assert state.lmBlockCache.hitCount == state.lmBlockCache.blockCount == 16
+
+def test_hash_collision_is_not_reused(monkeypatch):
+    rng = np.random.default_rng(1)
+    before = rng.random((16, 16, 3), dtype = np.float32)
+    after = before.copy()
+    after[4:8, 8:12] = rng.random((4, 4, 3), dtype = np.float32)
+
+    # Every block hashes the same, only the digests can tell them apart
+    monkeypatch.setattr(lib_gzrs2, 'hashDXT1Blocks', lambda blocks: np.zeros(len(blocks), dtype = np.uint64))
+
+    state = createState(LmBlockCache())
+    encodeDXT1Cached(before, state)
+
+    state = createState(carryOver(state.lmBlockCache))
+    imageData, _ = encodeDXT1Cached(after, state)
+    expected, _ = encodeDXT1(after, 'BOX')
+
+    assert imageData == expected
+    assert state.lmBlockCache.hitCount == 15
+
+def test_sidecar_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_gzrs2, 'getLmBlockCacheKey', lambda state: 'key')
+
+    pixels = np.random.default_rng(2).random((16, 16, 3), dtype = np.float32)
+    cachePath = str(tmp_path / 'map.rs.lm.dxtcache.npz')
+
+    state = createState(LmBlockCache())
+    encodeDXT1Cached(pixels, state)
+
+    assert cache_gzrs2.saveLmBlockCache(cachePath, state.lmBlockCache, state)
+
+    blockCache = cache_gzrs2.loadLmBlockCache(cachePath, state)
+
+    assert len(blockCache.previousDigests) == 1
+    assert np.array_equal(blockCache.previousDigests[0], state.lmBlockCache.digests[0])
+
+    state = createState(blockCache)
+    encodeDXT1Cached(pixels, state)
+
+    assert state.lmBlockCache.hitCount == 16
@@ -0,0 +1,91 @@
+import os, io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import *
+
+from test_lm_mipmaps import readLmImages
+
+# Lays out an .lm the way exportLm does for the old format, every image is a BMP
+def writeLm(path, images):
+    file = io.BytesIO()
+
+    writeUInt(file, LM_ID)
+    writeUInt(file, LM_VERSION)
+    writeUInt(file, 0)
+    writeUInt(file, 0)
+    writeUInt(file, len(images))
+
+    for imageSize, imageData in images:
+        bmpSize = getBMPSize(imageSize)
+        writeUInt(file, bmpSize)
+        writeBMPHeader(file, imageSize, bmpSize)
+        file.write(imageData)
+
+    with open(path, 'wb') as output:
+        output.write(file.getvalue())
+
+def createFloats(rng, imageSize):
+    return rng.random(imageSize * imageSize * 4, dtype = np.float32).tolist()
+
+# The per texel reader the bulk read replaced, kept verbatim as the reference
+def readBMPOld(file, width, height):
+    return LmImage(width, tuple(readUChar(file) / 255.0 for _ in range(width * height * 3)))
+
+# Sides of one and two leave rows that are not a multiple of four bytes
+@pytest.mark.parametrize('imageSize', (1, 2, 4, 8))
+def test_packed_bmp_round_trip(tmp_path, imageSize):
+    rng = np.random.default_rng(imageSize)
+    state = RSLMExportState()
+    reports = GZRS2ReportBuffer()
+    floats = createFloats(rng, imageSize)
+
+    imageData = packLmImageData(reports, imageSize, floats, state)
+
+    assert len(imageData) == getBMPRowSize(imageSize) * imageSize
+
+    path = str(tmp_path / 'map.rs.lm')
+    writeLm(path, ((imageSize, bytes(imageData)), (imageSize, bytes(imageData))))
+
+    # Both images are read back whole, so the second one starts where the first one's padding ends
+    lmImages = readLmImages(path)
+    texels = (np.asarray(floats, dtype = np.float32).reshape(imageSize, imageSize, 4)[:, :, 2::-1] * 255).astype(np.uint8)
+    expected = np.divide(texels, np.float32(255.0), dtype = np.float32).ravel()
+
+    assert len(lmImages) == 2
+
+    for image in lmImages:
+        assert image.size == imageSize
+        assert np.array_equal(image.data, expected)
+
+def test_padding_is_zero():
+    state = RSLMExportState()
+    floats = [1.0] * (2 * 2 * 4)
+
+    imageData = packLmImageData(GZRS2ReportBuffer(), 2, floats, state)
+
+    assert bytes(imageData) == (b'\xff' * 6 + b'\x00' * 2) * 2
+
+def test_reader_matches_per_texel_reader(tmp_path):
+    rng = np.random.default_rng(0)
+    imageSize = 16
+    imageData = rng.integers(0, 256, getBMPRowSize(imageSize) * imageSize, dtype = np.uint8).tobytes()
+
+    path = str(tmp_path / 'map.rs.lm')
+    writeLm(path, ((imageSize, imageData),))
+
+    with open(path, 'rb') as file:
+        file.seek(20 + 4 + 14 + 40)
+        expected = readBMPOld(file, imageSize, imageSize)
+
+    image = readLmImages(path)[0]
+
+    assert image.size == expected.size
+    assert np.array_equal(image.data, np.asarray(expected.data, dtype = np.float32))
@@ -0,0 +1,107 @@
+import os, io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import *
+from io_scene_gzrs2.reading.readlm_gzrs2 import readLm
+
+def getLevelSize(size, level):
+    return max(1, (size >> level) // 4) ** 2 * 8
+
+# Lays out an .lm the way exportLm does, every image is a DDS holding its whole mip chain
+def writeLm(path, images):
+    file = io.BytesIO()
+
+    writeUInt(file, LM_ID)
+    writeUInt(file, LM_VERSION_EXT)
+    writeUInt(file, 0)
+    writeUInt(file, 0)
+    writeUInt(file, len(images))
+
+    for imageSize, mipCount, imageData in images:
+        ddsSize = 76 + 32 + 20 + len(imageData)
+        writeUInt(file, ddsSize)
+        writeDDSHeader(file, imageSize, imageSize ** 2, ddsSize, mipCount)
+        file.write(imageData)
+
+    with open(path, 'wb') as output:
+        output.write(file.getvalue())
+
+def readLmImages(path):
+    state = GZRS2State()
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = readLm(reports, file, path, state)
+        end = file.tell()
+
+    assert result is None and not reports.reports
+    assert end == os.path.getsize(path)
+
+    return state.lmImages
+
+def createGradient(imageSize):
+    ramp = np.linspace(0.0, 1.0, imageSize, dtype = np.float32)
+    pixels = np.empty((imageSize, imageSize, 4), dtype = np.float32)
+    pixels[:, :, 0] = ramp[None, :]
+    pixels[:, :, 1] = ramp[:, None]
+    pixels[:, :, 2] = 0.5
+    pixels[:, :, 3] = 1.0
+
+    return pixels.ravel().tolist()
+
+@pytest.mark.parametrize('mipmaps', ('BOX', 'KAISER'))
+def test_exported_chain_round_trip(tmp_path, mipmaps):
+    state = RSLMExportState(lmVersion4 = True, lmWorkerCount = 1, lmEncodeFit = 'BOX', lmMipmaps = mipmaps)
+    reports = GZRS2ReportBuffer()
+    images = []
+
+    for imageSize in (32, 8):
+        mipCount = getLmMipCount(imageSize, state)
+        imageData = packLmImageData(reports, imageSize, createGradient(imageSize), state)
+
+        assert mipCount == int(np.log2(imageSize)) - 1
+        assert len(imageData) == sum(getLevelSize(imageSize, m) for m in range(mipCount))
+
+        images.append((imageSize, mipCount, bytes(imageData)))
+
+    path = str(tmp_path / 'chain.rs.lm')
+    writeLm(path, images)
+
+    for image, (imageSize, _, imageData) in zip(readLmImages(path), images):
+        expected = decodeDXT1(imageData[:imageSize ** 2 // 2], imageSize, imageSize)[:, :, ::-1].ravel()
+
+        assert image.size == imageSize
+        assert np.array_equal(image.data, expected)
+
+# Chains from other tools run down to 1x1, the levels under 4x4 still take a whole block each
+def test_chain_with_sub_block_tail(tmp_path):
+    rng = np.random.default_rng(0)
+    images = []
+
+    for imageSize in (8, 4):
+        mipCount = int(np.log2(imageSize)) + 1
+        levelSizes = [getLevelSize(imageSize, m) for m in range(mipCount)]
+
+        assert levelSizes[-2:] == [8, 8]
+
+        images.append((imageSize, mipCount, rng.integers(0, 256, sum(levelSizes), dtype = np.uint8).tobytes()))
+
+    path = str(tmp_path / 'tail.rs.lm')
+    writeLm(path, images)
+
+    lmImages = readLmImages(path)
+
+    assert len(lmImages) == len(images)
+
+    for image, (imageSize, _, imageData) in zip(lmImages, images):
+        expected = decodeDXT1(imageData[:imageSize ** 2 // 2], imageSize, imageSize)[:, :, ::-1].ravel()
+
+        assert np.array_equal(image.data, expected)
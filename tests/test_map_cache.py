@@ -0,0 +1,161 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+import io_scene_gzrs2
+
+from mathutils import Vector
+
+from io_scene_gzrs2 import cache_gzrs2
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.cache_gzrs2 import MAP_CACHE_FLAGS, getMapCacheKey, getMapCachePath, loadMapCache, saveMapCache, loadLmBlockCache
+
+@pytest.fixture(autouse = True)
+def version(monkeypatch):
+    monkeypatch.setattr(io_scene_gzrs2, 'bl_info', { 'version': (1, 0, 0) }, raising = False)
+
+@pytest.fixture
+def sources(tmp_path):
+    rspath = tmp_path / 'map.rs'
+    xmlpath = tmp_path / 'map.rs.xml'
+    rspath.write_bytes(b'rs' * 16)
+    xmlpath.write_bytes(b'<XML></XML>')
+
+    return (str(rspath), str(xmlpath), False, False, False, False)
+
+def createState():
+    rng = np.random.default_rng(0)
+
+    state = GZRS2State()
+    state.rsCPolygonCount = 1
+    state.rsOctreeBuffers = RsTreeBuffers(positions = rng.random((6, 3), dtype = np.float32), vertexCounts = np.array((3, 3), dtype = np.int32))
+    state.rsOctreeBounds = [(Vector((0.0, 0.0, 0.0)), Vector((1.0, 2.0, 3.0)))]
+    state.navVerts = (Vector((0.0, 0.0, 0.0)), Vector((1.0, 0.0, 0.0)), Vector((0.0, 1.0, 0.0)))
+    state.navFaces = ((0, 1, 2),)
+    state.navLinks = ((-1, -1, -1),)
+    state.lmImages = [LmImage(2, rng.random(2 * 2 * 3, dtype = np.float32))]
+    state.lmPolygonOrder = (1, 0)
+    state.lmLightmapIDs = (0, 0)
+    state.doNavigation = True
+
+    return state
+
+def assertUntouched(state):
+    assert state.rsCPolygonCount is None and not state.doNavigation
+    assert len(state.rsOctreeBuffers.positions) == 0 and not state.navVerts and not state.lmImages
+
+def test_key_is_stable(sources):
+    assert getMapCacheKey(sources, GZRS2State()) == getMapCacheKey(sources, GZRS2State())
+
+def test_key_changes_with_size(sources):
+    before = getMapCacheKey(sources, GZRS2State())
+    stat = os.stat(sources[0])
+
+    with open(sources[0], 'ab') as file:
+        file.write(b'\x00')
+
+    # Keeps the mtime, so only the size can tell
+    os.utime(sources[0], ns = (stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert getMapCacheKey(sources, GZRS2State()) != before
+
+def test_key_changes_with_mtime(sources):
+    before = getMapCacheKey(sources, GZRS2State())
+    stat = os.stat(sources[1])
+    os.utime(sources[1], ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    assert getMapCacheKey(sources, GZRS2State()) != before
+
+def test_key_changes_with_version(sources, monkeypatch):
+    before = getMapCacheKey(sources, GZRS2State())
+
+    monkeypatch.setattr(io_scene_gzrs2, 'bl_info', { 'version': (1, 0, 1) })
+    assert getMapCacheKey(sources, GZRS2State()) != before
+
+    monkeypatch.undo()
+    monkeypatch.setattr(io_scene_gzrs2, 'bl_info', { 'version': (1, 0, 0) }, raising = False)
+    monkeypatch.setattr(cache_gzrs2, 'MAP_CACHE_VERSION', cache_gzrs2.MAP_CACHE_VERSION + 1)
+    assert getMapCacheKey(sources, GZRS2State()) != before
+
+@pytest.mark.parametrize('flag', MAP_CACHE_FLAGS + ('convertUnits',))
+def test_key_changes_with_flags(sources, flag):
+    state = GZRS2State()
+    before = getMapCacheKey(sources, state)
+    setattr(state, flag, not getattr(state, flag))
+
+    assert getMapCacheKey(sources, state) != before
+
+def test_key_changes_when_a_file_appears(sources, tmp_path):
+    before = getMapCacheKey(sources, GZRS2State())
+    colpath = tmp_path / 'map.rs.col'
+    colpath.write_bytes(b'col')
+
+    assert getMapCacheKey(sources[:3] + (str(colpath),) + sources[4:], GZRS2State()) != before
+
+def test_cache_is_off_without_a_mode(sources):
+    assert getMapCachePath(sources[0], 'OFF') is None
+    assert getMapCachePath(sources[0], 'LOCAL') == f"{ sources[0] }{ os.extsep }{ MAP_CACHE_EXTENSION }"
+
+def test_hit_restores_the_state(tmp_path):
+    cachePath = str(tmp_path / 'map.rs.gzrs2cache.npz')
+    state = createState()
+
+    assert saveMapCache(cachePath, 'key', state, 1.5)
+
+    restored = GZRS2State()
+    assert loadMapCache(cachePath, 'key', restored) == 1.5
+
+    assert restored.doNavigation and not restored.doConvex
+    assert restored.rsCPolygonCount == 1 and restored.rsBNodeCount is None
+    assert np.array_equal(restored.rsOctreeBuffers.positions, state.rsOctreeBuffers.positions)
+    assert np.array_equal(restored.rsOctreeBuffers.vertexCounts, state.rsOctreeBuffers.vertexCounts)
+    assert [tuple(map(tuple, bounds)) for bounds in restored.rsOctreeBounds] == [((0.0, 0.0, 0.0), (1.0, 2.0, 3.0))]
+    assert [tuple(vertex) for vertex in restored.navVerts] == [tuple(vertex) for vertex in state.navVerts]
+    assert restored.navFaces == state.navFaces and restored.navLinks == state.navLinks
+    assert restored.lmImages[0].size == 2 and np.array_equal(restored.lmImages[0].data, state.lmImages[0].data)
+    assert restored.lmPolygonOrder == state.lmPolygonOrder and restored.lmLightmapIDs == state.lmLightmapIDs
+
+def test_miss_leaves_the_state_alone(tmp_path):
+    cachePath = str(tmp_path / 'map.rs.gzrs2cache.npz')
+    saveMapCache(cachePath, 'key', createState(), 1.5)
+
+    state = GZRS2State()
+
+    assert loadMapCache(cachePath, 'other', state) is None
+    assert loadMapCache(str(tmp_path / 'missing.npz'), 'key', state) is None
+    assert loadMapCache(None, 'key', state) is None
+    assertUntouched(state)
+
+# Garbage is not a zip at all, a cut off cache loses its central directory, a cut off member runs out of bytes
+@pytest.mark.parametrize('damage', ('garbage', 'truncated', 'member'))
+def test_damaged_cache_is_a_miss(tmp_path, damage):
+    cachePath = str(tmp_path / 'map.rs.gzrs2cache.npz')
+    saveMapCache(cachePath, 'key', createState(), 1.5)
+
+    with open(cachePath, 'rb') as file:
+        data = file.read()
+
+    if damage == 'garbage':         data = b'\x00' * len(data)
+    elif damage == 'truncated':     data = data[:len(data) // 2]
+    elif damage == 'member':        data = data.replace(b'PK\x03\x04', b'PK\x03\x05', 1)
+
+    with open(cachePath, 'wb') as file:
+        file.write(data)
+
+    state = GZRS2State()
+
+    assert loadMapCache(cachePath, 'key', state) is None
+    assertUntouched(state)
+
+def test_damaged_block_cache_is_empty(tmp_path):
+    cachePath = tmp_path / 'map.rs.lm.dxtcache.npz'
+    cachePath.write_bytes(b'PK\x03\x04' + bytes(64))
+
+    blockCache = loadLmBlockCache(str(cachePath), RSLMExportState(lmEncodeFit = 'BOX'))
+
+    assert blockCache.previousHashes == [] and blockCache.previousBlocks == []
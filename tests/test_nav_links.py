@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.lib.lib_gzrs2 import countDegenerateNavFaces, createNavLinks
+
+# A grid of quads split into triangles, shuffled so neighbours are far apart in face order
+def createGrid(width, height, seed = 0):
+    faces = []
+
+    for y in range(height):
+        for x in range(width):
+            v = y * (width + 1) + x
+            faces.append((v, v + 1, v + width + 2))
+            faces.append((v, v + width + 2, v + width + 1))
+
+    order = np.random.default_rng(seed).permutation(len(faces))
+
+    return [faces[f] for f in order.tolist()]
+
+# Stands in for bpy.types.MeshLoopTriangle, edge_keys holds the sorted vertex pairs of each edge in loop order
+class LoopTriangle:
+    def __init__(self, index, vertices):
+        v1, v2, v3 = vertices
+
+        self.index = index
+        self.vertices = vertices
+        self.edge_keys = ((min(v1, v2), max(v1, v2)), (min(v2, v3), max(v2, v3)), (min(v3, v1), max(v3, v1)))
+
+# The nested searches exportNav used before the hash maps, kept verbatim as the reference
+def countDegenerateOld(loopTriangles):
+    uniquePairs = tuple((t1, t2) for t1 in loopTriangles for t2 in loopTriangles if t2 != t1)
+
+    return sum(1 for t1, t2 in uniquePairs if sum(1 for v1 in t1.vertices for v2 in t2.vertices if v2 == v1) == 3)
+
+def createLinksOld(loopTriangles):
+    linkIndices = []
+
+    for t1, k1 in iter((t1, k1) for t1 in loopTriangles for k1 in t1.edge_keys):
+        for t2, k2 in iter((t2, k2) for t2 in loopTriangles for k2 in t2.edge_keys if t2 != t1):
+            if k2 == k1:
+                linkIndices.append(t2.index)
+                break
+        else:
+            linkIndices.append(-1)
+
+    return tuple(linkIndices)
+
+def toLoopTriangles(faces):
+    return [LoopTriangle(f, face) for f, face in enumerate(faces)]
+
+@pytest.mark.parametrize('seed', range(3))
+def test_links_match_nested_search(seed):
+    faces = createGrid(6, 5, seed)
+
+    # A fan sharing one edge with three faces, the first other face wins
+    faces += [(0, 1, 1000), (1, 0, 1001)]
+
+    assert createNavLinks(faces) == createLinksOld(toLoopTriangles(faces))
+
+def test_links_of_a_lone_face():
+    assert createNavLinks([(0, 1, 2)]) == (-1, -1, -1)
+    assert createNavLinks([]) == ()
+
+def test_clean_grid_is_not_degenerate():
+    faces = createGrid(4, 4)
+
+    assert countDegenerateNavFaces(faces) == 0
+    assert countDegenerateOld(toLoopTriangles(faces)) == 0
+
+def test_duplicate_faces_are_degenerate():
+    faces = createGrid(4, 4)
+    faces.append(tuple(reversed(faces[3])))
+
+    assert countDegenerateNavFaces(faces) == 2
+    assert countDegenerateOld(toLoopTriangles(faces)) > 0
+
+# The old pairwise pass caught these through the repeated matches against any face sharing the vertices
+@pytest.mark.parametrize('face', ((0, 0, 1), (5, 6, 6), (7, 8, 7), (3, 3, 3)))
+def test_repeated_indices_are_degenerate(face):
+    faces = createGrid(4, 4)
+    faces.append(face)
+
+    assert countDegenerateNavFaces(faces) == 1
+    assert countDegenerateOld(toLoopTriangles(faces)) > 0
@@ -0,0 +1,192 @@
+import math, heapq
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.lib.navquery_gzrs2 import *
+
+# Unit cells split into two triangles each, cells sharing a side share its vertices
+# Returns the vertices, the faces and the cell of every face
+def createCells(cells, height = 0.0):
+    vertexIDs = {}
+    vertices, faces, faceCells = [], [], []
+
+    def vertexID(x, y):
+        if (x, y) not in vertexIDs:
+            vertexIDs[(x, y)] = len(vertices)
+            vertices.append((float(x), float(y), height))
+
+        return vertexIDs[(x, y)]
+
+    for c, (x, y) in enumerate(cells):
+        v0, v1, v2, v3 = vertexID(x, y), vertexID(x + 1, y), vertexID(x + 1, y + 1), vertexID(x, y + 1)
+        faces += [(v0, v1, v2), (v0, v2, v3)]
+        faceCells += [c, c]
+
+    return vertices, faces, faceCells
+
+STRIP = tuple((x, 0) for x in range(10))
+
+# Five cells along x, then four more up the last column, the inner corner is at (4, 1)
+ELBOW = tuple((x, 0) for x in range(5)) + tuple((4, y) for y in range(1, 5))
+
+def createLists(query):
+    links = query.links.tolist()
+    linkCosts = np.linalg.norm(query.centers[np.maximum(query.links, 0)] - query.centers[:, None], axis = 2).tolist()
+    centers = [tuple(center) for center in query.centers.tolist()]
+
+    return links, linkCosts, centers
+
+def getCorridorCost(linkCosts, links, corridor):
+    return sum(linkCosts[face][links[face].index(nextFace)] for face, nextFace in zip(corridor, corridor[1:]))
+
+# Plain Dijkstra over the same link costs, the shortest corridor any admissible search has to match
+def getShortestCost(links, linkCosts, startFace, endFace):
+    costs = { startFace: 0.0 }
+    heap = [(0.0, startFace)]
+
+    while heap:
+        cost, face = heapq.heappop(heap)
+
+        if face == endFace:
+            return cost
+
+        if cost > costs[face]:
+            continue
+
+        for neighbor, linkCost in zip(links[face], linkCosts[face]):
+            if neighbor >= 0 and cost + linkCost < costs.get(neighbor, math.inf):
+                costs[neighbor] = cost + linkCost
+                heapq.heappush(heap, (cost + linkCost, neighbor))
+
+    return None
+
+def assertCorridor(query, corridor, faceCells, startFace, endFace):
+    links = query.links.tolist()
+
+    assert corridor[0] == startFace and corridor[-1] == endFace
+    assert all(nextFace in links[face] for face, nextFace in zip(corridor, corridor[1:]))
+
+    # Cells are visited in order and none is skipped or revisited
+    cells = [faceCells[face] for face in corridor]
+    assert sorted(set(cells)) == list(range(cells[0], cells[-1] + 1))
+    assert cells == sorted(cells)
+
+def test_strip_path_is_straight():
+    vertices, faces, faceCells = createCells(STRIP)
+    query = createNavQueryMesh(vertices, faces)
+    start, end = (0.2, 0.3, 0.0), (9.7, 0.6, 0.0)
+
+    paths, startFaces, endFaces = navFindPaths(query, (start,), (end,))
+    corridor = navSearchCorridor(*createLists(query), int(startFaces[0]), int(endFaces[0]))
+
+    assertCorridor(query, corridor, faceCells, startFaces[0], endFaces[0])
+    assert faceCells[corridor[0]] == 0 and faceCells[corridor[-1]] == len(STRIP) - 1
+
+    # Nothing blocks the view, so the funnel keeps only the ends
+    assert np.allclose(paths[0], (start, end), rtol = 0.0, atol = 1e-9)
+
+def test_elbow_path_bends_at_the_inner_corner():
+    vertices, faces, faceCells = createCells(ELBOW, 2.0)
+    query = createNavQueryMesh(vertices, faces)
+    start, end = (0.5, 0.5, 2.0), (4.5, 4.5, 2.0)
+
+    paths, startFaces, endFaces = navFindPaths(query, (start,), (end,))
+    corridor = navSearchCorridor(*createLists(query), int(startFaces[0]), int(endFaces[0]))
+
+    assertCorridor(query, corridor, faceCells, startFaces[0], endFaces[0])
+    assert faceCells[corridor[0]] == 0 and faceCells[corridor[-1]] == len(ELBOW) - 1
+
+    assert np.allclose(paths[0], (start, (4.0, 1.0, 2.0), end), rtol = 0.0, atol = 1e-9)
+
+# The same elbow walked the other way bends around the same corner
+def test_elbow_path_is_reversible():
+    vertices, faces, _ = createCells(ELBOW)
+    query = createNavQueryMesh(vertices, faces)
+
+    path = navFindPath(query, (4.5, 4.5, 0.0), (0.5, 0.5, 0.0))
+
+    assert np.allclose(path, ((4.5, 4.5, 0.0), (4.0, 1.0, 0.0), (0.5, 0.5, 0.0)), rtol = 0.0, atol = 1e-9)
+
+def test_funnel_around_two_corners():
+    # A zigzag, the path hugs (1, 1) turning up and (2, 2) turning right again
+    cells = ((0, 0), (1, 0), (1, 1), (1, 2), (2, 2), (3, 2))
+    vertices, faces, _ = createCells(cells)
+    query = createNavQueryMesh(vertices, faces)
+
+    path = navFindPath(query, (0.5, 0.5, 0.0), (3.5, 2.5, 0.0))
+
+    assert np.allclose(path, ((0.5, 0.5, 0.0), (1.0, 1.0, 0.0), (2.0, 2.0, 0.0), (3.5, 2.5, 0.0)), rtol = 0.0, atol = 1e-9)
+
+def test_same_face_path():
+    vertices, faces, _ = createCells(STRIP)
+    query = createNavQueryMesh(vertices, faces)
+
+    path = navFindPath(query, (0.6, 0.2, 0.0), (0.9, 0.4, 0.0))
+
+    assert np.allclose(path, ((0.6, 0.2, 0.0), (0.9, 0.4, 0.0)), rtol = 0.0, atol = 1e-9)
+
+# With the default weight the corridor is as short as the one Dijkstra finds, a heavier weight stays within its factor
+@pytest.mark.parametrize('heuristicWeight', (NAV_QUERY_HEURISTIC_WEIGHT, 2.0))
+def test_corridor_cost(heuristicWeight):
+    rng = np.random.default_rng(0)
+    cells = [(x, y) for x in range(12) for y in range(12) if rng.random() < 0.8 or x == 0]
+    vertices, faces, _ = createCells(cells)
+    query = createNavQueryMesh(vertices, faces)
+    links, linkCosts, centers = createLists(query)
+
+    for startFace, endFace in rng.integers(0, len(faces), (64, 2)).tolist():
+        shortest = getShortestCost(links, linkCosts, startFace, endFace)
+        corridor = navSearchCorridor(links, linkCosts, centers, startFace, endFace, heuristicWeight)
+
+        if shortest is None:
+            assert corridor is None
+            continue
+
+        cost = getCorridorCost(linkCosts, links, corridor)
+
+        assert cost >= shortest - 1e-9 and cost <= shortest * heuristicWeight + 1e-9
+
+        if heuristicWeight == 1.0:
+            assert math.isclose(cost, shortest, rel_tol = 1e-12, abs_tol = 1e-12)
+
+def test_islands():
+    stripVertices, stripFaces, _ = createCells(STRIP)
+    otherVertices, otherFaces, _ = createCells(ELBOW, 10.0)
+    offset = len(stripVertices)
+
+    vertices = stripVertices + otherVertices + [(0.5, -1.0, 0.0)]
+    faces = stripFaces + [tuple(v + offset for v in face) for face in otherFaces] + [(0, 1, len(vertices) - 1)]
+    query = createNavQueryMesh(vertices, faces)
+
+    # The strip with the triangle hanging off its first edge, the elbow on its own
+    assert query.islandCount == 2
+    assert len(set(query.islands[:len(stripFaces)].tolist())) == 1
+    assert set(query.islands[len(stripFaces):-1].tolist()) == { 1 }
+    assert query.islands[-1] == query.islands[0]
+
+    paths, startFaces, endFaces = navFindPaths(query, ((0.5, 0.5, 0.0), (0.5, 0.5, 0.0)), ((4.5, 4.5, 10.0), (9.5, 0.5, 0.0)))
+
+    assert startFaces[0] >= 0 and endFaces[0] >= 0 and paths[0] is None
+    assert paths[1] is not None
+
+def test_find_islands_of_loose_links():
+    links = ((1, -1, -1), (0, -1, -1), (-1, -1, -1), (4, -1, -1), (3, -1, -1))
+
+    islands, islandCount = findNavIslands(links)
+
+    assert islandCount == 3
+    assert islands.tolist() == [0, 0, 1, 2, 2]
+
+def test_off_mesh_points():
+    vertices, faces, _ = createCells(STRIP)
+    query = createNavQueryMesh(vertices, faces)
+
+    paths, startFaces, endFaces = navFindPaths(query, ((0.5, 0.5, 0.0), (-3.0, 0.5, 0.0)), ((20.0, 0.5, 0.0), (5.5, 0.5, 0.0)))
+
+    assert paths == [None, None]
+    assert startFaces[0] >= 0 and endFaces[0] == -1 and startFaces[1] == -1
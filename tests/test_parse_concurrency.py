@@ -0,0 +1,116 @@
+import io, struct
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields, is_dataclass
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from mathutils import Vector
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.lib.lib_gzrs2 import writeDDSHeader
+from io_scene_gzrs2.importing.import_gzrs2 import readMapFiles
+
+from test_rs2_tree import MATERIAL_COUNT, createFixture, countNodes, countPolygons, countVertices, writeBsp, writeRs
+
+# A root with a solid positive leaf holding two triangles
+def writeCol(path):
+    triangles = np.random.default_rng(1).uniform(-100.0, 100.0, (2, 12)).astype('<f4')
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<4I', COL1_ID, COL1_VERSION, 2, len(triangles)))
+        file.write(struct.pack('<4f?', 0.0, 0.0, 1.0, 0.0, False) + b'\x01')
+        file.write(struct.pack('<4f?', 1.0, 0.0, 0.0, 5.0, True) + b'\x00\x00')
+        file.write(struct.pack('<I', len(triangles)) + triangles.tobytes())
+        file.write(b'\x00' + struct.pack('<I', 0))
+
+def writeNav(path):
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<2Ii', NAV_ID, NAV_VERSION, 4))
+        file.write(struct.pack('<12f', 0.0, 0.0, 0.0, 100.0, 0.0, 0.0, 100.0, 100.0, 0.0, 0.0, 100.0, 0.0))
+        file.write(struct.pack('<i6H', 2, 0, 1, 2, 0, 2, 3))
+        file.write(struct.pack('<6i', -1, 1, -1, -1, -1, 0))
+
+def writeLm(path, root):
+    polygonCount = countPolygons(root)
+    file = io.BytesIO()
+    file.write(struct.pack('<5I', LM_ID, LM_VERSION_EXT, 1, countNodes(root), 1))
+
+    ddsSize = 76 + 32 + 20 + 8
+    file.write(struct.pack('<I', ddsSize))
+    writeDDSHeader(file, 4, 4 * 4, ddsSize, 1)
+    file.write(struct.pack('<2HI', 0xffff, 0x001f, 0x1b1b1b1b))
+
+    file.write(struct.pack(f"<{ polygonCount }I", *reversed(range(polygonCount))))
+    file.write(struct.pack(f"<{ polygonCount }I", *([0] * polygonCount)))
+    file.write(np.random.default_rng(2).random((countVertices(root), 2), dtype = np.float32).astype('<f4').tobytes())
+
+    with open(path, 'wb') as output:
+        output.write(file.getvalue())
+
+@pytest.fixture
+def paths(tmp_path):
+    root = createFixture()
+    rspath = str(tmp_path / 'map.rs')
+    writeRs(rspath, root)
+    writeBsp(f"{ rspath }.bsp", root)
+    writeCol(f"{ rspath }.col")
+    writeNav(f"{ rspath }.nav")
+    writeLm(f"{ rspath }.lm", root)
+
+    return rspath, f"{ rspath }.bsp", f"{ rspath }.col", f"{ rspath }.nav", f"{ rspath }.lm"
+
+def parse(paths, workerCount):
+    state = GZRS2State()
+    state.xmlRsMats = [None] * MATERIAL_COUNT
+    state.doConvex = True
+    reports = GZRS2ReportBuffer()
+
+    with ThreadPoolExecutor(max_workers = workerCount) as executor:
+        cancelled = readMapFiles(reports, executor, state, {}, *paths)
+
+    return cancelled, state, reports.reports
+
+def isSame(a, b):
+    if isinstance(a, io.StringIO):      return isinstance(b, io.StringIO) and a.getvalue() == b.getvalue()
+    if isinstance(a, np.ndarray):       return isinstance(b, np.ndarray) and a.dtype == b.dtype and np.array_equal(a, b)
+    if isinstance(a, Vector):           return isinstance(b, Vector) and tuple(a) == tuple(b)
+    if is_dataclass(a):                 return type(a) is type(b) and all(isSame(getattr(a, f.name), getattr(b, f.name)) for f in fields(a))
+    if isinstance(a, (list, tuple)):    return type(a) is type(b) and len(a) == len(b) and all(map(isSame, a, b))
+
+    return a == b
+
+def test_concurrent_parse_matches_serial(paths):
+    cancelled, serial, serialReports = parse(paths, 1)
+
+    assert not cancelled
+    assert len(serial.bspTreeBuffers.positions) and serial.col1Tree is not None and serial.navFaces and serial.lmImages
+
+    for _ in range(4):
+        cancelled, concurrent, concurrentReports = parse(paths, PARSE_THREAD_COUNT)
+
+        assert not cancelled
+        assert concurrentReports == serialReports
+
+        for stateField in fields(GZRS2State):
+            assert isSame(getattr(concurrent, stateField.name), getattr(serial, stateField.name)), stateField.name
+
+# The .rs fails first, the workers already running are still joined and their reports kept
+def test_cancelled_rs_joins_the_other_workers(paths):
+    with open(paths[0], 'r+b') as file:
+        file.write(b'\x00' * 4)
+
+    with open(paths[3], 'r+b') as file:
+        file.write(b'\x00' * 4)
+
+    cancelled, state, reports = parse(paths, PARSE_THREAD_COUNT)
+
+    assert cancelled
+    assert [message.split('!')[0] for _, message in reports] == ["GZRS2: RS header invalid", "GZRS2: NAV header invalid"]
+    assert len(state.bspTreeBuffers.positions) == 0 and not state.lmImages
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from mathutils import Vector
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.lib import lib_gzrs2
+from io_scene_gzrs2.lib.lib_gzrs2 import *
+
+# Axis aligned boxes scattered over a floor plan, six quads each with whole number corners
+def createBoxes(count, seed = 3):
+    rng = random.Random(seed)
+    quads = []
+
+    for _ in range(count):
+        cx, cy = rng.uniform(-4000, 4000), rng.uniform(-4000, 4000)
+        sx, sy, sz = rng.uniform(50, 400), rng.uniform(50, 400), rng.uniform(100, 600)
+
+        corners = ((-sx, -sy), (sx, -sy), (sx, sy), (-sx, sy))
+        top = tuple(Vector((round(cx + x), round(cy + y), round(sz))) for x, y in corners)
+        bottom = tuple(Vector((round(cx + x), round(cy + y), 0)) for x, y in corners)
+
+        quads.append(top)
+        quads.append(tuple(reversed(bottom)))
+        quads += [(bottom[i], bottom[(i + 1) % 4], top[(i + 1) % 4], top[i]) for i in range(4)]
+
+    return quads
+
+def createPolygons(quads):
+    polygons = []
+
+    for q, quad in enumerate(quads):
+        normal = (quad[1] - quad[0]).cross(quad[2] - quad[0]).normalized()
+        vertices = tuple(Rs2TreeVertex(vertex.copy(), normal.copy(), Vector((0, 0)), Vector((0, 0))) for vertex in quad)
+
+        polygons.append(Rs2TreePolygonExport(0, q, 0, 4, vertices, normal.copy(), False))
+
+    return tuple(polygons)
+
+def buildTree(quads, sampleCount):
+    polygons = createPolygons(quads)
+    bbmin, bbmax = calcPolygonBounds(polygons)
+
+    return createBsptreeNode(polygons, [], bbmin, bbmax, sampleCount = sampleCount)
+
+def flattenTree(node):
+    if node is None:
+        return []
+
+    polygons = [tuple(tuple(vertex.pos) for vertex in polygon.vertices) for polygon in node.polygons]
+
+    return [tuple(node.plane), polygons] + flattenTree(node.positive) + flattenTree(node.negative)
+
+# The exhaustive search choosePlane() ran before sampling, kept as the reference without its commented out cost
+def choosePlaneOld(polygons, *, checkCounts = False, getter = lambda x: x):
+    chosenCost = float('inf')
+    chosenPolygon = None
+    chosenPlane = None
+
+    for polygon1 in polygons:
+        if polygon1.used:
+            continue
+
+        counts = [0 for _ in range(5)]
+
+        normal = polygon1.normal.normalized()
+        plane = normal.to_4d()
+        plane.w = -normal.dot(getter(polygon1.vertices[0]))
+
+        for polygon2 in polygons:
+            counts[classifyFacing(polygon2, plane, getter = getter)] += 1
+
+        # Always prioritize balance
+        cost = abs(counts[FACING_POSITIVE] - counts[FACING_NEGATIVE])
+        cost += counts[FACING_BOTH] / 2
+        cost += (counts[FACING_POS_COP] + counts[FACING_NEG_COP]) / 10
+
+        if cost >= chosenCost:
+            continue
+
+        if checkCounts:
+            posCount = counts[FACING_POSITIVE] + counts[FACING_POS_COP]
+            negCount = counts[FACING_NEGATIVE] + counts[FACING_NEG_COP]
+
+            if posCount == 0 or negCount == 0:
+                continue
+
+        chosenCost = cost
+        chosenPolygon = polygon1
+        chosenPlane = plane
+
+    if chosenPolygon:
+        chosenPolygon.used = True
+
+    return chosenPlane
+
+# Enough polygons that the upper nodes sample and the lower ones search exhaustively
+QUADS = createBoxes(24)
+
+def test_exhaustive_search_is_unchanged(monkeypatch):
+    expected = flattenTree(buildTree(QUADS, 0))
+
+    monkeypatch.setattr(lib_gzrs2, 'choosePlane', lambda polygons, *, checkCounts, getter, sampleCount, rng: choosePlaneOld(polygons, checkCounts = checkCounts, getter = getter))
+
+    assert flattenTree(buildTree(QUADS, 0)) == expected
+
+@pytest.mark.parametrize('sampleCount', (8, 32))
+def test_sampled_build_is_deterministic(sampleCount):
+    assert len(QUADS) > TREE_SAMPLE_THRESHOLD
+
+    tree = buildTree(QUADS, sampleCount)
+
+    assert flattenTree(buildTree(QUADS, sampleCount)) == flattenTree(tree)
+    assert getTreePolygonCount(tree) >= len(QUADS)
+
+def test_sampling_changes_the_tree():
+    assert flattenTree(buildTree(QUADS, 8)) != flattenTree(buildTree(QUADS, 0))
+
+# The same seed picks the same planes from a fresh generator, the rest of the polygons stay unused
+def test_choose_plane_with_fixed_seed():
+    planes, used = [], []
+
+    for _ in range(2):
+        polygons = createPolygons(QUADS)
+        planes.append(tuple(choosePlane(polygons, checkCounts = True, getter = lambda x: x.pos, sampleCount = 8, rng = random.Random(TREE_SAMPLE_SEED))))
+        used.append([p for p, polygon in enumerate(polygons) if polygon.used])
+
+    assert planes[0] == planes[1]
+    assert used[0] == used[1] and len(used[0]) == 1
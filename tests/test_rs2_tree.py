@@ -0,0 +1,165 @@
+import io, struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+pytest.importorskip('bpy')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.classes_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+from io_scene_gzrs2.reading.readbsp_gzrs2 import readBsp
+from io_scene_gzrs2.reading.readrs_gzrs2 import readRs
+
+MATERIAL_COUNT = 3
+
+# A root with two leaves, every node holds polygons of random vertices
+def createFixture():
+    rng = np.random.default_rng(0)
+
+    def createPolygons(count):
+        polygons = []
+
+        for _ in range(count):
+            vertexCount = int(rng.integers(3, 6))
+            vertices = rng.uniform(-1000.0, 1000.0, (vertexCount, 10)).astype('<f4')
+            vertices[:, 6:] /= 1000.0
+            polygons.append((int(rng.integers(0, MATERIAL_COUNT)), 0, int(rng.integers(0, 1 << 16)), vertices))
+
+        return polygons
+
+    return { 'bounds': rng.uniform(-10.0, 10.0, 6), 'polygons': createPolygons(1), 'children': (
+        { 'bounds': rng.uniform(-10.0, 10.0, 6), 'polygons': createPolygons(2), 'children': (None, None) },
+        { 'bounds': rng.uniform(-10.0, 10.0, 6), 'polygons': createPolygons(3), 'children': (None, None) }
+    ) }
+
+def packNode(node):
+    data = struct.pack('<6f', *node['bounds']) + struct.pack('<4f', 0.0, 0.0, 1.0, 0.0)
+
+    for child in node['children']:
+        data += b'\x01' + packNode(child) if child is not None else b'\x00'
+
+    data += struct.pack('<I', len(node['polygons']))
+
+    for matID, convexID, drawFlags, vertices in node['polygons']:
+        data += struct.pack('<i3I', matID, convexID, drawFlags, len(vertices)) + vertices.tobytes() + struct.pack('<3f', 0.0, 0.0, 1.0)
+
+    return data
+
+def countNodes(node):
+    return 1 + sum(countNodes(child) for child in node['children'] if child is not None)
+
+def countPolygons(node):
+    return len(node['polygons']) + sum(countPolygons(child) for child in node['children'] if child is not None)
+
+def countVertices(node):
+    return sum(len(vertices) for *_, vertices in node['polygons']) + sum(countVertices(child) for child in node['children'] if child is not None)
+
+def writeBsp(path, root):
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<6I', BSP_ID, BSP_VERSION, countNodes(root), countPolygons(root), countVertices(root), 0))
+        file.write(packNode(root))
+
+# The bsptree counts match the octree's, so a .bsp of the same root validates against it
+def writeRs(path, root):
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<3I', RS2_ID, RS2_VERSION, MATERIAL_COUNT))
+        file.write(b'material\x00' * MATERIAL_COUNT)
+        file.write(struct.pack('<2I', 1, 3))
+        file.write(struct.pack('<iI4ffI', 0, 0, 0.0, 0.0, 1.0, 0.0, 0.5, 3))
+        file.write(struct.pack('<9f', 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0))
+        file.write(struct.pack('<3f', 0.0, 0.0, 1.0) * 3)
+        file.write(struct.pack('<4I', countNodes(root), countPolygons(root), countVertices(root), 0) * 2)
+        file.write(packNode(root))
+
+# The per vertex decode readRs() and readBsp() used before createRs2TreeBuffers(), walking the same node layout
+def decodePerVertex(data, convertUnits):
+    file = io.BytesIO(data)
+    bounds = []
+    vertices = []
+    polygons = []
+
+    def openNode():
+        bounds.append(readBounds(file, convertUnits))
+
+        skipBytes(file, 4 * 4) # skip plane
+
+        if readBool(file): openNode() # positive
+        if readBool(file): openNode() # negative
+
+        for _ in range(readUInt(file)):
+            matID = readInt(file)
+            convexID = readUInt(file)
+            drawFlags = readUInt(file)
+            vertexCount = readUInt(file)
+
+            for v in range(vertexCount):
+                pos = readCoordinate(file, convertUnits, True)
+                nor = readDirection(file, True)
+                uv1 = readUV2(file)
+                uv2 = readUV2(file)
+
+                vertices.append(Rs2TreeVertex(pos, nor, uv1, uv2))
+
+            skipBytes(file, 4 * 3) # skip face normal
+
+            polygons.append(Rs2TreePolygon(matID, convexID, drawFlags, vertexCount, len(vertices) - vertexCount))
+
+    openNode()
+
+    return bounds, vertices, polygons
+
+def read(reader, path, convertUnits):
+    state = GZRS2State()
+    state.convertUnits = convertUnits
+    state.xmlRsMats = [None] * MATERIAL_COUNT
+    state.rsCPolygonCount = 1
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = reader(reports, file, path, state)
+
+    # The fixture's vertices are random, so the convex match may warn about them
+    assert result is None and not [message for type, message in reports.reports if type != { 'WARNING' }]
+
+    return state
+
+def assertParity(buffers, treeBounds, root, convertUnits):
+    bounds, vertices, polygons = decodePerVertex(packNode(root), convertUnits)
+
+    def toArray(attribute):
+        return np.array([tuple(getattr(vertex, attribute)) for vertex in vertices], dtype = np.float32)
+
+    assert np.allclose(buffers.positions, toArray('pos'), rtol = 1e-6, atol = 0.0)
+    assert np.allclose(buffers.normals, toArray('nor'), rtol = 1e-6, atol = 1e-7)
+    assert np.array_equal(buffers.uv1s, toArray('uv1'))
+    assert np.array_equal(buffers.uv2s, toArray('uv2'))
+
+    assert buffers.matIDs.tolist() == [polygon.matID for polygon in polygons]
+    assert buffers.convexIDs.tolist() == [polygon.convexID for polygon in polygons]
+    assert buffers.drawFlags.tolist() == [polygon.drawFlags for polygon in polygons]
+    assert buffers.vertexCounts.tolist() == [polygon.vertexCount for polygon in polygons]
+    assert buffers.vertexOffsets.tolist() == [polygon.vertexOffset for polygon in polygons]
+
+    assert [tuple(map(tuple, b)) for b in treeBounds] == [tuple(map(tuple, b)) for b in bounds]
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+def test_read_bsp_matches_per_vertex_decode(tmp_path, convertUnits):
+    root = createFixture()
+    path = str(tmp_path / 'fixture.bsp')
+    writeBsp(path, root)
+
+    state = read(readBsp, path, convertUnits)
+
+    assertParity(state.bspTreeBuffers, state.bspTreeBounds, root, convertUnits)
+
+@pytest.mark.parametrize('convertUnits', (False, True))
+def test_read_rs_matches_per_vertex_decode(tmp_path, convertUnits):
+    root = createFixture()
+    path = str(tmp_path / 'fixture.rs')
+    writeRs(path, root)
+
+    state = read(readRs, path, convertUnits)
+
+    assertParity(state.rsOctreeBuffers, state.rsOctreeBounds, root, convertUnits)
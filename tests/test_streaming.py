@@ -0,0 +1,90 @@
+import os, errno
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gzrs2 import io_gzrs2
+from io_scene_gzrs2.io_gzrs2 import StreamingWriter
+
+ORIGINAL = bytes(range(256)) * 64
+
+class FailingFlushFile:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def flush(self):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+@pytest.fixture
+def lmpath(tmp_path):
+    path = tmp_path / 'map.rs.lm'
+    path.write_bytes(ORIGINAL)
+
+    return str(path)
+
+def assertUntouched(path):
+    with open(path, 'rb') as file:
+        assert file.read() == ORIGINAL
+
+    assert not os.path.exists(f"{ path }{ os.extsep }tmp")
+
+def test_replaces_on_success(lmpath):
+    with StreamingWriter(lmpath, chunkSize = 64) as file:
+        file.write(b'\x01' * 1000)
+
+        with open(lmpath, 'rb') as original:
+            assert original.read() == ORIGINAL
+
+    with open(lmpath, 'rb') as file:
+        assert file.read() == b'\x01' * 1000
+
+    assert not os.path.exists(f"{ lmpath }{ os.extsep }tmp")
+
+def test_interrupted_mid_write(lmpath):
+    with pytest.raises(RuntimeError):
+        with StreamingWriter(lmpath, chunkSize = 64) as file:
+            file.write(b'\x01' * 1000)
+            raise RuntimeError("interrupted")
+
+    assertUntouched(lmpath)
+
+def test_copy_from_short_source(lmpath, tmp_path):
+    source = tmp_path / 'short.bin'
+    source.write_bytes(b'\x02' * 100)
+
+    with pytest.raises(EOFError):
+        with StreamingWriter(lmpath, chunkSize = 64) as file, open(source, 'rb') as sourceFile:
+            file.copyFrom(sourceFile, 1000)
+
+    assertUntouched(lmpath)
+
+def test_flush_failure(lmpath):
+    with pytest.raises(OSError):
+        with StreamingWriter(lmpath, chunkSize = 1 << 16) as file:
+            file.write(b'\x01' * 1000)
+            file.file = FailingFlushFile(file.file)
+
+    assertUntouched(lmpath)
+
+def test_fsync_failure(lmpath, monkeypatch):
+    def fsync(fd):
+        raise OSError(errno.EIO, "Input/output error")
+
+    monkeypatch.setattr(io_gzrs2.os, 'fsync', fsync)
+
+    with pytest.raises(OSError):
+        with StreamingWriter(lmpath, chunkSize = 64) as file:
+            file.write(b'\x01' * 1000)
+
+    assertUntouched(lmpath)
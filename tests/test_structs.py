@@ -0,0 +1,68 @@
+import io, re
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gzrs2.constants_gzrs2 import *
+from io_scene_gzrs2.io_gzrs2 import *
+
+# One value per field, repeat counts expand into that many fields, except for strings and padding
+def createValues(layout):
+    values = []
+
+    for count, code in re.findall(r'(\d*)([a-zA-Z?])', layout.format):
+        count = int(count) if count else 1
+
+        if      code == 'x':    continue
+        elif    code == 's':    values.append(bytes(range(65, 65 + count)))
+        else:
+            for _ in range(count):
+                if      code in 'bhi':  values.append(-len(values) - 1)
+                elif    code in 'BHI':  values.append(len(values) + 1)
+                elif    code == '?':    values.append(len(values) % 2 == 0)
+                elif    code == 'f':    values.append(len(values) + 0.5)
+
+    return tuple(values)
+
+@pytest.mark.parametrize('name', STRUCTS)
+def test_pack_into_unpack_from(name):
+    layout = STRUCTS[name]
+    values = createValues(layout)
+    buffer = bytearray(3 + layout.size)
+
+    assert packInto(name, buffer, 3, *values) == 3 + layout.size
+    assert unpackFrom(name, buffer, 3) == values
+    assert unpackFrom(name, bytes(buffer[3:])) == values
+
+@pytest.mark.parametrize('name', STRUCTS)
+def test_read_layout(tmp_path, name):
+    layout = STRUCTS[name]
+    values = createValues(layout)
+    path = tmp_path / 'record.bin'
+    path.write_bytes(layout.pack(*values) * 2)
+
+    with open(path, 'rb') as file:
+        assert readLayout(file, name) == values
+        assert file.tell() == layout.size
+
+    with MappedCursor(str(path)) as file:
+        assert readLayout(file, name) == readLayout(file, name) == values
+        assert file.tell() == layout.size * 2
+
+def test_dds_header_matches_writer():
+    pytest.importorskip('bpy')
+
+    from io_scene_gzrs2.lib.lib_gzrs2 import writeDDSHeader
+
+    file = io.BytesIO()
+    writeDDSHeader(file, 64, 64 * 64, 76 + 32 + 20 + 2048, 5)
+
+    # The importer has already read 'DD' and skips the rest of the magic
+    file.seek(4)
+    ddsFlags, width, height, mipCount, ddspfFlags, ddspfFourCC, ddsCaps = readLayout(file, 'ddsHeader')
+
+    assert (width, height, mipCount, ddspfFourCC) == (64, 64, 5, b'DXT1')
+    assert ddsFlags & DDSD_MIPMAPCOUNT and ddspfFlags == DDPF_FOURCC and ddsCaps & DDSCAPS_MIPMAP
+    assert file.tell() == len(file.getvalue()) == 128
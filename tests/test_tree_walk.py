@@ -0,0 +1,137 @@
+import struct
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gzrs2.io_gzrs2 import *
+
+TREE_DEPTH = 5000
+
+NODE_HEADER = struct.pack('<10f', *([0.0] * 10)) # bounds, plane
+TRIANGLE = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+
+# A chain of nodes that only ever takes the positive branch
+def walkChain(depth, leave):
+    def enter(node):
+        return node
+
+    def branch(node, b):
+        return node + 1 if b == 0 and node + 1 < depth else None
+
+    return walkTree(0, enter, branch, leave)
+
+def test_walk_tree_degenerate_depth():
+    order = []
+
+    def leave(node, children):
+        order.append(node)
+
+        return 1 + (children[0] or 0)
+
+    assert walkChain(TREE_DEPTH, leave) == TREE_DEPTH
+    assert order == list(range(TREE_DEPTH - 1, -1, -1))
+
+def test_walk_tree_abort_stops_the_walk():
+    order = []
+
+    def leave(node, children):
+        order.append(node)
+
+        return TREE_WALK_ABORT if node == TREE_DEPTH - 2 else node
+
+    assert walkChain(TREE_DEPTH, leave) is TREE_WALK_ABORT
+    assert order == [TREE_DEPTH - 1, TREE_DEPTH - 2]
+
+# The deepest node holds a single triangle, every node above it only has a positive child
+def packDegenerateTree(depth, convexID):
+    vertices = b''.join(struct.pack('<10f', *position, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0) for position in TRIANGLE)
+    polygon = struct.pack('<i3I', 0, convexID, 0, len(TRIANGLE)) + vertices + struct.pack('<3f', 0.0, 0.0, 1.0)
+
+    data = bytearray((NODE_HEADER + b'\x01') * (depth - 1))
+    data += NODE_HEADER + b'\x00\x00' + struct.pack('<I', 1) + polygon
+    data += (b'\x00' + struct.pack('<I', 0)) * (depth - 1)
+
+    return bytes(data)
+
+def writeDegenerateBsp(path, convexID):
+    from io_scene_gzrs2.constants_gzrs2 import BSP_ID, BSP_VERSION
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<6I', BSP_ID, BSP_VERSION, TREE_DEPTH, 1, len(TRIANGLE), 0))
+        file.write(packDegenerateTree(TREE_DEPTH, convexID))
+
+def writeDegenerateRs(path, convexID):
+    from io_scene_gzrs2.constants_gzrs2 import RS2_ID, RS2_VERSION
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<3I', RS2_ID, RS2_VERSION, 1))
+        file.write(b'material\x00')
+        file.write(struct.pack('<2I', 1, len(TRIANGLE)))
+        file.write(struct.pack('<iI4ffI', 0, 0, 0.0, 0.0, 1.0, 0.0, 0.5, len(TRIANGLE)))
+        file.write(b''.join(struct.pack('<3f', *position) for position in TRIANGLE))
+        file.write(struct.pack('<3f', 0.0, 0.0, 1.0) * len(TRIANGLE))
+        file.write(struct.pack('<4I', 0, 0, 0, 0))
+        file.write(struct.pack('<4I', TREE_DEPTH, 1, len(TRIANGLE), 0))
+        file.write(packDegenerateTree(TREE_DEPTH, convexID))
+
+def readDegenerate(reader, path, convexCount):
+    pytest.importorskip('bpy')
+
+    from io_scene_gzrs2.classes_gzrs2 import GZRS2State, GZRS2ReportBuffer
+
+    state = GZRS2State()
+    state.xmlRsMats = [None]
+    state.rsCPolygonCount = convexCount
+    state.doConvex = True
+    reports = GZRS2ReportBuffer()
+
+    with MappedCursor(path) as file:
+        result = reader(reports, file, path, state)
+
+    return result, reports.reports, state
+
+def test_read_bsp_degenerate_depth(tmp_path):
+    from io_scene_gzrs2.reading.readbsp_gzrs2 import readBsp
+
+    path = str(tmp_path / 'degenerate.bsp')
+    writeDegenerateBsp(path, 0)
+    result, reports, state = readDegenerate(readBsp, path, 1)
+
+    assert result is None and not reports
+    assert len(state.bspTreeBounds) == TREE_DEPTH
+    assert len(state.bspTreeBuffers.positions) == len(TRIANGLE)
+
+def test_read_bsp_cancels_inside_the_walk(tmp_path):
+    from io_scene_gzrs2.reading.readbsp_gzrs2 import readBsp
+
+    path = str(tmp_path / 'degenerate.bsp')
+    writeDegenerateBsp(path, 5)
+    result, reports, state = readDegenerate(readBsp, path, 1)
+
+    assert result == { 'CANCELLED' }
+    assert [type for type, _ in reports] == [{ 'ERROR' }]
+    assert len(state.bspTreeBuffers.positions) == 0
+
+def test_read_rs_degenerate_depth(tmp_path):
+    from io_scene_gzrs2.reading.readrs_gzrs2 import readRs
+
+    path = str(tmp_path / 'degenerate.rs')
+    writeDegenerateRs(path, 0)
+    result, reports, state = readDegenerate(readRs, path, None)
+
+    assert result is None and not reports
+    assert len(state.rsOctreeBounds) == TREE_DEPTH
+    assert list(state.rsConvexOctreeIDs) == [0, 1, 2]
+
+def test_read_rs_cancels_inside_the_walk(tmp_path):
+    from io_scene_gzrs2.reading.readrs_gzrs2 import readRs
+
+    path = str(tmp_path / 'degenerate.rs')
+    writeDegenerateRs(path, 5)
+    result, reports, state = readDegenerate(readRs, path, None)
+
+    assert result == { 'CANCELLED' }
+    assert [type for type, _ in reports] == [{ 'ERROR' }]
+    assert len(state.rsOctreeBuffers.positions) == 0